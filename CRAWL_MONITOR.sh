@@ -6,6 +6,10 @@ echo "CRAWL PROGRESS MONITOR"
 echo "=========================================="
 echo ""
 
+# progress / throughput / ETA from the crawler's crawl_event telemetry
+python3 scripts/crawl_status.py
+echo ""
+
 if [ -f crawl_5000_matches.log ]; then
     echo "Latest log entries:"
     echo "---"
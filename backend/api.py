@@ -1,7 +1,19 @@
-from typing import List, Literal, Optional
+import asyncio
+import os
+from typing import List, Literal, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
+import dupr_json
+from dupr_metrics import CLIENT_METRICS
+from dupr_rating_index import RatingIndex
+from duprly_secrets import get_secret
+
+from . import queries
+from .cache import ResponseCache, cached_json
+from .crawl import CrawlBusy, CrawlRunner
 from .api_models import (
     CrawlRunRequest,
     CrawlStatus,
@@ -10,10 +22,99 @@ from .api_models import (
     MatchSummary,
     PlayerMatchesResponse,
     PlayerSummary,
+    SimilarMatch,
     SimilarMatchesResponse,
 )
+from .db import InvalidCursor, decode_cursor, encode_cursor, get_session, init_db
+from .similarity import explain_similarity
+from .similarity_index import INDEX_PATH, SimilarityIndex
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with dupr_json (orjson when available)."""
+
+    def render(self, content) -> bytes:
+        return dupr_json.dumpb(content)
+
+
+app = FastAPI(title="duprly api", version="0.1.0", default_response_class=FastJSONResponse)
+
+_similarity_index: Optional[Tuple[str, SimilarityIndex]] = None
+_similarity_lock = asyncio.Lock()
+
+# DUPRLY_METRICS=0 turns off GET /metrics
+METRICS_ENABLED = os.getenv("DUPRLY_METRICS", "1") != "0"
+
+crawl_runner = CrawlRunner()
+response_cache = ResponseCache()
+_rating_index: Optional[Tuple[str, RatingIndex]] = None
+
+
+@app.on_event("startup")
+async def startup() -> None:
+    await init_db()
+    await crawl_runner.resume()
+
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    await crawl_runner.stop()
+
+
+def _require_player_id(player_id: str) -> int:
+    dupr_id = queries.parse_player_id(player_id)
+    if dupr_id is None:
+        raise HTTPException(status_code=404, detail=f"Player {player_id} not found")
+    return dupr_id
+
+
+def _my_player_id() -> int:
+    value = get_secret("DUPR_PLAYER_ID")
+    dupr_id = queries.parse_player_id(value) if value else None
+    if dupr_id is None:
+        raise HTTPException(status_code=400, detail="DUPR_PLAYER_ID (numeric) must be set for scope=me / mine")
+    return dupr_id
+
+
+def _load_similarity_index() -> SimilarityIndex:
+    if os.path.exists(INDEX_PATH):
+        return SimilarityIndex.load(INDEX_PATH)
+    return SimilarityIndex()
+
+
+async def get_rating_index(session: AsyncSession) -> RatingIndex:
+    """Rating index over local players, rebuilt when the DB write stamp moves."""
+    global _rating_index
+    generation = response_cache.generation.current()
+    if _rating_index is None or _rating_index[0] != generation:
+        players = await queries.fetch_players(session)
+        _rating_index = (generation, RatingIndex.from_players(players))
+    return _rating_index[1]
+
 
-app = FastAPI(title="duprly api", version="0.1.0")
+async def get_similarity_index(session: AsyncSession) -> SimilarityIndex:
+    """
+    Saved similarity index (see `duprly build-match-features`), caught up with
+    match_feature rows written since whenever the DB write stamp moves.
+    """
+    global _similarity_index
+    generation = response_cache.generation.current()
+    if _similarity_index is not None and _similarity_index[0] == generation:
+        return _similarity_index[1]
+    added = 0
+    async with _similarity_lock:
+        if _similarity_index is None or _similarity_index[0] != generation:
+            if _similarity_index is None:
+                index = await asyncio.to_thread(_load_similarity_index)
+            else:
+                index = _similarity_index[1]
+            rows = (await session.execute(index.pending_select())).all()
+            added = index.add_feature_rows(rows)
+            _similarity_index = (generation, index)
+        index = _similarity_index[1]
+    if added:
+        await asyncio.to_thread(index.save, INDEX_PATH)
+    return index
 
 
 @app.get("/health", response_model=HealthResponse)
@@ -21,48 +122,126 @@ def health() -> HealthResponse:
     return HealthResponse()
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics(format: Literal["prometheus", "json"] = "prometheus"):
+    """DuprClient request metrics (crawler calls) as Prometheus text or a JSON snapshot."""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if format == "json":
+        return CLIENT_METRICS.snapshot()
+    return PlainTextResponse(CLIENT_METRICS.prometheus_text(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/me", response_model=PlayerSummary)
 def get_me() -> PlayerSummary:
     raise HTTPException(status_code=501, detail="Not implemented")
 
 
 @app.get("/players/{player_id}", response_model=PlayerSummary)
-def get_player(player_id: str) -> PlayerSummary:
-    raise HTTPException(status_code=501, detail="Not implemented")
+async def get_player(
+    player_id: str, request: Request, session: AsyncSession = Depends(get_session)
+) -> Response:
+    async def build() -> bytes:
+        player = await queries.fetch_player(session, _require_player_id(player_id))
+        if player is None:
+            raise HTTPException(status_code=404, detail=f"Player {player_id} not found")
+        return dupr_json.dumpb(queries.player_summary(player))
+
+    return await cached_json(response_cache, request, build)
 
 
 @app.get("/players/{player_id}/matches", response_model=PlayerMatchesResponse)
-def get_player_matches(
+async def get_player_matches(
     player_id: str,
+    request: Request,
     limit: int = Query(50, ge=1, le=200),
     cursor: Optional[str] = None,
-) -> PlayerMatchesResponse:
-    raise HTTPException(status_code=501, detail="Not implemented")
+    session: AsyncSession = Depends(get_session),
+) -> Response:
+    dupr_id = _require_player_id(player_id)
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def build() -> bytes:
+        matches, next_key = await queries.fetch_player_matches(session, dupr_id, limit, after)
+        return dupr_json.dumpb(PlayerMatchesResponse(
+            player_id=player_id,
+            matches=[queries.match_summary(m, perspective=dupr_id) for m in matches],
+            next_cursor=encode_cursor(*next_key) if next_key else None,
+        ))
+
+    return await cached_json(response_cache, request, build)
 
 
 @app.get("/clubs/{club_id}/players", response_model=List[PlayerSummary])
-def get_club_players(
+async def get_club_players(
     club_id: str,
+    request: Request,
     query: Optional[str] = Query(None, min_length=1),
-) -> List[PlayerSummary]:
-    raise HTTPException(status_code=501, detail="Not implemented")
+    rating_min: Optional[float] = None,
+    rating_max: Optional[float] = None,
+    sort: Literal["name", "rating"] = "name",
+    session: AsyncSession = Depends(get_session),
+) -> Response:
+    # The local player table is the roster of the configured club only.
+    if club_id != (get_secret("DUPR_CLUB_ID") or ""):
+        raise HTTPException(status_code=404, detail=f"Club {club_id} is not synced locally")
+
+    async def build() -> bytes:
+        if rating_min is None and rating_max is None and sort == "name":
+            players = await queries.fetch_players(session, query)
+        else:
+            # doubles rating order / range straight from the sorted index
+            index = await get_rating_index(session)
+            if rating_min is not None or rating_max is not None:
+                players = index.range("doubles", rating_min, rating_max, descending=sort == "rating")
+                if sort == "name":
+                    players.sort(key=lambda p: p.full_name or "")
+            else:
+                players = index.sorted_items("doubles", descending=True)
+            if query:
+                needle = query.lower()
+                players = [p for p in players if needle in (p.full_name or "").lower()]
+        return dupr_json.dumpb([queries.player_summary(p) for p in players])
+
+    return await cached_json(response_cache, request, build)
 
 
 @app.get("/matches/recent", response_model=List[MatchSummary])
-def get_recent_matches(
+async def get_recent_matches(
+    request: Request,
     scope: Literal["me", "club"] = "me",
     limit: int = Query(50, ge=1, le=200),
-) -> List[MatchSummary]:
-    raise HTTPException(status_code=501, detail="Not implemented")
+    session: AsyncSession = Depends(get_session),
+) -> Response:
+    dupr_id = _my_player_id() if scope == "me" else None
+
+    async def build() -> bytes:
+        matches = await queries.fetch_recent_matches(session, limit, dupr_id)
+        return dupr_json.dumpb([queries.match_summary(m, perspective=dupr_id) for m in matches])
+
+    return await cached_json(response_cache, request, build)
 
 
 @app.get("/matches/{match_id}", response_model=MatchDetail)
-def get_match(match_id: str) -> MatchDetail:
-    raise HTTPException(status_code=501, detail="Not implemented")
+async def get_match(
+    match_id: str, request: Request, session: AsyncSession = Depends(get_session)
+) -> Response:
+    async def build() -> bytes:
+        match = None
+        if match_id.isdigit():
+            match = await queries.fetch_match(session, int(match_id))
+        if match is None:
+            raise HTTPException(status_code=404, detail=f"Match {match_id} not found")
+        return dupr_json.dumpb(queries.match_detail(match))
+
+    return await cached_json(response_cache, request, build)
 
 
 @app.get("/matches/{match_id}/similar", response_model=SimilarMatchesResponse)
-def get_similar_matches(
+async def get_similar_matches(
     match_id: str,
     k: int = Query(20, ge=1, le=100),
     scope: Literal["club", "mine", "global"] = "club",
@@ -70,20 +249,83 @@ def get_similar_matches(
     opponent_rating_min: Optional[float] = None,
     opponent_rating_max: Optional[float] = None,
     match_type: Optional[str] = None,
+    session: AsyncSession = Depends(get_session),
 ) -> SimilarMatchesResponse:
-    raise HTTPException(status_code=501, detail="Not implemented")
+    """
+    Nearest stored matches by weighted feature distance. scope=club searches
+    club crawler matches, mine the matches of DUPR_PLAYER_ID and global every
+    match with stored features.
+    """
+    if scope == "club":
+        within = queries.club_match_ids()
+    elif scope == "mine":
+        within = queries.player_dupr_match_ids(_my_player_id())
+    else:
+        within = None
+    index = await get_similarity_index(session)
+    target = index.features_for(match_id)
+    if target is None:
+        raise HTTPException(status_code=404, detail=f"No features for match {match_id}")
+
+    # scope and match_type are not index axes: filter the hits in SQL and ask
+    # the index for more neighbours until k survive or it runs out.
+    fetch_k = k
+    while True:
+        hits = index.query(
+            target,
+            fetch_k,
+            min_rel=min_rel,
+            rating_min=opponent_rating_min,
+            rating_max=opponent_rating_max,
+            exclude_id=match_id,
+        )
+        features = await queries.fetch_match_features(
+            session, [int(mid) for mid, _, _ in hits], within=within, match_type=match_type
+        )
+        hits = [(int(mid), distance, side) for mid, distance, side in hits if int(mid) in features]
+        if len(hits) >= k or fetch_k >= len(index):
+            break
+        fetch_k *= 4
+    hits = hits[:k]
+
+    matches = await queries.fetch_matches(session, [mid for mid, _, _ in hits])
+    results: List[SimilarMatch] = []
+    for mid, distance, side in hits:
+        feature = features[mid]
+        match = matches.get(mid)
+        if match is not None:
+            # scores from the side whose orientation matched the target
+            summary = queries.match_summary(match, perspective=queries.side_player(match, side))
+        else:
+            summary = MatchSummary(
+                match_id=str(mid),
+                played_at=queries._played_at(feature.event_date),
+                match_type=feature.match_type,
+            )
+        results.append(
+            SimilarMatch(
+                match=summary,
+                score=1.0 / (1.0 + distance),
+                distance=distance,
+                factors=explain_similarity(list(target), list(index.features_for(mid, side))),
+            )
+        )
+    return SimilarMatchesResponse(match_id=match_id, k=k, scope=scope, results=results)
 
 
 @app.post("/crawl/run", response_model=CrawlStatus)
-def run_crawl(request: CrawlRunRequest) -> CrawlStatus:
-    raise HTTPException(status_code=501, detail="Not implemented")
+async def run_crawl(request: CrawlRunRequest) -> CrawlStatus:
+    try:
+        return await crawl_runner.start(request)
+    except CrawlBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
 
 @app.get("/crawl/status", response_model=CrawlStatus)
-def get_crawl_status() -> CrawlStatus:
-    raise HTTPException(status_code=501, detail="Not implemented")
+async def get_crawl_status() -> CrawlStatus:
+    return crawl_runner.status()
 
 
 @app.post("/crawl/player/{player_id}/refresh", response_model=CrawlStatus)
-def refresh_player(player_id: str) -> CrawlStatus:
-    raise HTTPException(status_code=501, detail="Not implemented")
+async def refresh_player(player_id: str) -> CrawlStatus:
+    return await crawl_runner.refresh_player(player_id)
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable, NamedTuple, Optional, Union
+
+from fastapi import Request, Response
+
+from dupr_db import read_write_generation, write_stamp_path
+
+from .db import DATABASE_URL
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("DUPRLY_CACHE_ENTRIES", "512"))
+CACHE_DIR = os.getenv("DUPRLY_CACHE_DIR") or None
+
+
+class WriteGeneration:
+    """
+    Identifies the current state of the DB for cache validation.
+
+    Writers bump the counter in the database's stamp file after committing
+    (mark_db_written), so reading it tells a reader whether anything changed
+    without opening SQLite. `bump()` invalidates this process's caches by hand.
+    """
+
+    def __init__(self, stamp_path: Optional[Union[str, Path]] = None) -> None:
+        self.stamp_path = str(stamp_path or write_stamp_path(DATABASE_URL))
+        self._local = 0
+
+    def bump(self) -> None:
+        self._local += 1
+
+    def current(self) -> str:
+        return f"{self._local}.{read_write_generation(self.stamp_path)}"
+
+
+class CachedResponse(NamedTuple):
+    generation: str
+    etag: str
+    body: bytes
+
+
+class ResponseCache:
+    """
+    Serialized JSON responses keyed by request, in an in-process LRU with an
+    optional on-disk second tier (`disk_dir`) that survives restarts and is
+    shared by workers. Entries from an older write generation are misses.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        disk_dir: Optional[Union[str, Path]] = CACHE_DIR,
+        generation: Optional[WriteGeneration] = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.generation = generation or WriteGeneration()
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / (hashlib.sha1(key.encode()).hexdigest() + ".json")
+
+    def _read_disk(self, key: str, generation: str) -> Optional[CachedResponse]:
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                header = json.loads(f.readline())
+                if header.get("generation") != generation or header.get("key") != key:
+                    return None
+                return CachedResponse(generation, header["etag"], f.read())
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_disk(self, key: str, entry: CachedResponse) -> None:
+        path = self._disk_path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        header = {"generation": entry.generation, "etag": entry.etag, "key": key}
+        try:
+            with open(tmp, "wb") as f:
+                f.write(json.dumps(header).encode() + b"\n")
+                f.write(entry.body)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        generation = self.generation.current()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.generation == generation:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        if self.disk_dir is not None:
+            entry = self._read_disk(key, generation)
+            if entry is not None:
+                self._store(key, entry)
+                self.hits += 1
+                return entry
+        self.misses += 1
+        return None
+
+    def put(self, key: str, body: bytes, generation: Optional[str] = None) -> CachedResponse:
+        """
+        Cache `body`. Pass the generation read *before* querying so a write
+        that lands mid-query leaves the entry already stale.
+        """
+        generation = generation or self.generation.current()
+        digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+        entry = CachedResponse(generation, f'"{digest}"', body)
+        self._store(key, entry)
+        if self.disk_dir is not None:
+            self._write_disk(key, entry)
+        return entry
+
+    def _store(self, key: str, entry: CachedResponse) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        self.generation.bump()
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+async def cached_json(
+    cache: ResponseCache,
+    request: Request,
+    build: Callable[[], Awaitable[bytes]],
+) -> Response:
+    """
+    Serve `build()`'s JSON body from the cache, keyed by path and query.
+    Hits never touch the DB; a matching If-None-Match gets a 304.
+    """
+    key = request.url.path + "?" + str(request.query_params)
+    entry = cache.get(key)
+    if entry is None:
+        generation = cache.generation.current()
+        entry = cache.put(key, await build(), generation)
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
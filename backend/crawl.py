@@ -0,0 +1,439 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from dupr_client import DuprClient, RateLimiter
+from dupr_db import (
+    ClubMatchPlayer,
+    ClubMatchRaw,
+    CrawlQueueItem,
+    CrawlRun,
+    Match,
+    MatchFeature,
+    mark_db_written,
+    open_db,
+)
+from dupr_raw_codec import encode_raw
+from duprly_secrets import get_secret
+
+from .api_models import CrawlRunRequest, CrawlStatus
+from .db import SYNC_DATABASE_URL
+
+DEFAULT_MAX_DEPTH = 1
+DEFAULT_MAX_NEW_PLAYERS = 500
+DEFAULT_RATE_LIMIT_PER_MIN = 60
+DEFAULT_WORKERS = int(os.getenv("DUPRLY_CRAWL_WORKERS", "2"))
+MODEL_FILE = os.getenv("DUPRLY_MODEL_FILE", "dupr_model.json")
+
+# Matches per history request; the same page size get_member_match_history_p uses.
+HISTORY_PAGE_SIZE = 10
+
+# How long an idle worker waits before checking whether a sibling has
+# enqueued more players.
+_POLL_SEC = 0.2
+
+
+class CrawlBusy(RuntimeError):
+    pass
+
+
+@dataclass
+class CrawlParams:
+    seed: List[str] = field(default_factory=list)
+    window_days: Optional[int] = None
+    max_depth: int = DEFAULT_MAX_DEPTH
+    max_new_players: int = DEFAULT_MAX_NEW_PLAYERS
+    rate_limit_per_min: int = DEFAULT_RATE_LIMIT_PER_MIN
+
+    @classmethod
+    def from_request(cls, request: CrawlRunRequest) -> "CrawlParams":
+        p = cls(seed=[str(s) for s in request.seed or []], window_days=request.window_days)
+        if request.max_depth is not None:
+            p.max_depth = request.max_depth
+        if request.max_new_players is not None:
+            p.max_new_players = request.max_new_players
+        if request.rate_limit_per_min:
+            p.rate_limit_per_min = request.rate_limit_per_min
+        return p
+
+    @classmethod
+    def from_json(cls, s: str) -> "CrawlParams":
+        return cls(**json.loads(s or "{}"))
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    def cutoff(self) -> Optional[str]:
+        if not self.window_days:
+            return None
+        return (date.today() - timedelta(days=self.window_days)).isoformat()
+
+
+def default_client(rate_limit_per_min: int) -> DuprClient:
+    username = get_secret("DUPR_USERNAME")
+    password = get_secret("DUPR_PASSWORD")
+    if not username or not password:
+        raise ValueError("DUPR_USERNAME and DUPR_PASSWORD must be set in .env or keychain")
+    client = DuprClient(rate_limiter=RateLimiter(rate_limit_per_min))
+    client.auth_user(username, password)
+    return client
+
+
+def _load_predictor():
+    try:
+        from dupr_predictor import DuprPredictor
+        return DuprPredictor(MODEL_FILE)
+    except FileNotFoundError:
+        return None
+
+
+def _match_player_ids(mdata: dict) -> List[str]:
+    ids = []
+    for team in mdata.get("teams") or []:
+        for key in ("player1", "player2"):
+            p = team.get(key) or {}
+            pid = p.get("id") or p.get("duprId")
+            if pid is not None:
+                ids.append(str(pid))
+    return ids
+
+
+class CrawlRunner:
+    """
+    In-process BFS crawler behind the /crawl endpoints.
+
+    The frontier lives in the crawl_queue table, so a restart resumes the
+    active run where it stopped: resume() puts in-progress players back on
+    the queue. DUPR calls and DB writes are blocking and run in worker
+    threads via asyncio.to_thread; request handlers only read the in-memory
+    counters, which are refreshed from the queue after every state change.
+    Requests to DUPR are paced by a RateLimiter shared by all workers.
+    """
+
+    def __init__(
+        self,
+        engine=None,
+        client_factory: Callable[[int], DuprClient] = default_client,
+        workers: int = DEFAULT_WORKERS,
+    ) -> None:
+        self._engine = engine
+        self._client_factory = client_factory
+        self._workers = max(1, workers)
+        self._task: Optional[asyncio.Task] = None
+        self._claim_lock = asyncio.Lock()
+        # SQLite allows one writer; workers take turns for their short writes
+        # rather than failing with "database is locked".
+        self._db_lock = threading.Lock()
+        self._run_id: Optional[int] = None
+        self._params: Optional[CrawlParams] = None
+        self._status = "idle"
+        self._counts: Dict[str, int] = {}
+        self._last_run_at: Optional[datetime] = None
+        self._predictor = None
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            self._engine = open_db(SYNC_DATABASE_URL)
+        return self._engine
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def status(self) -> CrawlStatus:
+        return CrawlStatus(
+            status="running" if self.running else self._status,
+            queued=self._counts.get("queued", 0),
+            in_progress=self._counts.get("in_progress", 0),
+            errors=self._counts.get("error", 0),
+            last_run_at=self._last_run_at,
+        )
+
+    async def start(self, request: CrawlRunRequest) -> CrawlStatus:
+        if self.running:
+            raise CrawlBusy(f"Crawl run {self._run_id} is already running")
+        params = CrawlParams.from_request(request)
+        run_id = await asyncio.to_thread(self._create_run, params)
+        self._launch(run_id, params)
+        return self.status()
+
+    async def resume(self) -> Optional[int]:
+        """Pick up a run left unfinished by a previous process."""
+        found = await asyncio.to_thread(self._load_active_run)
+        if found is None:
+            return None
+        run_id, params = found
+        logger.info(f"resuming crawl run {run_id}")
+        self._launch(run_id, params)
+        return run_id
+
+    async def refresh_player(self, player_id: str) -> CrawlStatus:
+        """
+        Re-crawl one player. Joins the running crawl if there is one
+        (without expanding to new players), else starts a single-player run.
+        """
+        if self.running:
+            await asyncio.to_thread(
+                self._enqueue, self._run_id, [player_id], self._params.max_depth, True
+            )
+            return self.status()
+        return await self.start(CrawlRunRequest(seed=[player_id], max_depth=0))
+
+    async def stop(self) -> None:
+        """Cancel workers; unfinished players are requeued by resume()."""
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def _launch(self, run_id: int, params: CrawlParams) -> None:
+        self._run_id = run_id
+        self._params = params
+        self._status = "running"
+        self._task = asyncio.create_task(self._run(run_id, params))
+
+    async def _run(self, run_id: int, params: CrawlParams) -> None:
+        error = None
+        try:
+            client = await asyncio.to_thread(self._client_factory, params.rate_limit_per_min)
+            if self._predictor is None:
+                self._predictor = await asyncio.to_thread(_load_predictor)
+            if not params.seed and not sum(self._counts.values()):
+                seeds = await asyncio.to_thread(self._club_seed, client)
+                await asyncio.to_thread(self._enqueue, run_id, seeds, 0)
+            await asyncio.gather(
+                *(self._worker(run_id, params, client) for _ in range(self._workers))
+            )
+        except asyncio.CancelledError:
+            # the run stays "running" in the DB so resume() picks it up
+            self._status = "idle"
+            raise
+        except Exception as e:
+            logger.exception(f"crawl run {run_id} failed")
+            error = str(e)
+        self._status = "error" if error else "idle"
+        await asyncio.to_thread(self._finish_run, run_id, error)
+
+    async def _worker(self, run_id: int, params: CrawlParams, client: DuprClient) -> None:
+        while True:
+            async with self._claim_lock:
+                item = await asyncio.to_thread(self._claim, run_id)
+            if item is None:
+                if not self._counts.get("in_progress"):
+                    return
+                await asyncio.sleep(_POLL_SEC)
+                continue
+            item_id, player_id, depth = item
+            try:
+                matches = await asyncio.to_thread(self._fetch, client, player_id, params.cutoff())
+                await asyncio.to_thread(self._ingest, run_id, item_id, depth, matches, params)
+            except Exception as e:
+                logger.warning(f"crawl player {player_id} failed: {e}")
+                await asyncio.to_thread(self._fail, run_id, item_id, str(e))
+
+    # --- blocking helpers, run in worker threads ---
+
+    @contextmanager
+    def _session(self):
+        with self._db_lock, Session(self.engine) as sess:
+            yield sess
+
+    def _refresh_counts(self, sess: Session, run_id: int) -> None:
+        rows = sess.execute(
+            select(CrawlQueueItem.status, func.count())
+            .where(CrawlQueueItem.run_id == run_id)
+            .group_by(CrawlQueueItem.status)
+        ).all()
+        self._counts = {status: n for status, n in rows}
+
+    def _create_run(self, params: CrawlParams) -> int:
+        with self._session() as sess:
+            run = CrawlRun(params=params.to_json(), status="running", started_at=datetime.utcnow())
+            sess.add(run)
+            sess.commit()
+            self._last_run_at = run.started_at
+            run_id = run.id
+        self._counts = {}
+        self._enqueue(run_id, params.seed, 0)
+        return run_id
+
+    def _load_active_run(self) -> Optional[Tuple[int, CrawlParams]]:
+        with self._session() as sess:
+            last = sess.execute(
+                select(CrawlRun).order_by(CrawlRun.id.desc()).limit(1)
+            ).scalar_one_or_none()
+            if last is None:
+                return None
+            self._last_run_at = last.started_at
+            if last.status != "running":
+                self._status = "error" if last.status == "error" else "idle"
+                self._refresh_counts(sess, last.id)
+                return None
+            sess.execute(
+                update(CrawlQueueItem)
+                .where(CrawlQueueItem.run_id == last.id, CrawlQueueItem.status == "in_progress")
+                .values(status="queued")
+            )
+            sess.commit()
+            self._refresh_counts(sess, last.id)
+            return last.id, CrawlParams.from_json(last.params)
+
+    def _club_seed(self, client: DuprClient) -> List[str]:
+        club_id = get_secret("DUPR_CLUB_ID")
+        if not club_id:
+            raise ValueError("No seed players given and DUPR_CLUB_ID is not set")
+        rc, members = client.get_members_by_club(club_id)
+        if rc != 200:
+            raise RuntimeError(f"Failed to get club members: {rc}")
+        return [str(m.get("id") or m.get("duprId")) for m in members if m.get("id") or m.get("duprId")]
+
+    def _enqueue(self, run_id: int, player_ids: List[str], depth: int, requeue: bool = False) -> None:
+        with self._session() as sess:
+            for pid in player_ids:
+                item = sess.execute(
+                    select(CrawlQueueItem).where(
+                        CrawlQueueItem.run_id == run_id, CrawlQueueItem.player_id == str(pid)
+                    )
+                ).scalar_one_or_none()
+                if item is None:
+                    sess.add(CrawlQueueItem(run_id=run_id, player_id=str(pid), depth=depth))
+                elif requeue and item.status != "in_progress":
+                    item.status = "queued"
+                    item.depth = max(item.depth, depth)
+                    item.updated_at = datetime.utcnow()
+            sess.commit()
+            self._refresh_counts(sess, run_id)
+
+    def _claim(self, run_id: int) -> Optional[Tuple[int, str, int]]:
+        """Next queued player, shallowest first, marked in_progress."""
+        with self._session() as sess:
+            item = sess.execute(
+                select(CrawlQueueItem)
+                .where(CrawlQueueItem.run_id == run_id, CrawlQueueItem.status == "queued")
+                .order_by(CrawlQueueItem.depth, CrawlQueueItem.id)
+                .limit(1)
+            ).scalar_one_or_none()
+            if item is None:
+                return None
+            item.status = "in_progress"
+            item.updated_at = datetime.utcnow()
+            claimed = (item.id, item.player_id, item.depth)
+            sess.commit()
+            self._refresh_counts(sess, run_id)
+            return claimed
+
+    def _fetch(self, client: DuprClient, player_id: str, cutoff: Optional[str] = None) -> List[dict]:
+        """
+        Match history, newest first. With a `cutoff` date paging stops at the
+        first page reaching older matches, so a window refresh costs only the
+        pages inside the window.
+        """
+        if not player_id.isdigit():
+            rc, pdata = client.get_player(player_id)
+            if rc != 200 or not pdata or not pdata.get("id"):
+                raise RuntimeError(f"Cannot resolve player {player_id}: {rc}")
+            player_id = str(pdata["id"])
+        matches: List[dict] = []
+        while True:
+            rc, hits, total = client.get_member_match_history_page(
+                player_id, offset=len(matches), limit=HISTORY_PAGE_SIZE
+            )
+            if rc != 200:
+                raise RuntimeError(f"Match history for {player_id} returned {rc}")
+            matches.extend(hits)
+            if not hits or len(matches) >= total:
+                return matches
+            if cutoff and (hits[-1].get("eventDate") or "") < cutoff:
+                return matches
+
+    def _ingest(
+        self, run_id: int, item_id: int, depth: int, matches: List[dict], params: CrawlParams
+    ) -> None:
+        cutoff = params.cutoff()
+        club_id = get_secret("DUPR_CLUB_ID")
+        discovered: List[str] = []
+        stored = 0
+        with self._session() as sess:
+            for mdata in matches:
+                if cutoff and (mdata.get("eventDate") or "") < cutoff:
+                    continue
+                try:
+                    with sess.begin_nested():
+                        m = Match.save(sess, Match().from_json(mdata))
+                except Exception as e:
+                    logger.warning(f"skipping match {mdata.get('matchId')}: {e}")
+                    continue
+                if m is not None:
+                    stored += 1
+                feature = MatchFeature.from_json(mdata, self._predictor)
+                if feature is not None and feature.match_id is not None:
+                    MatchFeature.save(sess, feature)
+                m_club = mdata.get("clubId")
+                if club_id and m_club is not None and str(m_club) == str(club_id):
+                    exists = sess.execute(
+                        select(ClubMatchRaw.id).where(ClubMatchRaw.match_id == mdata.get("matchId"))
+                    ).first()
+                    if not exists:
+                        sess.add(ClubMatchRaw(
+                            match_id=mdata.get("matchId"),
+                            club_id=int(m_club),
+                            event_date=mdata.get("eventDate", ""),
+                            **encode_raw(sess, json.dumps(mdata)),
+                        ))
+                        sess.add_all(ClubMatchPlayer.from_json(mdata))
+                discovered.extend(_match_player_ids(mdata))
+
+            run = sess.get(CrawlRun, run_id)
+            if depth < params.max_depth and run.new_players < params.max_new_players:
+                known = set(sess.execute(
+                    select(CrawlQueueItem.player_id).where(CrawlQueueItem.run_id == run_id)
+                ).scalars())
+                for pid in dict.fromkeys(discovered):
+                    if run.new_players >= params.max_new_players:
+                        break
+                    if pid in known:
+                        continue
+                    sess.add(CrawlQueueItem(run_id=run_id, player_id=pid, depth=depth + 1))
+                    known.add(pid)
+                    run.new_players += 1
+
+            item = sess.get(CrawlQueueItem, item_id)
+            item.status = "done"
+            item.matches = stored
+            item.error = None
+            item.updated_at = datetime.utcnow()
+            sess.commit()
+            self._refresh_counts(sess, run_id)
+        if stored:
+            mark_db_written(self.engine)
+
+    def _fail(self, run_id: int, item_id: int, error: str) -> None:
+        with self._session() as sess:
+            item = sess.get(CrawlQueueItem, item_id)
+            item.status = "error"
+            item.error = error
+            item.updated_at = datetime.utcnow()
+            sess.commit()
+            self._refresh_counts(sess, run_id)
+
+    def _finish_run(self, run_id: int, error: Optional[str]) -> None:
+        with self._session() as sess:
+            run = sess.get(CrawlRun, run_id)
+            run.status = "error" if error else "done"
+            run.error = error
+            run.finished_at = datetime.utcnow()
+            sess.commit()
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import base64
+import json
+import os
+from typing import AsyncIterator, Optional, Tuple
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from dupr_db import ensure_schema
+
+DATABASE_URL = os.getenv("DUPRLY_DATABASE_URL", "sqlite+aiosqlite:///dupr.sqlite")
+# The same database for blocking writers in the API process (the crawl runner).
+SYNC_DATABASE_URL = make_url(DATABASE_URL).set(drivername="sqlite+pysqlite").render_as_string(hide_password=False)
+
+_engine: Optional[AsyncEngine] = None
+_sessionmaker: Optional[async_sessionmaker] = None
+
+
+def get_engine() -> AsyncEngine:
+    global _engine, _sessionmaker
+    if _engine is None:
+        _engine = create_async_engine(DATABASE_URL, echo=False)
+        _sessionmaker = async_sessionmaker(_engine, expire_on_commit=False)
+    return _engine
+
+
+async def init_db() -> None:
+    async with get_engine().begin() as conn:
+        await conn.run_sync(ensure_schema)
+
+
+async def get_session() -> AsyncIterator[AsyncSession]:
+    get_engine()
+    async with _sessionmaker() as session:
+        yield session
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(event_date: str, match_id: int) -> str:
+    """Opaque keyset cursor for the last row of a page."""
+    raw = json.dumps([event_date, match_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        event_date, match_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return str(event_date), int(match_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
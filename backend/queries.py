@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+from datetime import date, datetime, time, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from dupr_db import ClubMatchRaw, Match, MatchFeature, MatchTeam, Player, match_team_player
+
+from .api_models import MatchDetail, MatchParticipant, MatchSummary, PlayerSummary
+
+_MATCH_LOAD = selectinload(Match.teams).selectinload(MatchTeam.players).selectinload(Player.rating)
+_IN_CHUNK = 5000
+
+
+def parse_player_id(player_id: str) -> Optional[int]:
+    """Local rows are keyed by the numeric DUPR id; short ids are not stored."""
+    try:
+        return int(player_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def _played_at(value) -> datetime:
+    if isinstance(value, datetime):
+        dt = value
+    elif isinstance(value, date):
+        dt = datetime.combine(value, time.min)
+    else:
+        dt = datetime.fromisoformat(str(value))
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def _team_score(team: MatchTeam) -> Optional[int]:
+    games = [g for g in (team.score1, team.score2, team.score3) if g is not None and g >= 0]
+    return sum(games) if games else None
+
+
+def player_summary(player: Player) -> PlayerSummary:
+    rating = player.rating
+    return PlayerSummary(
+        player_id=str(player.dupr_id),
+        display_name=player.full_name,
+        gender=player.gender,
+        age=player.age,
+        doubles_rating=rating.doubles if rating else None,
+        singles_rating=rating.singles if rating else None,
+    )
+
+
+def _participants(match: Match) -> List[MatchParticipant]:
+    out = []
+    for side, team in enumerate(match.teams, 1):
+        for position, player in enumerate(team.players, 1):
+            out.append(
+                MatchParticipant(
+                    player_id=str(player.dupr_id),
+                    side=side,
+                    position=position,
+                    display_name=player.full_name,
+                    doubles_rating=player.rating.doubles if player.rating else None,
+                )
+            )
+    return out
+
+
+def match_summary(match: Match, perspective: Optional[int] = None) -> MatchSummary:
+    """
+    Summarize a match. Scores are from team 1's side unless `perspective`
+    (a numeric DUPR id) names a player on team 2.
+    """
+    teams = list(match.teams)
+    for_idx = 0
+    if perspective is not None and len(teams) == 2:
+        if any(p.dupr_id == perspective for p in teams[1].players):
+            for_idx = 1
+    winner_side = next((i for i, t in enumerate(teams, 1) if t.is_winner), None)
+    return MatchSummary(
+        match_id=str(match.match_id),
+        played_at=_played_at(match.date),
+        match_type=match.match_type or None,
+        score_for=_team_score(teams[for_idx]) if teams else None,
+        score_against=_team_score(teams[1 - for_idx]) if len(teams) == 2 else None,
+        winner_side=winner_side,
+        participants=_participants(match),
+    )
+
+
+def side_player(match: Match, side: int) -> Optional[int]:
+    """A numeric DUPR id on team `side`, for match_summary(perspective=...)."""
+    teams = list(match.teams)
+    if len(teams) < side or not teams[side - 1].players:
+        return None
+    return teams[side - 1].players[0].dupr_id
+
+
+def match_detail(match: Match) -> MatchDetail:
+    summary = match_summary(match)
+    return MatchDetail(
+        **summary.model_dump(),
+        metadata={
+            "name": match.name,
+            "match_source": match.match_source,
+            "match_score_added": match.match_score_added,
+        },
+        tags=[t for t in (match.match_source, match.match_type) if t],
+    )
+
+
+async def fetch_player(session: AsyncSession, dupr_id: int) -> Optional[Player]:
+    stmt = select(Player).where(Player.dupr_id == dupr_id).options(selectinload(Player.rating))
+    return (await session.execute(stmt)).scalars().first()
+
+
+async def fetch_players(session: AsyncSession, query: Optional[str] = None) -> Sequence[Player]:
+    stmt = select(Player).options(selectinload(Player.rating)).order_by(Player.full_name)
+    if query:
+        stmt = stmt.where(Player.full_name.ilike(f"%{query}%"))
+    return (await session.execute(stmt)).scalars().all()
+
+
+def _player_match_ids(dupr_id: int):
+    return (
+        select(MatchTeam.match_id)
+        .join(match_team_player, match_team_player.c.match_team_id == MatchTeam.id)
+        .join(Player, Player.id == match_team_player.c.player_id)
+        .where(Player.dupr_id == dupr_id)
+    )
+
+
+async def fetch_player_matches(
+    session: AsyncSession,
+    dupr_id: int,
+    limit: int,
+    after: Optional[Tuple[str, int]] = None,
+) -> Tuple[Sequence[Match], Optional[Tuple[str, int]]]:
+    """
+    One page of a player's matches, newest first, keyset-paginated on
+    (date, match_id) so deep pages cost the same as the first.
+    Returns the page and the (date, match_id) key to continue from.
+    """
+    stmt = (
+        select(Match)
+        .where(Match.id.in_(_player_match_ids(dupr_id)))
+        .order_by(Match.date.desc(), Match.match_id.desc())
+        .limit(limit + 1)
+        .options(_MATCH_LOAD)
+    )
+    if after is not None:
+        last_date, last_match_id = after
+        stmt = stmt.where(
+            or_(
+                Match.date < last_date,
+                and_(Match.date == last_date, Match.match_id < last_match_id),
+            )
+        )
+    rows = (await session.execute(stmt)).scalars().all()
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    last = page[-1]
+    return page, (str(last.date), int(last.match_id))
+
+
+async def fetch_recent_matches(
+    session: AsyncSession, limit: int, dupr_id: Optional[int] = None
+) -> Sequence[Match]:
+    stmt = (
+        select(Match)
+        .order_by(Match.date.desc(), Match.match_id.desc())
+        .limit(limit)
+        .options(_MATCH_LOAD)
+    )
+    if dupr_id is not None:
+        stmt = stmt.where(Match.id.in_(_player_match_ids(dupr_id)))
+    return (await session.execute(stmt)).scalars().all()
+
+
+async def fetch_match(session: AsyncSession, match_id: int) -> Optional[Match]:
+    stmt = select(Match).where(Match.match_id == match_id).options(_MATCH_LOAD)
+    return (await session.execute(stmt)).scalars().first()
+
+
+async def fetch_matches(session: AsyncSession, match_ids: Sequence[int]) -> Dict[int, Match]:
+    """Matches keyed by DUPR match id, loaded in one query."""
+    stmt = select(Match).where(Match.match_id.in_(match_ids)).options(_MATCH_LOAD)
+    return {m.match_id: m for m in (await session.execute(stmt)).scalars()}
+
+
+def club_match_ids():
+    """DUPR match ids stored by the club crawler."""
+    return select(ClubMatchRaw.match_id)
+
+
+def player_dupr_match_ids(dupr_id: int):
+    """DUPR match ids of a player's stored match history."""
+    return select(Match.match_id).where(Match.id.in_(_player_match_ids(dupr_id)))
+
+
+async def fetch_match_features(
+    session: AsyncSession,
+    match_ids: Sequence[int],
+    within=None,
+    match_type: Optional[str] = None,
+) -> Dict[int, MatchFeature]:
+    """
+    Feature rows keyed by DUPR match id, restricted to the match ids selected
+    by `within` (e.g. club_match_ids()) and to `match_type` when given. Ids
+    are sent in chunks to stay under SQLite's bound-parameter limit.
+    """
+    out: Dict[int, MatchFeature] = {}
+    for start in range(0, len(match_ids), _IN_CHUNK):
+        stmt = select(MatchFeature).where(MatchFeature.match_id.in_(match_ids[start:start + _IN_CHUNK]))
+        if within is not None:
+            stmt = stmt.where(MatchFeature.match_id.in_(within))
+        if match_type:
+            stmt = stmt.where(func.lower(MatchFeature.match_type) == match_type.lower())
+        out.update((f.match_id, f) for f in (await session.execute(stmt)).scalars())
+    return out
@@ -1,6 +1,10 @@
 from __future__ import annotations
 
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from dupr_db import match_type_flags
 
 from .api_models import MatchDetail, SimilarityFactor
 
@@ -17,6 +21,15 @@ FEATURE_ORDER: Tuple[str, ...] = (
     "actual_points_for",
 )
 
+_TEAM_COLUMN_PAIRS = (
+    (FEATURE_ORDER.index("avg_team1_rating"), FEATURE_ORDER.index("avg_team2_rating")),
+    (FEATURE_ORDER.index("avg_team1_reliability"), FEATURE_ORDER.index("avg_team2_reliability")),
+)
+_RATING_DIFF = FEATURE_ORDER.index("rating_diff")
+_MARGIN = FEATURE_ORDER.index("margin")
+_EXPECTED_FOR = FEATURE_ORDER.index("expected_points_for")
+_ACTUAL_FOR = FEATURE_ORDER.index("actual_points_for")
+
 # Weights emphasize upset similarity: strong opponents, high reliability, big margin.
 DEFAULT_WEIGHTS: Dict[str, float] = {
     "avg_team1_rating": 0.05,
@@ -43,18 +56,18 @@ def _bool_to_float(value: bool) -> float:
     return 1.0 if value else 0.0
 
 
-def _normalize_match_type(match_type: Optional[str]) -> str:
-    if not match_type:
-        return ""
-    return match_type.strip().lower()
-
-
 def build_feature_vector(
     match: MatchDetail,
     expected_points_for: Optional[float] = None,
+    side: int = 1,
 ) -> List[float]:
-    team1 = [p for p in match.participants if p.side == 1]
-    team2 = [p for p in match.participants if p.side == 2]
+    """
+    Features of `match` seen from team `side`: "team1" columns describe that
+    team and "team2" its opponents. score_for / score_against must be that
+    team's, as match_summary(perspective=<a player on that side>) returns them.
+    """
+    team1 = [p for p in match.participants if p.side == side]
+    team2 = [p for p in match.participants if p.side != side]
 
     avg_team1_rating = _average(p.doubles_rating for p in team1)
     avg_team2_rating = _average(p.doubles_rating for p in team2)
@@ -69,9 +82,7 @@ def build_feature_vector(
     if match.score_for is not None and match.score_against is not None:
         margin = match.score_for - match.score_against
 
-    match_type = _normalize_match_type(match.match_type)
-    is_tournament = match_type in {"tournament", "league"} or "tournament" in match_type
-    is_rec = match_type in {"rec", "recreation"} or "rec" in match_type
+    is_tournament, is_rec = match_type_flags(match.match_type)
 
     actual_points_for = (
         float(match.score_for) if match.score_for is not None else None
@@ -93,6 +104,23 @@ def build_feature_vector(
     return [float(values[name] or 0.0) for name in FEATURE_ORDER]
 
 
+def mirror_features(features: np.ndarray, expected_points_against: np.ndarray) -> np.ndarray:
+    """
+    Feature rows of the same matches seen from team 2: team columns swapped,
+    rating_diff and margin negated, points for replaced by team 2's. Missing
+    values should be NaN (they stay missing instead of turning into zeros).
+    """
+    f = np.atleast_2d(np.asarray(features, dtype=float))
+    out = f.copy()
+    for a, b in _TEAM_COLUMN_PAIRS:
+        out[:, b], out[:, a] = f[:, a], f[:, b]
+    out[:, _RATING_DIFF] = -f[:, _RATING_DIFF]
+    out[:, _MARGIN] = -f[:, _MARGIN]
+    out[:, _EXPECTED_FOR] = expected_points_against
+    out[:, _ACTUAL_FOR] = f[:, _ACTUAL_FOR] - f[:, _MARGIN]
+    return out
+
+
 def weighted_distance(
     target: List[float],
     candidate: List[float],
@@ -107,6 +135,105 @@ def weighted_distance(
     return total
 
 
+def weight_vector(weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+    if weights is None:
+        weights = DEFAULT_WEIGHTS
+    return np.array([weights.get(name, 0.0) for name in FEATURE_ORDER], dtype=float)
+
+
+def build_feature_matrix(
+    matches: Sequence[MatchDetail],
+    expected_points_for: Optional[Sequence[Optional[float]]] = None,
+    sides: Optional[Sequence[int]] = None,
+) -> np.ndarray:
+    """Stack feature vectors for many matches into an (N x len(FEATURE_ORDER)) array."""
+    out = np.zeros((len(matches), len(FEATURE_ORDER)), dtype=float)
+    for row, match in enumerate(matches):
+        expected = expected_points_for[row] if expected_points_for is not None else None
+        side = sides[row] if sides is not None else 1
+        out[row] = build_feature_vector(match, expected_points_for=expected, side=side)
+    return out
+
+
+def weighted_distances(
+    target: Sequence[float],
+    candidates: np.ndarray,
+    weights: Optional[Dict[str, float]] = None,
+) -> np.ndarray:
+    """Vectorized weighted_distance of one target against every row of candidates."""
+    w = weight_vector(weights)
+    diffs = np.abs(np.asarray(candidates, dtype=float) - np.asarray(target, dtype=float))
+    return diffs @ w
+
+
+def pairwise_weighted_distances(
+    targets: np.ndarray,
+    candidates: np.ndarray,
+    weights: Optional[Dict[str, float]] = None,
+    chunk_size: int = 256,
+) -> np.ndarray:
+    """
+    (M x N) weighted L1 distances between many targets and all candidates.
+    Targets are processed in chunks so the (chunk x N x F) broadcast stays bounded.
+    """
+    w = weight_vector(weights)
+    t = np.atleast_2d(np.asarray(targets, dtype=float))
+    c = np.asarray(candidates, dtype=float)
+    out = np.empty((t.shape[0], c.shape[0]), dtype=float)
+    for start in range(0, t.shape[0], chunk_size):
+        block = t[start:start + chunk_size]
+        out[start:start + block.shape[0]] = np.abs(block[:, None, :] - c[None, :, :]) @ w
+    return out
+
+
+def _top_k_from_distances(
+    distances: np.ndarray, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    n = distances.shape[-1]
+    k = min(k, n)
+    if k <= 0:
+        empty = np.empty(distances.shape[:-1] + (0,))
+        return empty.astype(int), empty
+    if k < n:
+        part = np.argpartition(distances, k - 1, axis=-1)[..., :k]
+    else:
+        part = np.broadcast_to(np.arange(n), distances.shape).copy()
+    part_dist = np.take_along_axis(distances, part, axis=-1)
+    order = np.argsort(part_dist, axis=-1, kind="stable")
+    idx = np.take_along_axis(part, order, axis=-1)
+    return idx, np.take_along_axis(part_dist, order, axis=-1)
+
+
+def top_k_similar(
+    target: Sequence[float],
+    candidates: np.ndarray,
+    k: int,
+    weights: Optional[Dict[str, float]] = None,
+    exclude: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Indices and distances of the k nearest candidates, closest first.
+    `exclude` drops one row (typically the target match itself).
+    """
+    distances = weighted_distances(target, candidates, weights)
+    if exclude is not None and 0 <= exclude < distances.shape[0]:
+        distances[exclude] = np.inf
+        k = min(k, distances.shape[0] - 1)
+    return _top_k_from_distances(distances, k)
+
+
+def top_k_similar_many(
+    targets: np.ndarray,
+    candidates: np.ndarray,
+    k: int,
+    weights: Optional[Dict[str, float]] = None,
+    chunk_size: int = 256,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(M x k) indices and distances of nearest candidates for every target row."""
+    distances = pairwise_weighted_distances(targets, candidates, weights, chunk_size=chunk_size)
+    return _top_k_from_distances(distances, k)
+
+
 def explain_similarity(
     target: List[float],
     candidate: List[float],
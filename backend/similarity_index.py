@@ -0,0 +1,364 @@
+from __future__ import annotations
+
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from .similarity import FEATURE_ORDER, mirror_features, weight_vector
+
+DEFAULT_INDEX_PATH = "similarity_index.npz"
+INDEX_PATH = os.getenv("DUPRLY_SIMILARITY_INDEX", DEFAULT_INDEX_PATH)
+
+# Rows appended since the last tree build are scanned brute-force; once this
+# many accumulate (or as many rows are tombstoned) the tree is rebuilt.
+DEFAULT_REBUILD_THRESHOLD = 512
+
+_OPPONENT_RATING_COL = FEATURE_ORDER.index("avg_team2_rating")
+_TEAM1_REL_COL = FEATURE_ORDER.index("avg_team1_reliability")
+_TEAM2_REL_COL = FEATURE_ORDER.index("avg_team2_reliability")
+
+
+class SimilarityIndex:
+    """
+    Nearest-neighbour index over match feature vectors.
+
+    Features are scaled per axis by the similarity weights, so plain L1
+    distance in the scaled space equals `weighted_distance` in the original
+    space and a KD-tree (Minkowski p=1) answers k-NN queries directly.
+
+    A match can be stored twice, as seen from team 1 (side 1) and from team 2
+    (side 2, see `mirror_features`), so a query vector built from either
+    team's perspective finds it; query() reports each match once, at its
+    closer orientation.
+
+    Matches added after the last build live in a small pending buffer that is
+    scanned with numpy; re-added match ids tombstone their previous rows.
+
+    `synced_id` / `synced_at` record the newest match_feature row (by id and
+    updated_at) the index has seen, so `sync()` only reads rows that crawlers
+    inserted or updated since, and a saved index resumes from there.
+    """
+
+    def __init__(
+        self,
+        weights: Optional[Dict[str, float]] = None,
+        rebuild_threshold: int = DEFAULT_REBUILD_THRESHOLD,
+    ) -> None:
+        self.weights = weights
+        self.rebuild_threshold = rebuild_threshold
+        self._scale = weight_vector(weights)
+        self._lock = threading.RLock()
+        self._ids = np.empty(0, dtype=object)
+        self._sides = np.empty(0, dtype=np.int8)
+        self._features = np.empty((0, len(FEATURE_ORDER)), dtype=float)
+        self._min_rel = np.empty(0, dtype=float)
+        self._alive = np.empty(0, dtype=bool)
+        self._row_of: Dict[str, int] = {}
+        self._mirror_of: Dict[str, int] = {}
+        self._tree: Optional[cKDTree] = None
+        self._tree_size = 0
+        self.synced_id = 0
+        self.synced_at: Optional[datetime] = None
+
+    @classmethod
+    def from_matches(
+        cls,
+        match_ids: Sequence[Union[str, int]],
+        features: np.ndarray,
+        min_reliability: Optional[Sequence[Optional[float]]] = None,
+        weights: Optional[Dict[str, float]] = None,
+        mirrored: Optional[np.ndarray] = None,
+    ) -> "SimilarityIndex":
+        index = cls(weights=weights)
+        index.add(match_ids, features, min_reliability, mirrored=mirrored)
+        index.rebuild()
+        return index
+
+    @classmethod
+    def from_db(
+        cls, engine, weights: Optional[Dict[str, float]] = None
+    ) -> "SimilarityIndex":
+        """Build from the precomputed `match_feature` table."""
+        index = cls(weights=weights)
+        with engine.connect() as conn:
+            index.sync(conn)
+        index.rebuild()
+        return index
+
+    def pending_select(self):
+        """Select of match_feature rows inserted or updated since the last sync."""
+        from sqlalchemy import or_, select
+
+        from dupr_db import MatchFeature
+
+        newer = MatchFeature.id > self.synced_id
+        if self.synced_at is not None:
+            newer = or_(newer, MatchFeature.updated_at > self.synced_at)
+        return (
+            select(MatchFeature.id, MatchFeature.match_id, MatchFeature.updated_at,
+                   MatchFeature.min_reliability, MatchFeature.expected_points_against,
+                   *[getattr(MatchFeature, name) for name in FEATURE_ORDER])
+            .where(newer)
+            .order_by(MatchFeature.id)
+        )
+
+    def add_feature_rows(self, rows: Iterable[Sequence[Any]]) -> int:
+        """
+        Add rows of `pending_select()` in both orientations and advance the
+        sync cursor; returns the row count.
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        features = np.array(
+            [[np.nan if v is None else float(v) for v in row[5:]] for row in rows], dtype=float
+        ).reshape(len(rows), len(FEATURE_ORDER))
+        against = np.array([np.nan if row[4] is None else float(row[4]) for row in rows], dtype=float)
+        mirrored = mirror_features(features, against)
+        self.add(
+            [row[1] for row in rows],
+            np.nan_to_num(features, nan=0.0),
+            [row[3] for row in rows],
+            mirrored=np.nan_to_num(mirrored, nan=0.0),
+        )
+        stamps = [row[2] for row in rows if row[2] is not None]
+        with self._lock:
+            self.synced_id = max(self.synced_id, max(int(row[0]) for row in rows))
+            if stamps:
+                self.synced_at = max(stamps + ([self.synced_at] if self.synced_at else []))
+        return len(rows)
+
+    def sync(self, conn) -> int:
+        """Catch up with match_feature over a sync connection or session."""
+        return self.add_feature_rows(conn.execute(self.pending_select()))
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def __contains__(self, match_id: object) -> bool:
+        return str(match_id) in self._row_of
+
+    def _check_features(self, features: np.ndarray, n: int) -> np.ndarray:
+        feats = np.atleast_2d(np.asarray(features, dtype=float))
+        if feats.shape != (n, len(FEATURE_ORDER)):
+            raise ValueError(
+                f"features must be shaped ({n}, {len(FEATURE_ORDER)}), got {feats.shape}"
+            )
+        return feats
+
+    def _append(self, ids: List[str], feats: np.ndarray, rel: np.ndarray, side: int) -> None:
+        rows = self._row_of if side == 1 else self._mirror_of
+        start = self._ids.shape[0]
+        for offset, match_id in enumerate(ids):
+            rows[match_id] = start + offset
+        self._ids = np.concatenate([self._ids, np.array(ids, dtype=object)])
+        self._sides = np.concatenate([self._sides, np.full(len(ids), side, dtype=np.int8)])
+        self._features = np.vstack([self._features, feats])
+        self._min_rel = np.concatenate([self._min_rel, rel])
+        self._alive = np.concatenate([self._alive, np.ones(len(ids), dtype=bool)])
+
+    def add(
+        self,
+        match_ids: Sequence[Union[str, int]],
+        features: np.ndarray,
+        min_reliability: Optional[Sequence[Optional[float]]] = None,
+        mirrored: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Insert or replace matches; cheap enough to call per crawled batch.
+        `mirrored` holds the same matches seen from team 2 (side 2 rows).
+        """
+        ids = [str(m) for m in match_ids]
+        feats = self._check_features(features, len(ids))
+        mirror = self._check_features(mirrored, len(ids)) if mirrored is not None else None
+        if min_reliability is None:
+            rel = np.minimum(feats[:, _TEAM1_REL_COL], feats[:, _TEAM2_REL_COL])
+        else:
+            rel = np.array(
+                [np.nan if v is None else float(v) for v in min_reliability], dtype=float
+            )
+
+        with self._lock:
+            for match_id in ids:
+                for rows in (self._row_of, self._mirror_of):
+                    old = rows.pop(match_id, None)
+                    if old is not None:
+                        self._alive[old] = False
+            self._append(ids, feats, rel, 1)
+            if mirror is not None:
+                self._append(ids, mirror, rel, 2)
+            pending = self._ids.shape[0] - self._tree_size
+            dead = int((~self._alive).sum())
+            if pending >= self.rebuild_threshold or dead >= self.rebuild_threshold:
+                self.rebuild()
+
+    def remove(self, match_id: Union[str, int]) -> bool:
+        with self._lock:
+            row = self._row_of.pop(str(match_id), None)
+            mirror = self._mirror_of.pop(str(match_id), None)
+            for r in (row, mirror):
+                if r is not None:
+                    self._alive[r] = False
+            return row is not None
+
+    def rebuild(self) -> None:
+        """Compact tombstoned rows and rebuild the tree over everything."""
+        with self._lock:
+            keep = self._alive
+            self._ids = self._ids[keep]
+            self._sides = self._sides[keep]
+            self._features = self._features[keep]
+            self._min_rel = self._min_rel[keep]
+            self._alive = np.ones(self._ids.shape[0], dtype=bool)
+            self._row_of = {}
+            self._mirror_of = {}
+            for row, (mid, side) in enumerate(zip(self._ids, self._sides)):
+                (self._row_of if side == 1 else self._mirror_of)[mid] = row
+            if self._ids.shape[0]:
+                self._tree = cKDTree(self._features * self._scale)
+            else:
+                self._tree = None
+            self._tree_size = self._ids.shape[0]
+
+    def features_for(self, match_id: Union[str, int], side: int = 1) -> Optional[np.ndarray]:
+        """Stored features of a match as seen from team `side` (None if not stored)."""
+        row = (self._row_of if side == 1 else self._mirror_of).get(str(match_id))
+        return None if row is None else self._features[row].copy()
+
+    def _filter_mask(
+        self,
+        rows: np.ndarray,
+        min_rel: Optional[float],
+        rating_min: Optional[float],
+        rating_max: Optional[float],
+        exclude_rows: List[int],
+    ) -> np.ndarray:
+        mask = self._alive[rows]
+        if min_rel is not None:
+            mask &= self._min_rel[rows] >= min_rel
+        if rating_min is not None:
+            mask &= self._features[rows, _OPPONENT_RATING_COL] >= rating_min
+        if rating_max is not None:
+            mask &= self._features[rows, _OPPONENT_RATING_COL] <= rating_max
+        if exclude_rows:
+            mask &= ~np.isin(rows, exclude_rows)
+        return mask
+
+    def query(
+        self,
+        target: Sequence[float],
+        k: int,
+        min_rel: Optional[float] = None,
+        rating_min: Optional[float] = None,
+        rating_max: Optional[float] = None,
+        exclude_id: Optional[Union[str, int]] = None,
+    ) -> List[Tuple[str, float, int]]:
+        """
+        Up to k (match_id, weighted distance, side) triples, closest first,
+        one per match at whichever stored orientation is closer.
+
+        `min_rel` filters on the lowest participant reliability and the rating
+        bounds filter on the opponent team's average rating (as seen from
+        `side`). The tree is asked for progressively more neighbours until k
+        distinct matches survive the filters.
+        """
+        if k <= 0:
+            return []
+        scaled = np.asarray(target, dtype=float) * self._scale
+        with self._lock:
+            exclude_rows: List[int] = []
+            if exclude_id is not None:
+                for rows_of in (self._row_of, self._mirror_of):
+                    row = rows_of.get(str(exclude_id))
+                    if row is not None:
+                        exclude_rows.append(row)
+            rows: List[np.ndarray] = []
+            dists: List[np.ndarray] = []
+
+            if self._tree is not None and self._tree_size:
+                want = min(self._tree_size, max(k * 2, k + 8))
+                while True:
+                    d, i = self._tree.query(scaled, k=want, p=1)
+                    d = np.atleast_1d(d)
+                    i = np.atleast_1d(i)
+                    valid = i < self._tree_size
+                    d, i = d[valid], i[valid]
+                    mask = self._filter_mask(i, min_rel, rating_min, rating_max, exclude_rows)
+                    if want >= self._tree_size or len(set(self._ids[i[mask]])) >= k:
+                        rows.append(i[mask])
+                        dists.append(d[mask])
+                        break
+                    want = min(self._tree_size, want * 4)
+
+            if self._ids.shape[0] > self._tree_size:
+                pending = np.arange(self._tree_size, self._ids.shape[0])
+                mask = self._filter_mask(pending, min_rel, rating_min, rating_max, exclude_rows)
+                pending = pending[mask]
+                if pending.size:
+                    rows.append(pending)
+                    dists.append(np.abs(self._features[pending] * self._scale - scaled).sum(axis=1))
+
+            if not rows:
+                return []
+            all_rows = np.concatenate(rows)
+            all_dists = np.concatenate(dists)
+            out: List[Tuple[str, float, int]] = []
+            seen = set()
+            for j in np.argsort(all_dists, kind="stable"):
+                row = all_rows[j]
+                match_id = str(self._ids[row])
+                if match_id in seen:
+                    continue
+                seen.add(match_id)
+                out.append((match_id, float(all_dists[j]), int(self._sides[row])))
+                if len(out) >= k:
+                    break
+            return out
+
+    def save(self, path: Union[str, Path] = DEFAULT_INDEX_PATH) -> None:
+        """
+        Persist live rows, weights and the sync cursor; the tree is rebuilt on
+        load. The file is replaced atomically so readers never load a partial one.
+        """
+        with self._lock:
+            keep = self._alive
+            arrays = dict(
+                ids=np.asarray(self._ids[keep], dtype=str),
+                sides=self._sides[keep],
+                features=self._features[keep],
+                min_rel=self._min_rel[keep],
+                scale=self._scale,
+                feature_order=np.asarray(FEATURE_ORDER, dtype=str),
+                synced_id=np.int64(self.synced_id),
+                synced_at=np.str_(self.synced_at.isoformat() if self.synced_at else ""),
+            )
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp, str(path))
+
+    @classmethod
+    def load(cls, path: Union[str, Path] = DEFAULT_INDEX_PATH) -> "SimilarityIndex":
+        with np.load(str(path), allow_pickle=False) as data:
+            if tuple(data["feature_order"].tolist()) != FEATURE_ORDER:
+                raise ValueError(f"{path} was built with a different FEATURE_ORDER; rebuild it.")
+            scale = data["scale"]
+            weights = {name: float(w) for name, w in zip(FEATURE_ORDER, scale)}
+            index = cls(weights=weights)
+            ids = data["ids"]
+            sides = data["sides"] if "sides" in data.files else np.ones(ids.shape[0], dtype=np.int8)
+            for side in (1, 2):
+                pick = sides == side
+                index._append(ids[pick].tolist(), data["features"][pick], data["min_rel"][pick], side)
+            # Files from before side 2 rows (and the sync cursor) resync from scratch.
+            if "sides" in data.files:
+                index.synced_id = int(data["synced_id"])
+                synced_at = str(data["synced_at"])
+                index.synced_at = datetime.fromisoformat(synced_at) if synced_at else None
+        index.rebuild()
+        return index
@@ -0,0 +1,280 @@
+"""
+    Benchmark cases for the crawl -> ingest -> fit -> simulate pipeline.
+
+    Each case times one stage on a SyntheticDataset (see datasets.py) and
+    returns the number of items the timed block processed.
+"""
+import contextlib
+import importlib.util
+import io
+import random
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from benchmarks.harness import ROOT, benchmark
+
+FIT_MAXITER = 20  # Nelder-Mead iterations; enough to compare loss cost, not to converge
+SHADOW_PLAYERS = 100
+SHADOW_WINDOWS = (8, 16, 24)
+SIMILARITY_QUERIES = 1000
+SIMILARITY_K = 10
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Swallow the CLI commands' per-match printing."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+class _StaticHistoryClient:
+    """Stands in for DuprClient in get_matches_from_dupr: one fixed history."""
+
+    def __init__(self, matches: list):
+        self.matches = matches
+
+    def get_member_match_history_p(self, member_id):
+        return 200, self.matches
+
+
+def _load_script(name: str):
+    spec = importlib.util.spec_from_file_location(name, ROOT / "scripts" / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _fit_rows(matches: list) -> list:
+    """Rows in the shape scripts/fit_dupr_with_reliability.load_data returns."""
+    rows = []
+    for m in matches:
+        t1, t2 = m["teams"]
+        row = {"games1": t1["game1"], "games2": t2["game1"], "winner": 1 if t1["winner"] else 2}
+        for side, team in ((0, t1), (2, t2)):
+            pre = team["preMatchRatingAndImpact"]
+            for n in (1, 2):
+                row[f"r{side + n}"] = pre[f"preMatchDoubleRatingPlayer{n}"]
+                row[f"imp{side + n}"] = pre[f"matchDoubleRatingImpactPlayer{n}"]
+                row[f"rel{side + n}"] = team[f"player{n}"]["ratings"]["doublesReliabilityScore"]
+        rows.append(row)
+    return rows
+
+
+@benchmark("client.history_paging", max_size=100_000)
+def client_history_paging(ds, timer):
+    """Full match history for the busiest tenth of the club, 10 per request."""
+    from dupr_client import DuprClient
+    from dupr_fake_server import FakeDuprServer
+
+    counts = sorted(((len(ds.club.history(pid)), pid) for pid in ds.club.players), reverse=True)
+    pids = [str(pid) for _n, pid in counts[:max(5, len(counts) // 10)]]
+    with FakeDuprServer(ds.club) as server:
+        client = DuprClient(api_url=server.url)
+        client.auth_user("bench@example.com", "secret")
+        fetched = 0
+        with timer:
+            for pid in pids:
+                rc, matches = client.get_member_match_history_p(pid)
+                assert rc == 200, rc
+                fetched += len(matches)
+    return fetched
+
+
+@benchmark("ingest.get_matches_from_dupr")
+def ingest_get_matches(ds, timer):
+    """duprly get-matches into an empty database: Match, MatchTeam, players, features."""
+    import duprly
+
+    duprly._dupr = _StaticHistoryClient(ds.fresh_matches())
+    duprly._eng = ds.empty("ingest")
+    try:
+        with _quiet(), timer:
+            duprly.get_matches_from_dupr(0)
+    finally:
+        duprly._eng.dispose()
+        duprly._dupr = duprly._eng = None
+    return len(ds.matches)
+
+
+@benchmark("ingest.build_match_detail")
+def ingest_build_match_detail(ds, timer):
+    import duprly
+
+    duprly._eng = ds.copy("detail")
+    try:
+        with _quiet(), timer:
+            duprly.build_match_detail.callback()
+    finally:
+        duprly._eng.dispose()
+        duprly._eng = None
+    return ds.size
+
+
+@benchmark("features.from_club_match_raw")
+def features_from_raw(ds, timer):
+    """Read club_match_raw and compute MatchFeature rows (no writes)."""
+    from dupr_db import MatchFeature
+    from dupr_raw_codec import RAW_COLUMNS, load_raw
+    from duprly import load_predictor
+
+    predictor = load_predictor()
+    engine = ds.engine()
+    n = 0
+    with timer:
+        with engine.connect() as conn:
+            for row in conn.execute(select(*RAW_COLUMNS)):
+                if MatchFeature.from_json(load_raw(conn, *row), predictor) is not None:
+                    n += 1
+    engine.dispose()
+    return n
+
+
+@benchmark("features.decode_match")
+def features_decode_match(ds, timer):
+    """Scan club_match_raw into MatchRows with map_raw + dupr_json.decode_match."""
+    from dupr_json import decode_match
+    from dupr_raw_codec import map_raw
+
+    engine = ds.engine()
+    with timer:
+        with engine.connect() as conn:
+            n = sum(1 for m in map_raw(conn, decode_match) if m is not None)
+    engine.dispose()
+    return n
+
+
+@benchmark("features.build_match_features")
+def features_build_command(ds, timer):
+    """duprly build-match-features backfill into an empty match_feature table."""
+    from sqlalchemy import delete
+
+    import duprly
+    from dupr_db import MatchFeature
+
+    duprly._eng = ds.copy("features")
+    with Session(duprly._eng) as sess:
+        sess.execute(delete(MatchFeature))
+        sess.commit()
+    try:
+        with _quiet(), timer:
+            duprly.build_match_features.callback()
+    finally:
+        duprly._eng.dispose()
+        duprly._eng = None
+    return ds.size
+
+
+@benchmark("model.fit_reliability")
+def model_fit(ds, timer):
+    """scripts/fit_dupr_with_reliability loss under Nelder-Mead, FIT_MAXITER iterations."""
+    from scipy.optimize import minimize
+
+    fit = _load_script("fit_dupr_with_reliability")
+    rows = _fit_rows(ds.matches)
+    with timer:
+        result = minimize(
+            fit.loss_function_inverse,
+            x0=[0.01, 400, 1.0, 100.0],
+            args=(rows,),
+            method="Nelder-Mead",
+            options={"maxiter": FIT_MAXITER},
+        )
+    return len(rows) * result.nfev  # match evaluations
+
+
+@benchmark("shadow.match_index")
+def shadow_match_index(ds, timer):
+    from dupr_shadow_calculator import MatchIndex
+
+    with timer:
+        index = MatchIndex(ds.matches)
+    return len(index)
+
+
+@benchmark("shadow.simulate_reset")
+def shadow_simulate(ds, timer):
+    """simulate_shadow_reset for the SHADOW_PLAYERS busiest players, all windows."""
+    from dupr_predictor import DuprPredictor
+    from dupr_shadow_calculator import MatchIndex, simulate_shadow_reset
+
+    predictor = DuprPredictor(str(ROOT / "dupr_model.json"))
+    index = MatchIndex(ds.matches)
+    pids = sorted(index.player_ids(), key=index.match_count, reverse=True)[:SHADOW_PLAYERS]
+    with timer:
+        for pid in pids:
+            simulate_shadow_reset(predictor, index, pid, windows=SHADOW_WINDOWS)
+    return len(pids)
+
+
+def _match_array_file(ds) -> str:
+    """Export the dataset's club matches to a match array file (untimed)."""
+    from dupr_match_array import build_match_array, write_match_array
+
+    ds.work_dir.mkdir(parents=True, exist_ok=True)
+    path = str(ds.work_dir / f"club_matches-{ds.size}.npy")
+    engine = ds.engine()
+    with engine.connect() as conn:
+        write_match_array(build_match_array(conn), path)
+    engine.dispose()
+    return path
+
+
+@benchmark("shadow.match_array_index")
+def shadow_match_array_index(ds, timer):
+    """MatchArrayIndex over the memory-mapped export (what each worker pays)."""
+    from dupr_shadow_calculator import MatchArrayIndex
+
+    path = _match_array_file(ds)
+    with timer:
+        index = MatchArrayIndex.open(path)
+    return len(index)
+
+
+@benchmark("shadow.simulate_reset_array")
+def shadow_simulate_array(ds, timer):
+    """shadow.simulate_reset with players read from the memory-mapped export."""
+    from dupr_predictor import DuprPredictor
+    from dupr_shadow_calculator import MatchArrayIndex, simulate_shadow_reset
+
+    predictor = DuprPredictor(str(ROOT / "dupr_model.json"))
+    index = MatchArrayIndex.open(_match_array_file(ds))
+    pids = sorted(index.player_ids(), key=index.match_count, reverse=True)[:SHADOW_PLAYERS]
+    with timer:
+        for pid in pids:
+            simulate_shadow_reset(predictor, index, pid, windows=SHADOW_WINDOWS)
+    return len(pids)
+
+
+@benchmark("similarity.build_index")
+def similarity_build(ds, timer):
+    from backend.similarity_index import SimilarityIndex
+
+    engine = ds.engine()
+    with timer:
+        index = SimilarityIndex.from_db(engine)
+    engine.dispose()
+    return len(index)
+
+
+@benchmark("similarity.query")
+def similarity_query(ds, timer):
+    """k-NN for SIMILARITY_QUERIES stored matches, excluding the match itself."""
+    import numpy as np
+
+    from backend.similarity import FEATURE_ORDER
+    from backend.similarity_index import SimilarityIndex
+    from dupr_db import MatchFeature
+
+    engine = ds.engine()
+    index = SimilarityIndex.from_db(engine)
+    with Session(engine) as sess:
+        features = sess.scalars(select(MatchFeature)).all()
+    engine.dispose()
+    rng = random.Random(ds.seed)
+    sample = rng.sample(features, min(SIMILARITY_QUERIES, len(features)))
+    targets = [(f.match_id, np.array([float(getattr(f, c) or 0.0) for c in FEATURE_ORDER])) for f in sample]
+    with timer:
+        for match_id, target in targets:
+            index.query(target, SIMILARITY_K, exclude_id=match_id)
+    return len(targets)
@@ -0,0 +1,119 @@
+"""
+    Synthetic benchmark datasets, one per match count.
+
+    A dataset is a SyntheticClub of `size` matches (about 200 per player)
+    plus a sqlite database holding what a crawl of that club would have
+    stored: club_match_raw, club_match_player, match / match_team / player
+    and match_feature.
+    The database is built once and cached under the data directory, keyed
+    by size and seed; cases that write to it work on a copy.
+"""
+import json
+import shutil
+from functools import cached_property
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from dupr_db import ClubMatchPlayer, ClubMatchRaw, Match, MatchFeature, ensure_schema
+from dupr_synthetic import SyntheticClub
+
+MATCHES_PER_PLAYER = 200
+BUILD_BATCH = 1000
+SCHEMA_VERSION = 4  # bump when the cached database layout or generator changes
+
+
+def parse_size(text: str) -> int:
+    """'1k' -> 1000, '100k' -> 100000, '2m' -> 2000000, '500' -> 500."""
+    text = text.strip().lower()
+    mult = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text[:-1] if mult > 1 else text) * mult)
+
+
+def engine_for(path: Path):
+    engine = create_engine(f"sqlite+pysqlite:///{path}", echo=False)
+    ensure_schema(engine)
+    return engine
+
+
+class SyntheticDataset:
+    def __init__(self, size: int, seed: int, data_dir: Path, work_dir: Path):
+        self.size = size
+        self.seed = seed
+        self.n_players = max(20, size * 4 // MATCHES_PER_PLAYER)
+        self.data_dir = Path(data_dir)
+        self.work_dir = Path(work_dir)
+
+    @cached_property
+    def club(self) -> SyntheticClub:
+        return SyntheticClub(self.n_players, self.size, seed=self.seed)
+
+    @property
+    def matches(self) -> list:
+        """Shared match dicts; copy before handing them to code that mutates."""
+        return self.club.matches
+
+    def fresh_matches(self) -> list:
+        """Independent copies, like a new API response."""
+        return [json.loads(r) for r in map(json.dumps, self.matches)]
+
+    @cached_property
+    def db_path(self) -> Path:
+        path = self.data_dir / f"synthetic-v{SCHEMA_VERSION}-{self.size}-s{self.seed}.sqlite"
+        if not path.exists():
+            self.data_dir.mkdir(parents=True, exist_ok=True)
+            partial = path.with_suffix(".partial")
+            partial.unlink(missing_ok=True)
+            self._build(partial)
+            partial.rename(path)
+        return path
+
+    def engine(self):
+        """Read-only use of the cached database."""
+        return engine_for(self.db_path)
+
+    def copy(self, name: str):
+        """Engine on a private copy of the cached database, for cases that write."""
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        path = self.work_dir / f"{name}-{self.size}.sqlite"
+        shutil.copyfile(self.db_path, path)
+        return engine_for(path)
+
+    def empty(self, name: str):
+        """Engine on a fresh, empty database."""
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        path = self.work_dir / f"{name}-{self.size}.sqlite"
+        path.unlink(missing_ok=True)
+        return engine_for(path)
+
+    def _build(self, path: Path) -> None:
+        from duprly import load_predictor
+
+        predictor = load_predictor()
+        engine = engine_for(path)
+        club_id = self.club.club_id
+        with Session(engine) as sess:
+            for start in range(0, self.size, BUILD_BATCH):
+                raw = [json.dumps(m) for m in self.matches[start:start + BUILD_BATCH]]
+                sess.execute(insert(ClubMatchRaw), [
+                    {"match_id": m["matchId"], "club_id": club_id,
+                     "event_date": m["eventDate"], "raw_json": r}
+                    for m, r in zip(self.matches[start:start + BUILD_BATCH], raw)
+                ])
+                sess.execute(insert(ClubMatchPlayer), [
+                    row for m in self.matches[start:start + BUILD_BATCH]
+                    for row in ClubMatchPlayer.rows_from_json(m)
+                ])
+                for r in raw:
+                    m = json.loads(r)  # from_json flattens player ratings in place
+                    Match.save(sess, Match().from_json(m))
+                    feature = MatchFeature.from_json(m, predictor)
+                    if feature is not None:
+                        sess.add(feature)
+                sess.commit()
+        engine.dispose()
+
+
+def clear_work_dir(work_dir: Path) -> None:
+    shutil.rmtree(work_dir, ignore_errors=True)
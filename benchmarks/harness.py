@@ -0,0 +1,133 @@
+"""
+    Minimal asv-style benchmark harness.
+
+    A case is a function `case(ds, timer)` registered with @benchmark. It
+    does its own setup, wraps exactly the code being measured in
+    `with timer:`, and returns how many items (matches, requests, queries)
+    that block processed. The harness calls it once per repeat, so setup
+    that must not leak between samples (a fresh database, say) belongs in
+    the case body. Results are plain dicts so they can be saved as JSON and
+    compared against an earlier run.
+"""
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@dataclass
+class Case:
+    name: str
+    fn: Callable
+    max_size: Optional[int] = None  # skip larger datasets (memory / runtime)
+
+
+CASES: Dict[str, Case] = {}
+
+
+def benchmark(name: str, max_size: Optional[int] = None):
+    def register(fn):
+        CASES[name] = Case(name, fn, max_size)
+        return fn
+    return register
+
+
+class Timer:
+    """Context manager recording the wall time of the block it wraps."""
+
+    def __init__(self):
+        self.elapsed: Optional[float] = None
+        self._t0 = 0.0
+
+    def __enter__(self) -> "Timer":
+        if self.elapsed is not None:
+            raise RuntimeError("a benchmark case may time only one block")
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.elapsed = time.perf_counter() - self._t0
+
+
+def run_case(case: Case, ds, repeat: int, budget_sec: float) -> dict:
+    """
+    Up to `repeat` samples of one case on one dataset; stops early once
+    `budget_sec` of timed work has been spent (always at least one sample).
+    """
+    times: List[float] = []
+    items = 0
+    while len(times) < repeat:
+        timer = Timer()
+        items = case.fn(ds, timer) or 0
+        if timer.elapsed is None:
+            raise RuntimeError(f"{case.name} never entered its timer")
+        times.append(timer.elapsed)
+        if sum(times) >= budget_sec:
+            break
+    median = statistics.median(times)
+    return {
+        "case": case.name,
+        "size": ds.size,
+        "items": items,
+        "samples": len(times),
+        "times": [round(t, 6) for t in times],
+        "min": round(min(times), 6),
+        "median": round(median, 6),
+        "mean": round(statistics.fmean(times), 6),
+        "stdev": round(statistics.stdev(times), 6) if len(times) > 1 else 0.0,
+        "us_per_item": round(median / items * 1e6, 3) if items else None,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def environment() -> dict:
+    import dupr_json
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "json_backend": dupr_json.BACKEND,
+    }
+
+
+def compare(current: List[dict], baseline: List[dict], threshold: float) -> List[dict]:
+    """
+    Per (case, size) present in both runs: median ratio current / baseline,
+    flagged "slower" / "faster" outside +-threshold, else "same".
+    """
+    base = {(r["case"], r["size"]): r for r in baseline}
+    out = []
+    for r in current:
+        b = base.get((r["case"], r["size"]))
+        if b is None or not b["median"]:
+            continue
+        ratio = r["median"] / b["median"]
+        verdict = "slower" if ratio > 1 + threshold else "faster" if ratio < 1 - threshold else "same"
+        out.append({
+            "case": r["case"],
+            "size": r["size"],
+            "baseline": b["median"],
+            "current": r["median"],
+            "ratio": round(ratio, 3),
+            "verdict": verdict,
+        })
+    return out
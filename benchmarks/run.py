@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark suite: crawl paging, ingest, feature extraction, model
+fitting, shadow-reset simulation and similarity search on synthetic clubs.
+
+Runs every case (benchmarks/cases.py) on each dataset size, prints a table
+and writes the results as JSON. With --compare, each case's median is set
+against an earlier results file and changes beyond --threshold are listed;
+--fail-on-regression turns a slowdown into a non-zero exit for CI.
+
+Datasets are generated once per size/seed and cached in --data-dir
+(100k matches is roughly 250 MB of sqlite and several minutes to build).
+
+Usage:
+  python benchmarks/run.py                               # 1k and 10k
+  python benchmarks/run.py --sizes 1k,10k,100k --out benchmarks/results/base.json
+  python benchmarks/run.py --only ingest,shadow --compare benchmarks/results/base.json
+  python benchmarks/run.py --list
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# the fake server login must not overwrite the real saved token
+WORK_DIR = Path(tempfile.mkdtemp(prefix="dupr-bench-"))
+os.environ["DUPR_TOKEN_FILE"] = str(WORK_DIR / "token.json")
+
+from loguru import logger
+
+from benchmarks import cases  # noqa: F401  (registers the cases)
+from benchmarks.datasets import SyntheticDataset, clear_work_dir, parse_size
+from benchmarks.harness import CASES, compare, environment, run_case
+
+DEFAULT_SIZES = "1k,10k"
+DEFAULT_DATA_DIR = ROOT / "benchmarks" / ".data"
+
+
+def select_cases(only: str):
+    if not only:
+        return list(CASES.values())
+    prefixes = [p.strip() for p in only.split(",") if p.strip()]
+    picked = [c for c in CASES.values() if any(c.name == p or c.name.startswith(p + ".") for p in prefixes)]
+    if not picked:
+        raise SystemExit(f"no cases match --only {only}; see --list")
+    return picked
+
+
+def print_result(r: dict) -> None:
+    per = f"{r['us_per_item']:10.1f} us/item" if r["us_per_item"] is not None else ""
+    print(f"{r['case']:34s} {r['size']:>8d} {r['median'] * 1000:11.1f} ms  x{r['samples']}  {per}", flush=True)
+
+
+def print_comparison(rows: list) -> None:
+    print()
+    print(f"{'case':34s} {'size':>8s} {'baseline':>11s} {'current':>11s} {'ratio':>7s}")
+    for row in rows:
+        flag = "" if row["verdict"] == "same" else f"  {row['verdict'].upper()}"
+        print(
+            f"{row['case']:34s} {row['size']:>8d} {row['baseline'] * 1000:9.1f}ms"
+            f" {row['current'] * 1000:9.1f}ms {row['ratio']:7.2f}{flag}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the DUPR crawl/ingest/fit/simulate pipeline")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="dataset sizes in matches, e.g. 1k,10k,100k")
+    parser.add_argument("--only", default="", help="comma-separated case names or groups (e.g. ingest,shadow)")
+    parser.add_argument("--repeat", type=int, default=3, help="samples per case and size")
+    parser.add_argument("--budget", type=float, default=60.0, help="stop repeating a case after this many timed seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR, help="cache for generated datasets")
+    parser.add_argument("--out", type=Path, help="write results JSON here")
+    parser.add_argument("--compare", type=Path, help="baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative change reported as slower/faster")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--list", action="store_true", help="list cases and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for c in CASES.values():
+            limit = f"  (up to {c.max_size} matches)" if c.max_size else ""
+            print(f"{c.name}{limit}")
+        return
+
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+    selected = select_cases(args.only)
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    data_dir = args.data_dir.resolve()
+    out = args.out.resolve() if args.out else None
+    baseline_path = args.compare.resolve() if args.compare else None
+    model = ROOT / "dupr_model.json"
+
+    # duprly writes dupr.sqlite / .dupr_db_written and reads dupr_model.json from the cwd
+    os.chdir(WORK_DIR)
+    if model.exists():
+        (WORK_DIR / "dupr_model.json").write_bytes(model.read_bytes())
+
+    results = []
+    try:
+        for size in sizes:
+            ds = SyntheticDataset(size, args.seed, data_dir, WORK_DIR / "db")
+            print(f"dataset: {size} matches, {ds.n_players} players (seed {args.seed})", flush=True)
+            for case in selected:
+                if case.max_size is not None and size > case.max_size:
+                    print(f"{case.name:34s} {size:>8d}  skipped (max {case.max_size})")
+                    continue
+                r = run_case(case, ds, args.repeat, args.budget)
+                results.append(r)
+                print_result(r)
+            clear_work_dir(WORK_DIR / "db")
+    finally:
+        clear_work_dir(WORK_DIR)
+
+    report = {"environment": environment(), "seed": args.seed, "results": results}
+    if out:
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nwrote {out}")
+
+    if baseline_path:
+        baseline = json.loads(baseline_path.read_text())
+        rows = compare(results, baseline["results"], args.threshold)
+        print_comparison(rows)
+        if args.fail_on_regression and any(r["verdict"] == "slower" for r in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
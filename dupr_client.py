@@ -12,6 +12,8 @@ https://api.dupr.gg/swagger-ui/index.html
 """
 
 import os
+import threading
+import time
 import requests
 from requests import Response
 from loguru import logger
@@ -19,18 +21,50 @@ import json
 from typing import Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from dupr_metrics import CLIENT_METRICS, ClientMetrics
+from dupr_profile import span
+
+
+class RateLimiter(object):
+    """
+    Spaces calls evenly so no more than `per_minute` go out per minute.
+    Thread-safe; acquire() blocks the calling thread until its slot.
+    """
+
+    def __init__(self, per_minute: int):
+        if per_minute <= 0:
+            raise ValueError("per_minute must be positive")
+        self.interval = 60.0 / per_minute
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
 
 class DuprClient(object):
 
     def __init__(
-        self, api_url: str = None, api_version: str = None, verbose: bool = False
+        self,
+        api_url: str = None,
+        api_version: str = None,
+        verbose: bool = False,
+        rate_limiter: Optional[RateLimiter] = None,
+        metrics: Optional[ClientMetrics] = None,
     ):
-        self.env_path = os.path.expanduser("~/.duprly_config")
+        # DUPR_API_URL / DUPR_TOKEN_FILE point the client at another server
+        # (e.g. dupr_fake_server.py) without touching the saved real token
+        self.env_path = os.path.expanduser(os.getenv("DUPR_TOKEN_FILE") or "~/.duprly_config")
         logger.debug(self.env_path)
         if api_url:
             self.env_url = api_url
         else:
-            self.env_url = "https://api.dupr.gg"
+            self.env_url = os.getenv("DUPR_API_URL") or "https://api.dupr.gg"
         if api_version:
             self.version = api_version
         else:
@@ -39,6 +73,11 @@ class DuprClient(object):
         self.refresh_token = None  # from login
         self.failed = False  # Strange way to return error, for now TBD
         self.verbose = verbose
+        self.rate_limiter = rate_limiter
+        # per-endpoint counts / latency, shared process-wide by default
+        self.metrics = metrics if metrics is not None else CLIENT_METRICS
+        self.enrich_stats = {"hits": 0, "fetches": 0, "errors": 0}
+        self._stats_lock = threading.Lock()
         self.load_token()
 
     def load_token(self):
@@ -104,7 +143,7 @@ class DuprClient(object):
             "password": password,
         }
         logger.debug(f"login user: {username}")
-        r = requests.post(self.u("/auth/v1.0/login/"), json=body)
+        r = self._request("POST", "/auth/v1.0/login/", "login", body, headers={})
         logger.debug(f"login user: {r.status_code}")
         logger.debug(f"login user: {r.request.url}")
         if r.status_code == 200:
@@ -118,46 +157,50 @@ class DuprClient(object):
     def headers(self):
         return {"Authorization": f"Bearer {self.access_token}"}
 
-    def dupr_get(self, url, name: str = "") -> Response:
-        logger.debug(f"GET: {name} : {url}")
-        r = requests.get(self.u(url), headers=self.headers())
+    def throttle(self):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+    def _request(self, method: str, url: str, name: str, json_data=None, retry: bool = False, headers=None) -> Response:
+        """
+        One HTTP attempt, recorded in self.metrics under `name`. Every attempt
+        (first try, retry after a token refresh, login) waits for the rate
+        limiter; the wait is not counted as latency.
+        """
+        kwargs = {"headers": self.headers() if headers is None else headers}
+        if method != "GET":
+            kwargs["json"] = json_data
+        self.throttle()
+        t = time.perf_counter()
+        try:
+            with span("http"):
+                r = requests.request(method, self.u(url), **kwargs)
+        except requests.RequestException:
+            self.metrics.record(name or "unnamed", "error", time.perf_counter() - t, 0, retry)
+            raise
+        self.metrics.record(name or "unnamed", r.status_code, time.perf_counter() - t, len(r.content), retry)
         logger.debug(f"return: {r.status_code}")
-        if r.status_code == 403:
-            rc = self.refresh_user()
-            if rc == 200:
-                logger.debug(f"GET: {url}")
-                r = requests.get(self.u(url), headers=self.headers())
-                logger.debug(f"return: {r.status_code}")
-        self.failed = r.status_code != 200
         return r
 
-    def dupr_post(self, url, json_data=None, name: str = "") -> Response:
-        logger.debug(f"POST: {name} : {url}")
-        headers = self.headers()
-        r = requests.post(self.u(url), headers=headers, json=json_data)
-        logger.debug(f"return: {r.status_code}")
+    def _send(self, method: str, url: str, name: str, json_data=None) -> Response:
+        logger.debug(f"{method}: {name} : {url}")
+        r = self._request(method, url, name, json_data)
         if r.status_code == 403:
             rc = self.refresh_user()
             if rc == 200:
-                logger.debug(f"POST: {url}")
-                r = requests.post(self.u(url), headers=self.headers())
-                logger.debug(f"return: {r.status_code}")
+                logger.debug(f"{method}: {url}")
+                r = self._request(method, url, name, json_data, retry=True)
         self.failed = r.status_code != 200
         return r
 
+    def dupr_get(self, url, name: str = "") -> Response:
+        return self._send("GET", url, name)
+
+    def dupr_post(self, url, json_data=None, name: str = "") -> Response:
+        return self._send("POST", url, name, json_data)
+
     def dupr_put(self, url, json_data=None, name: str = "") -> Response:
-        logger.debug(f"PUT: {name} : {url}")
-        headers = self.headers()
-        r = requests.put(self.u(url), headers=headers, json=json_data)
-        logger.debug(f"return: {r.status_code}")
-        if r.status_code == 403:
-            rc = self.refresh_user()
-            if rc == 200:
-                logger.debug(f"PUT: {url}")
-                r = requests.put(self.u(url), headers=self.headers(), json=json_data)
-                logger.debug(f"return: {r.status_code}")
-        self.failed = r.status_code != 200
-        return r
+        return self._send("PUT", url, name, json_data)
 
     def get_profile(self) -> tuple[int, dict]:
         r = self.dupr_get(f"/user/{self.version}/profile/", "get_profile")
@@ -198,44 +241,72 @@ class DuprClient(object):
         limit: int = 500,
         delay_sec: float = 0.05,
         max_workers: int = 0,
+        store=None,
+        max_age_sec: Optional[float] = None,
     ) -> list[dict]:
         """
         For each member (up to limit), call get_player(id or duprId) and merge ratings into member.
         Use when club members API returns no ratings.
         - delay_sec: used only when max_workers=0 to avoid rate limits.
         - max_workers: if > 0, fetch in parallel (e.g. 10) instead of one-by-one; no delay between calls.
+        - store: optional rating store (dupr_db.MemberRatingStore) with load(ids) / save(ratings_by_id).
+          Members fetched less than max_age_sec ago get their stored ratings and no get_player call;
+          if a refetch fails the stale stored ratings are used instead.
         DUPR has no batch player API, so we "batch" by concurrency (many get_player calls in parallel).
+        Hit / fetch counts accumulate in self.enrich_stats.
         """
-        import time
-        to_fetch = []
+        candidates = []
         for i, member in enumerate(members):
             if i >= limit:
                 break
             player_id = member.get("id") or member.get("duprId")
             if player_id is not None:
-                to_fetch.append((i, member, str(player_id)))
+                candidates.append((i, member, str(player_id)))
 
-        if max_workers and max_workers > 0:
-            def fetch_one(item):
-                idx, member, pid = item
-                rc, player = self.get_player(pid)
-                if rc == 200 and player and isinstance(player.get("ratings"), dict):
-                    member["ratings"] = player["ratings"]
-                return idx
+        cached = store.load(pid for _, _, pid in candidates) if store is not None else {}
+        now = time.time()
+        to_fetch = []
+        hits = 0
+        for item in candidates:
+            entry = cached.get(item[2])
+            if entry is not None and max_age_sec is not None and now - entry[0] <= max_age_sec:
+                item[1]["ratings"] = entry[1]
+                hits += 1
+            else:
+                to_fetch.append(item)
+
+        fetched = {}
+
+        def fetch_one(item):
+            idx, member, pid = item
+            rc, player = self.get_player(pid)
+            if rc == 200 and player and isinstance(player.get("ratings"), dict):
+                member["ratings"] = player["ratings"]
+                fetched[pid] = player["ratings"]
+            elif pid in cached:
+                member["ratings"] = cached[pid][1]
+            return idx
 
+        if max_workers and max_workers > 0:
             with ThreadPoolExecutor(max_workers=max_workers) as executor:
                 futures = {executor.submit(fetch_one, item): item for item in to_fetch}
                 for f in as_completed(futures):
                     f.result()
-            return members
         else:
-            for _, member, player_id in to_fetch:
-                rc, player = self.get_player(player_id)
-                if rc == 200 and player and isinstance(player.get("ratings"), dict):
-                    member["ratings"] = player["ratings"]
+            for item in to_fetch:
+                fetch_one(item)
                 if delay_sec > 0:
                     time.sleep(delay_sec)
-            return members
+
+        if store is not None:
+            store.save(fetched)
+        with self._stats_lock:
+            self.enrich_stats["hits"] += hits
+            self.enrich_stats["fetches"] += len(to_fetch)
+            self.enrich_stats["errors"] += len(to_fetch) - len(fetched)
+        if store is not None:
+            logger.debug(f"enrich: {hits} cached, {len(to_fetch)} fetched ({len(to_fetch) - len(fetched)} failed)")
+        return members
 
     def get_club(self, club_id: str):
         r = self.dupr_get(f"/club/{self.version}/{club_id}", "get_club")
@@ -261,13 +332,53 @@ class DuprClient(object):
                 page_data,
                 name="get_member_match_history",
             )
-            if r.status_code == 200:
-                offset, hits = self.handle_paging(r.json())
-                hit_data.extend(hits)
-                page_data["offset"] = offset
+            if r.status_code != 200:
+                break
+            with span("json"):
+                page = r.json()
+            offset, hits = self.handle_paging(page)
+            hit_data.extend(hits)
+            page_data["offset"] = offset
         self.ppj(page_data)
         return r.status_code, hit_data
 
+    def get_member_match_history_page(
+        self, member_id: str, offset: int = 0, limit: int = 10
+    ) -> tuple[int, list, int]:
+        """
+        One window of match history (newest first): up to `limit` matches starting
+        at `offset`. Returns (status, hits, total); keeps requesting if the API
+        returns short pages before `limit` is reached.
+        """
+        page_data = {
+            "filters": {},
+            "sort": {
+                "order": "DESC",
+                "parameter": "MATCH_DATE",
+            },
+            "limit": limit,
+            "offset": offset,
+        }
+        hit_data = []
+        total = 0
+        while True:
+            r = self.dupr_post(
+                f"/player/{self.version}/{member_id}/history",
+                page_data,
+                name="get_member_match_history",
+            )
+            if r.status_code != 200:
+                return r.status_code, hit_data, total
+            with span("json"):
+                result = r.json()["result"]
+            total = result["total"]
+            hits = result["hits"]
+            hit_data.extend(hits)
+            page_data["offset"] += len(hits)
+            page_data["limit"] = limit - len(hit_data)
+            if not hits or page_data["limit"] <= 0 or page_data["offset"] >= total:
+                return r.status_code, hit_data, total
+
     def get_member_match_history(self, member_id: str) -> tuple[int, list]:
         offset = 0
         hit_data = []
@@ -276,9 +387,10 @@ class DuprClient(object):
                 f"/player/{self.version}/{member_id}/history?limit=100&offset={offset}",
                 name="get_member_match_history",
             )
-            if r.status_code == 200:
-                offset, hits = self.handle_paging(r.json())
-                hit_data.extend(hits)
+            if r.status_code != 200:
+                break
+            offset, hits = self.handle_paging(r.json())
+            hit_data.extend(hits)
         self.ppj(hit_data)
         return r.status_code, hit_data
 
@@ -357,10 +469,13 @@ class DuprClient(object):
                 json_data=data,
                 name="get_member_by_club",
             )
-            if r.status_code == 200:
-                self.ppj(r.json())
-                offset, hits = self.handle_paging(r.json())
-                pdata.extend(hits)
+            if r.status_code != 200:
+                break
+            with span("json"):
+                page = r.json()
+            self.ppj(page)
+            offset, hits = self.handle_paging(page)
+            pdata.extend(hits)
 
         if sort_by_rating and pdata:
             pdata = sorted(pdata, key=self._member_doubles_sort_key, reverse=True)
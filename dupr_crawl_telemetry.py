@@ -0,0 +1,178 @@
+"""
+    Structured progress events for long crawls.
+
+    A crawler keeps its counters on a CrawlTelemetry and calls tick() as it
+    goes; at most every `interval` seconds (and at start / finish) the
+    counters are written as one crawl_event row and, optionally, one JSONL
+    line. API calls and history pages come from the client's ClientMetrics,
+    throughput and ETA from a sliding window of recent events, so readers
+    (scripts/crawl_status.py) show live progress without counting
+    club_match_raw rows.
+"""
+import json
+import os
+import socket
+import time
+from collections import deque
+from typing import List, Optional
+
+from loguru import logger
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from dupr_db import CrawlEvent
+
+DEFAULT_INTERVAL = 5.0
+RATE_WINDOW_SEC = 60.0
+HISTORY_ENDPOINT = "get_member_match_history"
+
+
+def new_run_key(source: str) -> str:
+    return f"{source}-{time.strftime('%Y%m%d-%H%M%S')}-{socket.gethostname()}-{os.getpid()}"
+
+
+class CrawlTelemetry:
+    """
+    Cumulative crawl counters plus a throttled event writer. Set
+    members_total, bump members_done / matches_fetched / matches_stored /
+    cache_hits, call tick() often and finish() once.
+    """
+
+    def __init__(
+        self,
+        engine=None,
+        source: str = "crawl",
+        metrics=None,
+        jsonl_path: Optional[str] = None,
+        interval: float = DEFAULT_INTERVAL,
+        window_sec: float = RATE_WINDOW_SEC,
+    ):
+        self.engine = engine
+        self.source = source
+        self.run_key = new_run_key(source)
+        self.metrics = metrics
+        self.jsonl_path = jsonl_path
+        self.interval = interval
+        self.window_sec = window_sec
+        self.members_done = 0
+        self.members_total = 0
+        self.matches_fetched = 0
+        self.matches_stored = 0
+        self.cache_hits = 0
+        self._pages = 0
+        self._api_calls = 0
+        self._last_emit = 0.0
+        self._window = deque()  # (ts, api_calls, members_done)
+
+    def _client_counts(self) -> None:
+        if self.metrics is None:
+            return
+        snap = self.metrics.snapshot()
+        self._api_calls = snap["totals"]["requests"]
+        history = snap["endpoints"].get(HISTORY_ENDPOINT)
+        self._pages = history["status"].get("200", 0) if history else 0
+
+    def _rates(self, now: float):
+        """(req/s, members/s) over the window, including `now`."""
+        self._window.append((now, self._api_calls, self.members_done))
+        while len(self._window) > 2 and now - self._window[1][0] >= self.window_sec:
+            self._window.popleft()
+        t0, calls0, members0 = self._window[0]
+        dt = now - t0
+        if dt <= 0:
+            return None, None
+        return (self._api_calls - calls0) / dt, (self.members_done - members0) / dt
+
+    def event(self, kind: str, message: Optional[str] = None) -> dict:
+        now = time.time()
+        self._client_counts()
+        req_per_sec, members_per_sec = self._rates(now)
+        remaining = max(0, self.members_total - self.members_done)
+        if kind == "finish" or not remaining:
+            eta = 0.0
+        elif members_per_sec:
+            eta = remaining / members_per_sec
+        else:
+            eta = None
+        return {
+            "run_key": self.run_key,
+            "source": self.source,
+            "kind": kind,
+            "ts": now,
+            "members_done": self.members_done,
+            "members_total": self.members_total,
+            "pages_fetched": self._pages,
+            "matches_fetched": self.matches_fetched,
+            "matches_stored": self.matches_stored,
+            "api_calls": self._api_calls,
+            "cache_hits": self.cache_hits,
+            "req_per_sec": None if req_per_sec is None else round(req_per_sec, 3),
+            "eta_sec": None if eta is None else round(eta, 1),
+            "message": message,
+        }
+
+    def emit(self, kind: str = "progress", message: Optional[str] = None) -> dict:
+        ev = self.event(kind, message)
+        self._last_emit = time.monotonic()
+        if self.jsonl_path:
+            with open(self.jsonl_path, "a") as f:
+                f.write(json.dumps(ev) + "\n")
+        if self.engine is not None:
+            # telemetry must never stop the crawl (e.g. a locked DB)
+            try:
+                with Session(self.engine) as sess:
+                    sess.execute(insert(CrawlEvent), [ev])
+                    sess.commit()
+            except Exception as e:
+                logger.warning(f"crawl telemetry write failed: {e}")
+        return ev
+
+    def start(self, members_total: int = 0, message: Optional[str] = None) -> dict:
+        self.members_total = members_total
+        return self.emit("start", message)
+
+    def tick(self) -> Optional[dict]:
+        """Emit a progress event if `interval` seconds passed since the last one."""
+        if time.monotonic() - self._last_emit >= self.interval:
+            return self.emit("progress")
+        return None
+
+    def finish(self, error: Optional[str] = None) -> dict:
+        return self.emit("error" if error else "finish", error)
+
+
+def _row_dict(row: CrawlEvent) -> dict:
+    return {c.name: getattr(row, c.name) for c in CrawlEvent.__table__.columns if c.name != "id"}
+
+
+def run_events(engine, run_key: Optional[str] = None, limit: int = 500) -> List[dict]:
+    """Last `limit` events of one run (the most recent run by default), oldest first."""
+    with Session(engine) as sess:
+        if run_key is None:
+            run_key = sess.scalars(
+                select(CrawlEvent.run_key).order_by(CrawlEvent.ts.desc()).limit(1)
+            ).first()
+            if run_key is None:
+                return []
+        rows = sess.scalars(
+            select(CrawlEvent)
+            .where(CrawlEvent.run_key == run_key)
+            .order_by(CrawlEvent.ts.desc())
+            .limit(limit)
+        ).all()
+        return [_row_dict(r) for r in reversed(rows)]
+
+
+def read_jsonl(path: str, run_key: Optional[str] = None) -> List[dict]:
+    """Events of one run from a JSONL stream (the last run in the file by default)."""
+    events = []
+    with open(path) as f:
+        for line in f:
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                continue  # partial line being written
+    if not events:
+        return []
+    run_key = run_key or events[-1]["run_key"]
+    return [e for e in events if e.get("run_key") == run_key]
@@ -1,28 +1,118 @@
 """
     Relational representation of DUPR Data
 """
+import json
+import os
+import threading
+import time
 from datetime import date, datetime
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 from loguru import logger
 from sqlalchemy import create_engine
-from sqlalchemy import String, ForeignKey, Integer, Float, Text, DateTime
-from sqlalchemy import Table, Column, select
-from sqlalchemy.orm import Session
+from sqlalchemy import String, ForeignKey, Integer, Float, Text, DateTime, LargeBinary
+from sqlalchemy import Table, Column, Index, inspect, select, text
+from sqlalchemy.orm import Session, aliased, object_session
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from dupr_json import MatchRow, match_row, player_reliability, team_games
+
+try:
+    import fcntl
+except ImportError:  # Windows: stamp bumps are not locked
+    fcntl = None
 
 
 engine = None
 
+DB_FILE = "dupr.sqlite"
+
+# Writers bump a counter in <database>.stamp after committing; readers (the
+# API response cache) compare it instead of querying SQLite to learn whether
+# anything changed. Fixed width so a read never sees a half-written value.
+_STAMP_WIDTH = 20
+
 
-def open_db():
+def open_db(url: Optional[str] = None):
+    """Engine for `url` (default: dupr.sqlite in the working directory), schema checked."""
     global engine
     # engine = create_engine("sqlite+pysqlite:///:memory:", echo=False)
-    engine = create_engine("sqlite+pysqlite:///dupr.sqlite", echo=False)
-    Base.metadata.create_all(engine)
+    engine = create_engine(url or f"sqlite+pysqlite:///{DB_FILE}", echo=False)
+    ensure_schema(engine)
     return engine
 
 
+def write_stamp_path(bind=None) -> str:
+    """
+    Absolute path of the write stamp for the SQLite database of `bind` (an
+    engine or URL; default the engine opened by open_db, else dupr.sqlite),
+    so processes started from different directories agree on it.
+    """
+    from sqlalchemy.engine import make_url
+
+    bind = bind if bind is not None else engine
+    if bind is None:
+        database = DB_FILE
+    else:
+        url = bind.url if hasattr(bind, "url") else make_url(str(bind))
+        database = url.database or DB_FILE
+    return os.path.abspath(database) + ".stamp"
+
+
+def read_write_generation(path: str) -> int:
+    """Current write counter in a stamp file, 0 if it was never written."""
+    try:
+        with open(path, "rb") as f:
+            return int(f.read(_STAMP_WIDTH) or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def mark_db_written(bind=None):
+    """
+    Bump the write counter of the database of `bind` (see write_stamp_path)
+    so cached API responses are invalidated. Call after committing.
+    """
+    path = write_stamp_path(bind)
+    try:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)  # concurrent writers must not lose a bump
+            value = int(os.read(fd, _STAMP_WIDTH) or 0) + 1
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.write(fd, b"%0*d" % (_STAMP_WIDTH, value))
+        finally:
+            os.close(fd)
+    except (OSError, ValueError) as e:
+        logger.warning(f"could not update {path}: {e}")
+
+
+def ensure_schema(bind):
+    """
+    Create missing tables, plus the nullable columns and indexes that
+    create_all skips when the table already exists in an older dupr.sqlite.
+    """
+    Base.metadata.create_all(bind)
+    _add_missing_columns(bind)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind, checkfirst=True)
+
+
+def _add_missing_columns(bind):
+    insp = inspect(bind)
+    for table in Base.metadata.sorted_tables:
+        existing = {c["name"] for c in insp.get_columns(table.name)}
+        missing = [c for c in table.columns if c.name not in existing and c.nullable]
+        if not missing:
+            continue
+        with bind.begin() as conn:
+            for col in missing:
+                ddl = col.type.compile(dialect=conn.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{col.name}" {ddl}'))
+                logger.info(f"added column {table.name}.{col.name}")
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -195,6 +285,9 @@ class Match(Base):
     match_source: Mapped[str] = mapped_column(default="")
     match_score_added: Mapped[bool] = mapped_column(default=True)
 
+    # keyset pagination for player match history pages on (date, match_id)
+    __table_args__ = (Index("match_date_match_id_idx", "date", "match_id"),)
+
     def __repr__(self) -> str:
         return f"Match {self.name} on {self.date}"
 
@@ -204,6 +297,34 @@ class Match(Base):
             Match.match_id == match_id)).scalar_one_or_none()
         return m
 
+    @classmethod
+    def save(cls, sess: Session, match: "Match") -> Optional["Match"]:
+        """ Insert a match unless it is already stored (returns None then).
+            Team players are swapped for existing player rows; the match
+            history call only returns a few player fields.
+        """
+        if Match.get_by_id(sess, match.match_id):
+            return None
+        with sess.no_autoflush:
+            for team in match.teams:
+                plist = []
+                for p in team.players:
+                    p1 = Player.get(sess, p.dupr_id)
+                    if p1:
+                        plist.append(p1)
+                    elif plist and plist[0].dupr_id == p.dupr_id:
+                        # same player entered twice on a doubles team
+                        logger.warning(
+                            f"same player on doubles team {p.dupr_id} {match.match_id}"
+                        )
+                    else:
+                        plist.append(p)
+                team.players = plist
+        sess.add(match)
+        # make new players visible to Player.get for the next match
+        sess.flush()
+        return match
+
     @classmethod
     def from_json(cls, d: dict):
 
@@ -239,7 +360,8 @@ match_team_player = Table(
     "match_team_player",
     Base.metadata,
     Column("match_team_id", ForeignKey("match_team.id")),
-    Column("player_id", ForeignKey("player.id"))
+    Column("player_id", ForeignKey("player.id")),
+    Index("match_team_player_player_idx", "player_id"),
 )
 
 
@@ -318,6 +440,10 @@ class ClubMatchRaw(Base):
     """
     Raw match JSON from club member history, for reverse-engineering DUPR.
     Stores full API response including preMatchRatingAndImpact and matchDoubleRatingImpact.
+
+    The payload is either plain JSON in raw_json, or compressed in raw_data
+    with raw_codec naming the codec (raw_json is then ""); see
+    dupr_raw_codec.py. Read it with payload() or dupr_raw_codec.load_raw.
     """
     __tablename__ = "club_match_raw"
 
@@ -327,3 +453,370 @@ class ClubMatchRaw(Base):
     event_date: Mapped[Optional[str]] = mapped_column(String(16))
     raw_json: Mapped[str] = mapped_column(Text)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    raw_codec: Mapped[Optional[str]] = mapped_column(String(32))  # None: plain raw_json
+    raw_data: Mapped[Optional[bytes]] = mapped_column(LargeBinary)
+    # set by build-club-match-players when the payload is not two teams of
+    # two (singles, malformed), so the backfill does not decode it again
+    players_skipped: Mapped[Optional[bool]] = mapped_column()
+
+    def payload(self) -> dict:
+        from dupr_raw_codec import load_raw
+        return load_raw(object_session(self), self.raw_json, self.raw_codec, self.raw_data)
+
+
+class RawJsonDict(Base):
+    """Compression dictionary for club_match_raw payloads, keyed by content hash."""
+    __tablename__ = "raw_json_dict"
+
+    dict_id: Mapped[str] = mapped_column(String(16), primary_key=True)
+    codec: Mapped[str] = mapped_column(String(16))  # zlib / zstd
+    data: Mapped[bytes] = mapped_column(LargeBinary)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+def match_type_flags(match_type: Optional[str]) -> tuple:
+    """(is_tournament, is_rec) for a match type / source string."""
+    mt = (match_type or "").strip().lower()
+    is_tournament = mt in {"tournament", "league"} or "tournament" in mt
+    is_rec = mt in {"rec", "recreation"} or "rec" in mt
+    return is_tournament, is_rec
+
+
+def _player_doubles(player: dict) -> Optional[float]:
+    if not isinstance(player, dict):
+        return None
+    for ratings in (player.get("ratings"), player):
+        if isinstance(ratings, dict):
+            v = _cv_rating_json(ratings.get("doubles"))
+            if v is not None:
+                return v
+    return None
+
+
+def _mean(values) -> Optional[float]:
+    items = [v for v in values if v is not None]
+    return sum(items) / len(items) if items else None
+
+
+class MatchFeature(Base):
+    """
+    Similarity features for one match, materialized at ingest time.
+    Column names follow backend.similarity.FEATURE_ORDER; team 1 is the
+    first team in the DUPR match JSON and "points for" are team 1's games.
+    expected_points_against (team 2's expected games) lets the similarity
+    index also store the match as seen from team 2.
+    """
+    __tablename__ = "match_feature"
+
+    FEATURE_COLUMNS = (
+        "avg_team1_rating",
+        "avg_team2_rating",
+        "avg_team1_reliability",
+        "avg_team2_reliability",
+        "rating_diff",
+        "margin",
+        "is_tournament",
+        "is_rec",
+        "expected_points_for",
+        "actual_points_for",
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    match_id: Mapped[int] = mapped_column(unique=True)  # DUPR matchId
+    event_date: Mapped[Optional[str]] = mapped_column(String(16))
+    match_type: Mapped[Optional[str]] = mapped_column(String(32))
+    avg_team1_rating: Mapped[Optional[float]] = mapped_column(Float)
+    avg_team2_rating: Mapped[Optional[float]] = mapped_column(Float)
+    avg_team1_reliability: Mapped[Optional[float]] = mapped_column(Float)
+    avg_team2_reliability: Mapped[Optional[float]] = mapped_column(Float)
+    rating_diff: Mapped[Optional[float]] = mapped_column(Float)
+    margin: Mapped[Optional[float]] = mapped_column(Float)
+    is_tournament: Mapped[float] = mapped_column(Float, default=0.0)
+    is_rec: Mapped[float] = mapped_column(Float, default=0.0)
+    expected_points_for: Mapped[Optional[float]] = mapped_column(Float)
+    actual_points_for: Mapped[Optional[float]] = mapped_column(Float)
+    expected_points_against: Mapped[Optional[float]] = mapped_column(Float)
+    min_reliability: Mapped[Optional[float]] = mapped_column(Float)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    def vector(self) -> List[float]:
+        """Feature vector in FEATURE_ORDER, missing values as 0.0."""
+        return [float(getattr(self, name) or 0.0) for name in self.FEATURE_COLUMNS]
+
+    @classmethod
+    def from_json(cls, d: dict, predictor=None) -> Optional["MatchFeature"]:
+        """
+        Build features from a DUPR match history record. Pre-match ratings
+        come from preMatchRatingAndImpact when present; reliabilities from the
+        crawler's _crawl_metadata, else the embedded player ratings.
+        `predictor` (a DuprPredictor) fills expected_points_for.
+        """
+        teams = d.get("teams")
+        if not isinstance(teams, list) or len(teams) != 2:
+            return None
+        t1, t2 = (t if isinstance(t, dict) else {} for t in teams)
+        players = [t1.get("player1"), t1.get("player2"), t2.get("player1"), t2.get("player2")]
+
+        ratings = []
+        for team in (t1, t2):
+            pre = team.get("preMatchRatingAndImpact")
+            pre = pre if isinstance(pre, dict) else {}
+            for n, key in ((1, "player1"), (2, "player2")):
+                r = pre.get(f"preMatchDoubleRatingPlayer{n}")
+                ratings.append(float(r) if r is not None else _player_doubles(team.get(key)))
+
+        meta = d.get("_crawl_metadata")
+        rel_meta = meta.get("reliability") if isinstance(meta, dict) else None
+        rel_meta = rel_meta if isinstance(rel_meta, dict) else {}
+        rels = []
+        for n, player in enumerate(players, 1):
+            rel = rel_meta.get(f"player{n}")
+            rels.append(float(rel) if rel is not None else player_reliability(player))
+
+        f = cls()
+        f.match_id = d.get("matchId")
+        f.event_date = d.get("eventDate")
+        f.match_type = d.get("matchSource") or d.get("matchType")
+        f.avg_team1_rating = _mean(ratings[:2])
+        f.avg_team2_rating = _mean(ratings[2:])
+        f.avg_team1_reliability = _mean(rels[:2])
+        f.avg_team2_reliability = _mean(rels[2:])
+        f.min_reliability = min((r for r in rels if r is not None), default=None)
+        if f.avg_team1_rating is not None and f.avg_team2_rating is not None:
+            f.rating_diff = f.avg_team1_rating - f.avg_team2_rating
+        score_for = team_games(t1)
+        score_against = team_games(t2)
+        if score_for is not None and score_against is not None:
+            f.margin = float(score_for - score_against)
+        f.actual_points_for = float(score_for) if score_for is not None else None
+        is_tournament, is_rec = match_type_flags(f.match_type)
+        f.is_tournament = 1.0 if is_tournament else 0.0
+        f.is_rec = 1.0 if is_rec else 0.0
+        if predictor is not None and None not in ratings:
+            f.expected_points_for = float(predictor.expected_games(*ratings))
+            f.expected_points_against = float(predictor.expected_games(*ratings[2:], *ratings[:2]))
+        f.updated_at = datetime.utcnow()
+        return f
+
+    @classmethod
+    def save(cls, sess: Session, feature: "MatchFeature") -> "MatchFeature":
+        """Insert or update features for this match."""
+        f = sess.execute(select(MatchFeature).where(
+            MatchFeature.match_id == feature.match_id)).scalar_one_or_none()
+        if f is None:
+            sess.add(feature)
+            return feature
+        f.event_date = feature.event_date
+        f.match_type = feature.match_type
+        f.min_reliability = feature.min_reliability
+        f.expected_points_against = feature.expected_points_against
+        for name in cls.FEATURE_COLUMNS:
+            setattr(f, name, getattr(feature, name))
+        f.updated_at = feature.updated_at
+        sess.add(f)
+        return f
+
+
+class ClubMatchPlayer(Base):
+    """
+    One participant of a club_match_raw match, written next to the raw
+    payload so fitting / evaluation data is a SQL query rather than a JSON
+    scan. position 1-2 is team 1 (the first team in the JSON), 3-4 team 2;
+    games_for / games_against are this player's team's games.
+    """
+    __tablename__ = "club_match_player"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    match_id: Mapped[int] = mapped_column()  # DUPR matchId
+    event_date: Mapped[Optional[str]] = mapped_column(String(16))
+    position: Mapped[int] = mapped_column()
+    player_id: Mapped[Optional[str]] = mapped_column(String(32))  # DUPR id
+    dupr_id: Mapped[Optional[str]] = mapped_column(String(32))  # short duprId, when present
+    pre_rating: Mapped[Optional[float]] = mapped_column(Float)  # preMatchDoubleRatingPlayerN
+    impact: Mapped[Optional[float]] = mapped_column(Float)  # matchDoubleRatingImpactPlayerN
+    reliability: Mapped[Optional[float]] = mapped_column(Float)
+    games_for: Mapped[Optional[int]] = mapped_column()
+    games_against: Mapped[Optional[int]] = mapped_column()
+    is_winner: Mapped[bool] = mapped_column(default=False)
+
+    __table_args__ = (
+        Index("club_match_player_match_pos_idx", "match_id", "position", unique=True),
+        Index("club_match_player_player_date_idx", "player_id", "event_date"),
+        Index("club_match_player_dupr_id_idx", "dupr_id"),
+    )
+
+    @staticmethod
+    def rows_from_match(m: Optional[MatchRow]) -> List[dict]:
+        """Column values for the four participants of a MatchRow, for bulk inserts."""
+        if m is None:
+            return []
+        return [
+            {
+                "match_id": m.match_id,
+                "event_date": m.event_date,
+                "position": i + 1,
+                "player_id": m.player_ids[i],
+                "dupr_id": m.dupr_ids[i],
+                "pre_rating": m.ratings[i],
+                "impact": m.impacts[i],
+                "reliability": m.reliabilities[i],
+                "games_for": m.games[i // 2],
+                "games_against": m.games[1 - i // 2],
+                "is_winner": m.winners[i // 2],
+            }
+            for i in range(4)
+        ]
+
+    @classmethod
+    def rows_from_json(cls, d: dict) -> List[dict]:
+        """
+        Rows for a parsed DUPR match record; [] when the match is not two
+        teams of two. Reliability comes from the crawler's _crawl_metadata,
+        else the embedded ratings.
+        """
+        return cls.rows_from_match(match_row(d))
+
+    @classmethod
+    def from_json(cls, d: dict) -> List["ClubMatchPlayer"]:
+        return [cls(**row) for row in cls.rows_from_json(d)]
+
+
+def club_match_unsplit():
+    """Where-clause for club_match_raw rows not yet split into club_match_player rows."""
+    return (ClubMatchRaw.players_skipped.is_not(True)) & ClubMatchRaw.match_id.not_in(select(ClubMatchPlayer.match_id))
+
+
+def club_match_wide_select():
+    """
+    One row per club match with its four participants side by side, in
+    club_match_raw order: match_id, event_date, r1..r4 (pre-match ratings),
+    imp1..imp4, rel1..rel4, id1..id4, dupr_id1..dupr_id4, games1, games2
+    (team totals, None if not reported) and team1_won. Matches without
+    club_match_player rows are left out.
+    """
+    p = [aliased(ClubMatchPlayer, name=f"p{i}") for i in range(1, 5)]
+    cols = [ClubMatchRaw.match_id, ClubMatchRaw.event_date]
+    for attr, label in (("pre_rating", "r"), ("impact", "imp"), ("reliability", "rel"),
+                        ("player_id", "id"), ("dupr_id", "dupr_id")):
+        cols += [getattr(pi, attr).label(f"{label}{i}") for i, pi in enumerate(p, 1)]
+    cols += [p[0].games_for.label("games1"), p[0].games_against.label("games2"),
+             p[0].is_winner.label("team1_won")]
+    stmt = select(*cols)
+    for i, pi in enumerate(p, 1):
+        stmt = stmt.join(pi, (pi.match_id == ClubMatchRaw.match_id) & (pi.position == i))
+    return stmt.order_by(ClubMatchRaw.id)
+
+
+class CrawlRun(Base):
+    """
+    One background BFS crawl. `params` is the CrawlRunRequest as JSON so an
+    interrupted run can be resumed with the same limits after a restart.
+    """
+    __tablename__ = "crawl_run"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    params: Mapped[str] = mapped_column(Text, default="{}")
+    status: Mapped[str] = mapped_column(String(16), default="running")  # running/done/error
+    new_players: Mapped[int] = mapped_column(default=0)
+    error: Mapped[Optional[str]] = mapped_column(Text)
+    started_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+
+class CrawlQueueItem(Base):
+    """A player to crawl within a run, at BFS `depth` from the seeds."""
+    __tablename__ = "crawl_queue"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    run_id: Mapped[int] = mapped_column(ForeignKey("crawl_run.id"))
+    player_id: Mapped[str] = mapped_column(String(32))
+    depth: Mapped[int] = mapped_column(default=0)
+    status: Mapped[str] = mapped_column(String(16), default="queued")  # queued/in_progress/done/error
+    matches: Mapped[int] = mapped_column(default=0)
+    error: Mapped[Optional[str]] = mapped_column(Text)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("crawl_queue_run_player_idx", "run_id", "player_id", unique=True),
+        Index("crawl_queue_run_status_idx", "run_id", "status"),
+    )
+
+
+class CrawlEvent(Base):
+    """
+    Progress event written by a crawler (see dupr_crawl_telemetry.py).
+    Counters are cumulative for the run, so the newest row of a run is its
+    current state; req_per_sec and eta_sec cover the last minute or so.
+    """
+    __tablename__ = "crawl_event"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    run_key: Mapped[str] = mapped_column(String(64))
+    source: Mapped[str] = mapped_column(String(32))
+    kind: Mapped[str] = mapped_column(String(16))  # start/progress/finish/error
+    ts: Mapped[float] = mapped_column(Float)  # time.time()
+    members_done: Mapped[int] = mapped_column(default=0)
+    members_total: Mapped[int] = mapped_column(default=0)
+    pages_fetched: Mapped[int] = mapped_column(default=0)
+    matches_fetched: Mapped[int] = mapped_column(default=0)
+    matches_stored: Mapped[int] = mapped_column(default=0)
+    api_calls: Mapped[int] = mapped_column(default=0)
+    cache_hits: Mapped[int] = mapped_column(default=0)  # API calls saved by a cache
+    req_per_sec: Mapped[Optional[float]] = mapped_column(Float)
+    eta_sec: Mapped[Optional[float]] = mapped_column(Float)
+    message: Mapped[Optional[str]] = mapped_column(Text)
+
+    __table_args__ = (
+        Index("crawl_event_run_ts_idx", "run_key", "ts"),
+        Index("crawl_event_ts_idx", "ts"),
+    )
+
+
+class MemberRatingCache(Base):
+    """
+    Last get_player ratings per DUPR id, so roster enrichment only refetches
+    members whose ratings are older than the caller's max age.
+    """
+    __tablename__ = "member_rating_cache"
+
+    dupr_id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    ratings: Mapped[str] = mapped_column(Text)  # get_player "ratings" dict as JSON
+    fetched_at: Mapped[float] = mapped_column(Float)  # time.time()
+
+
+class MemberRatingStore:
+    """
+    Rating store for DuprClient.enrich_members_with_ratings backed by the
+    member_rating_cache table. Safe to share between threads.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._lock = threading.Lock()
+
+    def load(self, dupr_ids: Iterable[str]) -> Dict[str, Tuple[float, dict]]:
+        """{dupr_id: (fetched_at, ratings)} for the ids that have been fetched before."""
+        ids = list(dupr_ids)
+        out = {}
+        with self._lock, Session(self.engine) as sess:
+            for i in range(0, len(ids), 500):  # stay under SQLite's bound-parameter limit
+                rows = sess.execute(
+                    select(MemberRatingCache).where(MemberRatingCache.dupr_id.in_(ids[i:i + 500]))
+                ).scalars()
+                for row in rows:
+                    try:
+                        out[row.dupr_id] = (row.fetched_at, json.loads(row.ratings))
+                    except ValueError:
+                        continue
+        return out
+
+    def save(self, ratings_by_id: Dict[str, dict], fetched_at: Optional[float] = None) -> None:
+        if not ratings_by_id:
+            return
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self._lock, Session(self.engine) as sess:
+            for dupr_id, ratings in ratings_by_id.items():
+                sess.merge(MemberRatingCache(
+                    dupr_id=str(dupr_id), ratings=json.dumps(ratings), fetched_at=fetched_at
+                ))
+            sess.commit()
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+    Local stand-in for the DUPR API, for offline load tests and benchmarks.
+
+    Serves a SyntheticClub over the endpoints DuprClient uses (login,
+    profile, player, history paging, club members, search, expected score)
+    with the same response envelopes. Latency, 403/429/5xx error rates and a
+    server-side per-minute rate limit can be injected on every endpoint but
+    login; faults are drawn from a seeded RNG so runs are repeatable. Per-endpoint counts are available
+    from `stats()` or GET /__stats.
+
+    Point the client at it with DUPR_API_URL (and DUPR_TOKEN_FILE so a fake
+    login does not replace the real token in ~/.duprly_config):
+
+        python dupr_fake_server.py --players 500 --matches 20000 --latency-ms 30
+        DUPR_API_URL=http://127.0.0.1:8765 DUPR_TOKEN_FILE=/tmp/fake_dupr_token.json ...
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+from dupr_synthetic import SyntheticClub, win_probability
+
+FAKE_TOKEN = "fake-dupr-access-token"
+
+
+@dataclass
+class Faults:
+    """Injected behaviour; rates are per-request probabilities."""
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    rate_403: float = 0.0
+    rate_429: float = 0.0
+    rate_5xx: float = 0.0
+    rate_limit_per_min: int = 0  # 0 = unlimited; token bucket, 1s of burst, else 429
+
+
+def _paged(items: list, offset: int, limit: int) -> dict:
+    offset, limit = max(0, int(offset)), max(1, int(limit))
+    return {
+        "status": "SUCCESS",
+        "result": {
+            "offset": offset,
+            "limit": limit,
+            "total": len(items),
+            "hits": items[offset:offset + limit],
+        },
+    }
+
+
+class FakeDuprServer:
+    """
+    Threaded HTTP server around a SyntheticClub. Use as a context manager or
+    call start() / stop(); `url` is the base URL for DuprClient(api_url=...).
+    """
+
+    def __init__(
+        self,
+        club: Optional[SyntheticClub] = None,
+        faults: Optional[Faults] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: int = 0,
+    ):
+        self.club = club or SyntheticClub()
+        self.faults = faults or Faults()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = float("inf")  # rate limit bucket, capped to capacity on first use
+        self._refilled = time.monotonic()
+        self._counts = Counter()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeDuprServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-dupr", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeDuprServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def stats(self) -> dict:
+        """{"endpoint status": count} plus a "requests" total."""
+        with self._lock:
+            out = dict(self._counts)
+        out["requests"] = sum(v for k, v in out.items())
+        return out
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+    def _count(self, endpoint: str, status: int) -> None:
+        with self._lock:
+            self._counts[f"{endpoint} {status}"] += 1
+
+    def _injected_status(self) -> Optional[int]:
+        """Status to fail this request with, or None to serve it."""
+        f = self.faults
+        with self._lock:
+            if f.rate_limit_per_min > 0:
+                per_sec = f.rate_limit_per_min / 60.0
+                now = time.monotonic()
+                self._tokens = min(max(1.0, per_sec), self._tokens + (now - self._refilled) * per_sec)
+                self._refilled = now
+                if self._tokens < 1.0:
+                    return 429
+                self._tokens -= 1.0
+            roll = self._rng.random()
+            delay = f.latency_ms + (self._rng.uniform(-f.jitter_ms, f.jitter_ms) if f.jitter_ms else 0.0)
+            five = self._rng.choice((500, 502, 503))
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+        if roll < f.rate_403:
+            return 403
+        if roll < f.rate_403 + f.rate_429:
+            return 429
+        if roll < f.rate_403 + f.rate_429 + f.rate_5xx:
+            return five
+        return None
+
+    # --- endpoint bodies: (status, payload) ---
+
+    def login(self, body: dict):
+        if not body.get("email") or not body.get("password"):
+            return 400, {"status": "FAILURE", "message": "email and password required"}
+        return 200, {"status": "SUCCESS", "result": {"accessToken": FAKE_TOKEN, "refreshToken": FAKE_TOKEN}}
+
+    def profile(self):
+        first = next(iter(self.club.players.values()))
+        return 200, {"status": "SUCCESS", "result": first}
+
+    def player(self, player_id: str):
+        if not player_id.isdigit():
+            return 400, {"status": "FAILURE", "message": "Invalid player id"}
+        p = self.club.player(player_id)
+        if p is None:
+            return 404, {"status": "FAILURE", "message": "Player not found"}
+        return 200, {"status": "SUCCESS", "result": p}
+
+    def history(self, player_id: str, offset: int, limit: int):
+        if self.club.player(player_id) is None:
+            return 404, {"status": "FAILURE", "message": "Player not found"}
+        return 200, _paged(self.club.history(player_id), offset, limit)
+
+    def members(self, club_id: str, body: dict):
+        if str(club_id) != str(self.club.club_id):
+            return 404, {"status": "FAILURE", "message": "Club not found"}
+        members = self.club.members
+        if (body.get("sort") or {}).get("parameter") == "JOIN_DATE":
+            members = members[::-1]  # newest member ids joined last
+        return 200, _paged(members, body.get("offset", 0), body.get("limit", 20))
+
+    def search(self, body: dict):
+        return 200, _paged(self.club.search(body.get("query", "")), body.get("offset", 0), body.get("limit", 25))
+
+    def expected_score(self, body: dict):
+        teams = body.get("teams") or []
+        if len(teams) != 2:
+            return 400, {"status": "FAILURE", "message": "two teams required"}
+        avgs = []
+        for team in teams:
+            ratings = []
+            for key in ("player1Id", "player2Id"):
+                p = self.club.player(team.get(key))
+                if p is None:
+                    return 404, {"status": "FAILURE", "message": f"Player {team.get(key)} not found"}
+                ratings.append(float(p["ratings"]["doubles"]) if p["ratings"]["doubles"] != "NR" else 3.5)
+            avgs.append(sum(ratings) / len(ratings))
+        p1 = win_probability(avgs[0], avgs[1])
+        winning = int(body.get("winningScore", 11))
+        scores = (
+            (winning, round(winning * (1 - p1) / p1, 1)) if p1 >= 0.5 else (round(winning * p1 / (1 - p1), 1), winning)
+        )
+        return 200, {"status": "SUCCESS", "teams": [{"score": scores[0]}, {"score": scores[1]}]}
+
+
+_ROUTES = (
+    ("POST", re.compile(r"^/auth/v1\.0/login/?$"), "login"),
+    ("GET", re.compile(r"^/user/v1\.0/profile/?$"), "profile"),
+    ("POST", re.compile(r"^/player/v1\.0/search$"), "search"),
+    ("POST", re.compile(r"^/player/v1\.0/(?P<pid>[^/]+)/history$"), "history"),
+    ("GET", re.compile(r"^/player/v1\.0/(?P<pid>[^/]+)/history$"), "history"),
+    ("GET", re.compile(r"^/player/v1\.0/(?P<pid>[^/]+)$"), "player"),
+    ("POST", re.compile(r"^/club/(?P<club>[^/]+)/members/v1\.0/all$"), "members"),
+    ("POST", re.compile(r"^/match/v1\.0/expected-score$"), "expected_score"),
+    ("GET", re.compile(r"^/__stats$"), "stats"),
+)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # keep load tests quiet
+        pass
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _body(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            data = json.loads(self.rfile.read(length))
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _send(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self, method: str) -> None:
+        fake: FakeDuprServer = self.server.fake
+        parsed = urlparse(self.path)
+        body = self._body() if method == "POST" else {}
+        for route_method, pattern, name in _ROUTES:
+            m = pattern.match(parsed.path) if route_method == method else None
+            if m:
+                break
+        else:
+            fake._count("unknown", 404)
+            return self._send(404, {"status": "FAILURE", "message": f"No route {method} {parsed.path}"})
+
+        if name == "stats":
+            return self._send(200, fake.stats())
+        if name != "login":
+            if self.headers.get("Authorization") != f"Bearer {FAKE_TOKEN}":
+                fake._count(name, 401)
+                return self._send(401, {"status": "FAILURE", "message": "Unauthorized"})
+        injected = fake._injected_status() if name != "login" else None
+        if injected is not None:
+            fake._count(name, injected)
+            return self._send(injected, {"status": "FAILURE", "message": "injected fault"})
+
+        if name == "login":
+            status, payload = fake.login(body)
+        elif name == "profile":
+            status, payload = fake.profile()
+        elif name == "player":
+            status, payload = fake.player(m.group("pid"))
+        elif name == "history":
+            query = parse_qs(parsed.query)
+            offset = body.get("offset", query.get("offset", [0])[0])
+            limit = body.get("limit", query.get("limit", [10])[0])
+            status, payload = fake.history(m.group("pid"), offset, limit)
+        elif name == "members":
+            status, payload = fake.members(m.group("club"), body)
+        elif name == "search":
+            status, payload = fake.search(body)
+        else:
+            status, payload = fake.expected_score(body)
+        fake._count(name, status)
+        self._send(status, payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake DUPR API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--matches", type=int, default=2000)
+    parser.add_argument("--club-id", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-403", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-5xx", type=float, default=0.0)
+    parser.add_argument("--rate-limit-per-min", type=int, default=0)
+    args = parser.parse_args()
+
+    club = SyntheticClub(args.players, args.matches, seed=args.seed, club_id=args.club_id)
+    faults = Faults(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_403=args.rate_403,
+        rate_429=args.rate_429,
+        rate_5xx=args.rate_5xx,
+        rate_limit_per_min=args.rate_limit_per_min,
+    )
+    server = FakeDuprServer(club, faults, host=args.host, port=args.port, seed=args.seed)
+    print(f"fake DUPR API on {server.url}: club {args.club_id}, {args.players} players, {args.matches} matches")
+    print(f"  DUPR_API_URL={server.url} DUPR_TOKEN_FILE=/tmp/fake_dupr_token.json DUPR_CLUB_ID={args.club_id}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+        print(json.dumps(server.stats(), indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+    Fast JSON encoding shared by the backend API and the MCP server.
+
+    Pydantic models (and lists of one model type) go straight to pydantic's
+    compiled serializer. Everything else uses orjson when it is installed
+    and the stdlib json module otherwise; both accept dataclasses, dates and
+    numpy values and produce equivalent compact or 2-space indented output.
+
+    Bulk readers of stored match JSON use decode_match(), which keeps only
+    the fields analytics need (participants, pre-match ratings and impacts,
+    reliability, games, winners) as a compact MatchRow. With msgspec it
+    decodes straight into typed structs and skips every other key; without
+    it the payload is parsed with loads() and read from the dict. Both give
+    the same rows (payloads that do not fit the typed schema take the dict
+    path).
+"""
+import dataclasses
+import json
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is absent
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - exercised when msgspec is absent
+    msgspec = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+DECODE_BACKEND = "msgspec" if msgspec is not None else BACKEND
+
+
+def _default(obj: Any) -> Any:
+    """Fallback for types neither encoder handles natively."""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if isinstance(obj, datetime):
+        return obj.isoformat().replace("+00:00", "Z")
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if hasattr(obj, "tolist"):  # numpy arrays and scalars
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model: type):
+    from pydantic import TypeAdapter
+    return TypeAdapter(List[model])
+
+
+def _dump_models(obj: Any):
+    """Compact JSON via pydantic for a model or a homogeneous model list, else None."""
+    if hasattr(obj, "model_dump_json"):
+        return obj.model_dump_json().encode("utf-8")
+    if isinstance(obj, list) and obj and hasattr(obj[0], "model_dump_json"):
+        model = type(obj[0])
+        if all(type(o) is model for o in obj):
+            return _list_adapter(model).dump_json(obj)
+    return None
+
+
+if orjson is not None:
+    _OPTS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z
+
+    def _encode(obj: Any, indent: bool) -> bytes:
+        opts = _OPTS | orjson.OPT_INDENT_2 if indent else _OPTS
+        return orjson.dumps(obj, default=_default, option=opts)
+
+    def loads(data) -> Any:
+        return orjson.loads(data)
+
+else:
+
+    def _encode(obj: Any, indent: bool) -> bytes:
+        if indent:
+            text = json.dumps(obj, default=_default, ensure_ascii=False, indent=2)
+        else:
+            text = json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":"))
+        return text.encode("utf-8")
+
+    def loads(data) -> Any:
+        return json.loads(data)
+
+
+def dumpb(obj: Any, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes."""
+    if not indent:
+        body = _dump_models(obj)
+        if body is not None:
+            return body
+    return _encode(obj, indent)
+
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    """Serialize to a JSON string."""
+    return dumpb(obj, indent=indent).decode("utf-8")
+
+
+class MatchRow(NamedTuple):
+    """
+    The analytics fields of one doubles match. Per-player tuples are in
+    position order: team 1 player1, player2, then team 2 (as in
+    club_match_player); games and winners are per team.
+    """
+    match_id: Any
+    event_date: Any
+    player_ids: Tuple[Optional[str], ...]  # id, else duprId
+    dupr_ids: Tuple[Optional[str], ...]
+    ratings: Tuple[Optional[float], ...]  # preMatchDoubleRatingPlayerN
+    impacts: Tuple[Optional[float], ...]  # matchDoubleRatingImpactPlayerN
+    reliabilities: Tuple[Optional[float], ...]  # crawler metadata, else the player's ratings
+    games: Tuple[Optional[int], Optional[int]]  # game1..game3 total, None if none reported
+    winners: Tuple[bool, bool]
+
+
+def _games_total(values) -> Optional[int]:
+    values = [g for g in values if isinstance(g, (int, float)) and g >= 0]
+    return int(sum(values)) if values else None
+
+
+def team_games(team: dict) -> Optional[int]:
+    return _games_total(team.get(k) for k in ("game1", "game2", "game3"))
+
+
+def _reliability(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def player_reliability(player: dict) -> Optional[float]:
+    """doublesReliabilityScore from the player's ratings, else the player itself."""
+    if not isinstance(player, dict):
+        return None
+    for ratings in (player.get("ratings"), player):
+        if isinstance(ratings, dict) and ratings.get("doublesReliabilityScore") is not None:
+            return _reliability(ratings["doublesReliabilityScore"])
+    return None
+
+
+def _opt_float(value: Any) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+def _opt_str(value: Any) -> Optional[str]:
+    return str(value) if value is not None else None
+
+
+def _row(match_id, event_date, players, games, winners, rel_meta) -> MatchRow:
+    """MatchRow from per-position (id, duprId, pre rating, impact, embedded reliability)."""
+    rels = []
+    for position, p in enumerate(players, 1):
+        rel = rel_meta.get(f"player{position}")
+        rels.append(float(rel) if rel is not None else p[4])
+    return MatchRow(
+        match_id,
+        event_date,
+        tuple(_opt_str(p[0] or p[1]) for p in players),
+        tuple(_opt_str(p[1]) for p in players),
+        tuple(_opt_float(p[2]) for p in players),
+        tuple(_opt_float(p[3]) for p in players),
+        tuple(rels),
+        games,
+        winners,
+    )
+
+
+def match_row(d: Any) -> Optional[MatchRow]:
+    """MatchRow of a parsed DUPR match record; None unless it is two teams of two."""
+    if not isinstance(d, dict):
+        return None
+    teams = d.get("teams")
+    if not isinstance(teams, list) or len(teams) != 2:
+        return None
+    teams = [t if isinstance(t, dict) else {} for t in teams]
+    players = []
+    for team in teams:
+        pre = team.get("preMatchRatingAndImpact") or {}
+        for n in (1, 2):
+            player = team.get(f"player{n}")
+            if not isinstance(player, dict):
+                return None
+            players.append((
+                player.get("id"),
+                player.get("duprId"),
+                pre.get(f"preMatchDoubleRatingPlayer{n}"),
+                pre.get(f"matchDoubleRatingImpactPlayer{n}"),
+                player_reliability(player),
+            ))
+    return _row(
+        d.get("matchId"),
+        d.get("eventDate"),
+        players,
+        (team_games(teams[0]), team_games(teams[1])),
+        (bool(teams[0].get("winner")), bool(teams[1].get("winner"))),
+        (d.get("_crawl_metadata") or {}).get("reliability") or {},
+    )
+
+
+if msgspec is not None:
+
+    class _Ratings(msgspec.Struct):
+        doublesReliabilityScore: Any = None
+
+    class _Player(msgspec.Struct):
+        id: Any = None
+        duprId: Any = None
+        doublesReliabilityScore: Any = None
+        ratings: Optional[_Ratings] = None
+
+    class _PreMatch(msgspec.Struct):
+        preMatchDoubleRatingPlayer1: Any = None
+        preMatchDoubleRatingPlayer2: Any = None
+        matchDoubleRatingImpactPlayer1: Any = None
+        matchDoubleRatingImpactPlayer2: Any = None
+
+    class _Team(msgspec.Struct):
+        player1: Optional[_Player] = None
+        player2: Optional[_Player] = None
+        preMatchRatingAndImpact: Optional[_PreMatch] = None
+        game1: Any = None
+        game2: Any = None
+        game3: Any = None
+        winner: Any = None
+
+    class _CrawlMetadata(msgspec.Struct):
+        reliability: Optional[Dict[str, Any]] = None
+
+    class _Match(msgspec.Struct):
+        matchId: Any = None
+        eventDate: Any = None
+        teams: Optional[List[_Team]] = None
+        crawl_metadata: Optional[_CrawlMetadata] = msgspec.field(name="_crawl_metadata", default=None)
+
+    _match_decoder = msgspec.json.Decoder(_Match)
+
+    def _struct_reliability(player: "_Player") -> Optional[float]:
+        for value in (player.ratings.doublesReliabilityScore if player.ratings else None,
+                      player.doublesReliabilityScore):
+            if value is not None:
+                return _reliability(value)
+        return None
+
+    def decode_match(data) -> Optional[MatchRow]:
+        """MatchRow of one JSON match payload (str or bytes)."""
+        try:
+            m = _match_decoder.decode(data)
+        except msgspec.ValidationError:
+            return match_row(loads(data))
+        if m.teams is None or len(m.teams) != 2:
+            return None
+        players = []
+        for team in m.teams:
+            pre = team.preMatchRatingAndImpact
+            for n, player in ((1, team.player1), (2, team.player2)):
+                if player is None:
+                    return None
+                players.append((
+                    player.id,
+                    player.duprId,
+                    getattr(pre, f"preMatchDoubleRatingPlayer{n}") if pre else None,
+                    getattr(pre, f"matchDoubleRatingImpactPlayer{n}") if pre else None,
+                    _struct_reliability(player),
+                ))
+        t1, t2 = m.teams
+        meta = m.crawl_metadata
+        return _row(
+            m.matchId,
+            m.eventDate,
+            players,
+            (_games_total((t1.game1, t1.game2, t1.game3)), _games_total((t2.game1, t2.game2, t2.game3))),
+            (bool(t1.winner), bool(t2.winner)),
+            (meta.reliability if meta else None) or {},
+        )
+
+else:
+
+    def decode_match(data) -> Optional[MatchRow]:
+        """MatchRow of one JSON match payload (str or bytes)."""
+        return match_row(loads(data))
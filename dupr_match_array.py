@@ -0,0 +1,137 @@
+"""
+    Fixed-width match array for simulation and fitting workloads.
+
+    scripts/export_match_array.py writes every club match into a .npy file
+    holding one MATCH_DTYPE record per match, oldest first, built from the
+    club_match_player rows (no JSON parsing). open_match_array() maps the
+    file read-only, so any number of worker processes share the same pages
+    through the OS cache instead of each loading and normalizing the DB.
+    Columns are strided views that need no copying, e.g.
+
+        arr = open_match_array("club_matches.npy")
+        predictor.predict_impacts_batch(arr["rating"], arr["games"][:, 0],
+                                        arr["winner"], arr["reliability"])
+
+    MATCH_DTYPE (little-endian, C-aligned, 152 bytes per match):
+
+        match_id     int64       DUPR matchId
+        player       int64[4]    DUPR player ids by position: team 1 player1,
+                                 player2, then team 2; -1 if missing or not numeric
+        rating       float64[4]  pre-match doubles ratings, NaN if unknown
+        impact       float64[4]  DUPR's rating impacts, NaN if unknown
+        reliability  float64[4]  doubles reliability (0-100), NaN if unknown
+        event_day    int32       event date as days since 1970-01-01, -1 if unknown
+        games        int16[2]    games won by team 1, team 2; -1 if not reported
+        winner       int8        winning team, 1 or 2
+
+    Records are sorted by (event_day, match_id), unknown dates last. The
+    layout is checked on open: a file with a different dtype raises
+    ValueError and has to be exported again.
+"""
+import os
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Optional
+
+import numpy as np
+from loguru import logger
+
+MATCH_DTYPE = np.dtype(
+    [
+        ("match_id", "<i8"),
+        ("player", "<i8", (4,)),
+        ("rating", "<f8", (4,)),
+        ("impact", "<f8", (4,)),
+        ("reliability", "<f8", (4,)),
+        ("event_day", "<i4"),
+        ("games", "<i2", (2,)),
+        ("winner", "i1"),
+    ],
+    align=True,
+)
+NO_PLAYER = -1
+NO_DAY = -1
+NO_GAMES = -1
+
+_EPOCH = date(1970, 1, 1)
+
+
+def event_day(event_date: Any) -> int:
+    """Days since 1970-01-01 of an eventDate string ("YYYY-MM-DD..."), NO_DAY if unparsable."""
+    if not event_date:
+        return NO_DAY
+    try:
+        return (date.fromisoformat(str(event_date)[:10]) - _EPOCH).days
+    except ValueError:
+        return NO_DAY
+
+
+@lru_cache(maxsize=4096)  # a club has a few hundred distinct days; datetimes are immutable
+def day_datetime(day: int) -> Optional[datetime]:
+    """Midnight UTC of an event_day, None for NO_DAY."""
+    if day == NO_DAY:
+        return None
+    return datetime(1970, 1, 1, tzinfo=timezone.utc) + timedelta(days=int(day))
+
+
+def _player(value: Any) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return NO_PLAYER
+
+
+def _float(value: Any) -> float:
+    return float(value) if value is not None else np.nan
+
+
+def _games(value: Any) -> int:
+    return int(value) if value is not None else NO_GAMES
+
+
+def build_match_array(bind, club_id: Optional[int] = None) -> np.ndarray:
+    """MATCH_DTYPE records of every club match with club_match_player rows, oldest first."""
+    from dupr_db import ClubMatchRaw, club_match_wide_select
+
+    stmt = club_match_wide_select()
+    if club_id is not None:
+        stmt = stmt.where(ClubMatchRaw.club_id == int(club_id))
+    records = []
+    bad_ids = 0
+    for r in bind.execute(stmt):
+        players = tuple(_player(p) for p in (r.id1, r.id2, r.id3, r.id4))
+        bad_ids += sum(p == NO_PLAYER for p in players)
+        records.append((
+            r.match_id,
+            players,
+            (_float(r.r1), _float(r.r2), _float(r.r3), _float(r.r4)),
+            (_float(r.imp1), _float(r.imp2), _float(r.imp3), _float(r.imp4)),
+            (_float(r.rel1), _float(r.rel2), _float(r.rel3), _float(r.rel4)),
+            event_day(r.event_date),
+            (_games(r.games1), _games(r.games2)),
+            1 if r.team1_won else 2,
+        ))
+    if bad_ids:
+        logger.warning(f"{bad_ids} participants without a numeric player id stored as {NO_PLAYER}")
+    arr = np.array(records, dtype=MATCH_DTYPE)
+    day = arr["event_day"]
+    order = np.lexsort((arr["match_id"], np.where(day == NO_DAY, np.iinfo(np.int32).max, day)))
+    return arr[order]
+
+
+def write_match_array(arr: np.ndarray, path: str) -> None:
+    """Save as .npy, replacing `path` atomically so readers never map a partial file."""
+    if arr.dtype != MATCH_DTYPE:
+        raise ValueError(f"expected MATCH_DTYPE records, got {arr.dtype}")
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, arr)
+    os.replace(tmp, path)
+
+
+def open_match_array(path: str) -> np.ndarray:
+    """Read-only memory map of a match array file."""
+    arr = np.load(path, mmap_mode="r")
+    if arr.dtype != MATCH_DTYPE:
+        raise ValueError(f"{path} has layout {arr.dtype}; re-run scripts/export_match_array.py")
+    return arr
@@ -0,0 +1,191 @@
+"""
+    Request metrics for DuprClient.
+
+    Every HTTP attempt the client makes is recorded per endpoint name (the
+    `name` passed to dupr_get / dupr_post / dupr_put): request count, status
+    code breakdown, retries, bytes received and a latency histogram. Latency
+    uses log-spaced buckets (about 9% wide) for p50/p95/p99 in snapshot(),
+    plus a few fixed buckets for the Prometheus text exposition, so memory
+    stays constant however many requests are recorded.
+
+    Clients share the process-wide CLIENT_METRICS unless given their own,
+    which is what the /metrics endpoints of the API and SSE servers export.
+"""
+import bisect
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Union
+
+# fine buckets: [MIN * R**i, MIN * R**(i+1)) from 0.1 ms to about 2 minutes
+_MIN_SEC = 1e-4
+_R = 2 ** (1 / 8)
+_LOG_R = math.log(_R)
+_N_FINE = int(math.log(120.0 / _MIN_SEC) / _LOG_R) + 2
+
+# le bounds for the Prometheus histogram (seconds)
+PROMETHEUS_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class LatencyHistogram:
+    """Fixed-size latency histogram; quantiles are within one bucket (~9%)."""
+
+    __slots__ = ("count", "sum", "min", "max", "_fine", "_coarse")
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self._fine = [0] * _N_FINE
+        self._coarse = [0] * (len(PROMETHEUS_BUCKETS) + 1)  # last slot is +Inf
+
+    def observe(self, seconds: float) -> None:
+        seconds = max(0.0, float(seconds))
+        self.count += 1
+        self.sum += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        i = 0 if seconds <= _MIN_SEC else int(math.log(seconds / _MIN_SEC) / _LOG_R) + 1
+        self._fine[min(i, _N_FINE - 1)] += 1
+        self._coarse[bisect.bisect_left(PROMETHEUS_BUCKETS, seconds)] += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimated q-quantile in seconds (bucket midpoint, clamped to min/max)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self._fine):
+            seen += n
+            if n and seen >= rank:
+                if i == 0:
+                    return self.min
+                mid = _MIN_SEC * _R ** (i - 0.5)
+                return min(self.max, max(self.min, mid))
+        return self.max
+
+    def cumulative_buckets(self) -> List[tuple]:
+        """[(le, count <= le), ..., ("+Inf", count)] for Prometheus."""
+        out, total = [], 0
+        for le, n in zip(PROMETHEUS_BUCKETS + ("+Inf",), self._coarse):
+            total += n
+            out.append((le, total))
+        return out
+
+
+class EndpointStats:
+    __slots__ = ("requests", "retries", "bytes", "status", "latency")
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.bytes = 0
+        self.status: Dict[str, int] = {}
+        self.latency = LatencyHistogram()
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000.0, 2)
+
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class ClientMetrics:
+    """Thread-safe per-endpoint request metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, EndpointStats] = {}
+        self._since = time.time()
+
+    def record(
+        self,
+        endpoint: str,
+        status: Union[int, str],
+        elapsed_sec: float,
+        nbytes: int = 0,
+        retry: bool = False,
+    ) -> None:
+        """One HTTP attempt; status is the HTTP code or "error" for a transport failure."""
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = EndpointStats()
+            stats.requests += 1
+            stats.retries += 1 if retry else 0
+            stats.bytes += nbytes
+            key = str(status)
+            stats.status[key] = stats.status.get(key, 0) + 1
+            stats.latency.observe(elapsed_sec)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints.clear()
+            self._since = time.time()
+
+    def snapshot(self) -> dict:
+        """
+        {"since", "totals": {...}, "endpoints": {name: {...}}} where each entry
+        has requests, retries, errors (non-2xx or transport), bytes, status
+        counts and latency_ms (mean, p50, p95, p99, max).
+        """
+        with self._lock:
+            endpoints = {}
+            totals = {"requests": 0, "retries": 0, "errors": 0, "bytes": 0}
+            for name, s in sorted(self._endpoints.items()):
+                errors = sum(n for code, n in s.status.items() if not code.startswith("2"))
+                lat = s.latency
+                endpoints[name] = {
+                    "requests": s.requests,
+                    "retries": s.retries,
+                    "errors": errors,
+                    "bytes": s.bytes,
+                    "status": dict(sorted(s.status.items())),
+                    "latency_ms": {
+                        "mean": _ms(lat.sum / lat.count) if lat.count else None,
+                        **{f"p{int(q * 100)}": _ms(lat.quantile(q)) for q in QUANTILES},
+                        "max": _ms(lat.max) if lat.count else None,
+                    },
+                }
+                totals["requests"] += s.requests
+                totals["retries"] += s.retries
+                totals["errors"] += errors
+                totals["bytes"] += s.bytes
+            return {"since": self._since, "totals": totals, "endpoints": endpoints}
+
+    def prometheus_text(self, prefix: str = "dupr_client") -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+
+        def header(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+
+        with self._lock:
+            items = sorted(self._endpoints.items())
+            header("requests_total", "counter", "DUPR API requests by endpoint and HTTP status.")
+            for name, s in items:
+                for code, n in sorted(s.status.items()):
+                    lines.append(f'{prefix}_requests_total{{endpoint="{_label(name)}",status="{_label(code)}"}} {n}')
+            header("retries_total", "counter", "Requests re-sent after a token refresh.")
+            for name, s in items:
+                lines.append(f'{prefix}_retries_total{{endpoint="{_label(name)}"}} {s.retries}')
+            header("response_bytes_total", "counter", "Response body bytes received.")
+            for name, s in items:
+                lines.append(f'{prefix}_response_bytes_total{{endpoint="{_label(name)}"}} {s.bytes}')
+            header("request_duration_seconds", "histogram", "DUPR API request latency.")
+            for name, s in items:
+                ep = _label(name)
+                for le, n in s.latency.cumulative_buckets():
+                    lines.append(f'{prefix}_request_duration_seconds_bucket{{endpoint="{ep}",le="{le}"}} {n}')
+                lines.append(f'{prefix}_request_duration_seconds_sum{{endpoint="{ep}"}} {s.latency.sum:.6f}')
+                lines.append(f'{prefix}_request_duration_seconds_count{{endpoint="{ep}"}} {s.latency.count}')
+        return "\n".join(lines) + "\n"
+
+
+CLIENT_METRICS = ClientMetrics()
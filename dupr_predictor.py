@@ -7,6 +7,8 @@ Uses the fitted model to predict rating changes for matches.
 import json
 from pathlib import Path
 
+import numpy as np
+
 class DuprPredictor:
     def __init__(self, model_file='dupr_model.json'):
         """Load the fitted DUPR model"""
@@ -102,6 +104,55 @@ class DuprPredictor:
                 self.K * result_diff * 0.5 * g4    # Player 4
             )
     
+    def reliability_multiplier_batch(self, reliability):
+        """
+        Vectorized reliability_multiplier over an array of reliabilities.
+        NaN entries are treated like None (average reliability of 50).
+        """
+        rel = np.asarray(reliability, dtype=float)
+        rel = np.where(np.isnan(rel), 50.0, rel)
+        if self.reliability_func == 'linear':
+            return np.clip(2.0 - rel / 100.0, 0.1, 2.0)
+        elif self.reliability_func == 'custom':
+            a = self.reliability_params.get('a', 1.0)
+            b = self.reliability_params.get('b', 100.0)
+            return a / (1.0 + rel / b)
+        return 1.0 / (1.0 + rel / 100.0)
+
+    def expected_games_batch(self, ratings):
+        """
+        Vectorized expected_games for an (N, 4) array of pre-match ratings
+        ordered r1, r2, r3, r4. Returns expected games for team 1, shape (N,).
+        """
+        r = np.asarray(ratings, dtype=float)
+        rating_diff = (r[:, 0] + r[:, 1]) / 2 - (r[:, 2] + r[:, 3]) / 2
+        prob_win = 1 / (1 + 10 ** (-rating_diff * self.scale / 400))
+        return prob_win * 22
+
+    def predict_impacts_batch(self, ratings, games1, winner, reliabilities=None):
+        """
+        Predict impacts for many matches at once.
+
+        Args:
+            ratings: (N, 4) pre-match ratings ordered r1, r2, r3, r4
+            games1: (N,) games scored by team 1
+            winner: (N,) 1 if team 1 won, 2 if team 2 won
+            reliabilities: optional (N, 4) reliabilities, NaN where unknown
+
+        Returns:
+            (N, 4) array of predicted impacts, same as predict_impacts per row
+        """
+        r = np.asarray(ratings, dtype=float)
+        result_diff = np.asarray(games1, dtype=float) - self.expected_games_batch(r)
+        if reliabilities is None:
+            g = self.reliability_multiplier_batch(np.full(r.shape, np.nan))
+        else:
+            g = self.reliability_multiplier_batch(reliabilities)
+        sign = np.where(np.asarray(winner) == 1, 1.0, -1.0)
+        team_sign = np.array([1.0, 1.0, -1.0, -1.0])
+        base = self.K * result_diff * 0.5 * sign
+        return base[:, None] * team_sign[None, :] * g
+
     def predict_match(self, match_data):
         """
         Predict impacts for a match (dict with keys: r1, r2, r3, r4, games1, games2, winner,
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+    Profiling hooks for the CLI and scripts.
+
+    `profiling(path)` runs a block under a sampling profiler: a background
+    thread snapshots every thread's Python stack each `interval` seconds
+    and the counts are written as folded stacks ("a;b;c 12" per line), the
+    input format of flamegraph.pl, speedscope and inferno. Threads idle in
+    a lock / queue / select wait are left out. If `path` ends in .pstats
+    or .prof, cProfile is used instead and the stats file is written.
+
+    `span(name)` marks wall-clock phases (http, json, db_write, predict).
+    Open spans become the root frames of the sampled stacks, so the
+    flamegraph splits by phase, and per-span count / total / max time is
+    printed and saved next to the profile as <path>.spans.json. Spans cost
+    a couple of attribute lookups when no profile is running.
+
+    Scripts take --profile / --profile-out (add_profile_arguments); any
+    other script can be run under the profiler with
+        python dupr_profile.py [-o out.collapsed] scripts/fit_and_save.py [args]
+"""
+import argparse
+import json
+import os
+import runpy
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, List, Optional
+
+DEFAULT_OUTPUT = "profile.collapsed"
+DEFAULT_INTERVAL = 0.005
+
+# (file basename, function) of leaf frames that mean "this thread is idle"
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+_session: Optional["ProfileSession"] = None
+
+
+class span:
+    """
+    Wall-clock phase marker; use as `with span("http"):` or `@span("fit")`.
+    Does nothing unless a profiling session is active.
+    """
+
+    __slots__ = ("name", "_t0", "_session")
+
+    def __init__(self, name: str):
+        self.name = name
+        self._session = None
+
+    def __enter__(self) -> "span":
+        session = _session
+        if session is not None:
+            self._session = session
+            session.push(self.name)
+            self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        session = self._session
+        if session is not None:
+            session.pop(self.name, time.perf_counter() - self._t0)
+            self._session = None
+
+    def __call__(self, fn):
+        name = self.name
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+def _frame_label(code) -> str:
+    path = code.co_filename
+    if "site-packages" + os.sep in path:
+        path = path.split("site-packages" + os.sep, 1)[1]
+    else:
+        try:
+            path = os.path.relpath(path)
+        except ValueError:  # other drive on Windows
+            pass
+        if path.startswith(".."):
+            path = os.path.basename(path)
+    return f"{code.co_name} ({path}:{code.co_firstlineno})".replace(";", ":")
+
+
+class ProfileSession:
+    """One profiling run: span timings plus a sampler or cProfile."""
+
+    def __init__(self, path: str = DEFAULT_OUTPUT, interval: float = DEFAULT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.mode = "cprofile" if path.endswith((".pstats", ".prof")) else "sample"
+        self.samples: Counter = Counter()
+        self.span_stats: Dict[str, List[float]] = {}  # name -> [count, total, max]
+        self._open: Dict[int, List[str]] = {}  # thread id -> open span names
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._cprofile = None
+        self._started = 0.0
+        self.elapsed = 0.0
+
+    # --- spans ---
+
+    def push(self, name: str) -> None:
+        self._open.setdefault(threading.get_ident(), []).append(name)
+
+    def pop(self, name: str, elapsed: float) -> None:
+        stack = self._open.get(threading.get_ident())
+        if stack:
+            stack.pop()
+        with self._lock:
+            stats = self.span_stats.get(name)
+            if stats is None:
+                self.span_stats[name] = [1, elapsed, elapsed]
+            else:
+                stats[0] += 1
+                stats[1] += elapsed
+                stats[2] = max(stats[2], elapsed)
+
+    # --- sampling ---
+
+    def _sample(self) -> None:
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for tid, frame in sys._current_frames().items():
+            if tid == me:
+                continue
+            code = frame.f_code
+            if (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            roots = [names.get(tid, f"thread-{tid}")] + [f"[{s}]" for s in self._open.get(tid, ())]
+            self.samples[";".join(roots + stack)] += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> "ProfileSession":
+        global _session
+        if _session is not None:
+            raise RuntimeError("a profiling session is already running")
+        _session = self
+        self._started = time.perf_counter()
+        if self.mode == "cprofile":
+            import cProfile
+
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        else:
+            self._thread = threading.Thread(target=self._run, name="dupr-profiler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        global _session
+        self.elapsed = time.perf_counter() - self._started
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+        _session = None
+
+    # --- output ---
+
+    def spans(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                name: {"count": int(c), "total_sec": round(t, 6), "max_sec": round(m, 6),
+                       "mean_ms": round(t / c * 1000.0, 3)}
+                for name, (c, t, m) in sorted(self.span_stats.items(), key=lambda kv: -kv[1][1])
+            }
+
+    def write(self) -> None:
+        if self._cprofile is not None:
+            self._cprofile.dump_stats(self.path)
+        else:
+            with open(self.path, "w") as f:
+                for stack, n in sorted(self.samples.items()):
+                    f.write(f"{stack} {n}\n")
+        with open(self.path + ".spans.json", "w") as f:
+            json.dump({"elapsed_sec": round(self.elapsed, 6), "mode": self.mode,
+                       "interval_sec": self.interval, "samples": sum(self.samples.values()),
+                       "spans": self.spans()}, f, indent=2)
+
+    def summary(self) -> str:
+        lines = [f"profile: {self.elapsed:.2f}s wall -> {self.path}"
+                 + (f" ({sum(self.samples.values())} samples)" if self.mode == "sample" else " (cProfile)")]
+        spans = self.spans()
+        if spans:
+            lines.append(f"  {'span':16s} {'count':>8s} {'total s':>9s} {'%wall':>6s} {'mean ms':>9s} {'max ms':>9s}")
+            for name, s in spans.items():
+                pct = 100.0 * s["total_sec"] / self.elapsed if self.elapsed else 0.0
+                lines.append(
+                    f"  {name:16s} {s['count']:>8d} {s['total_sec']:>9.3f} {pct:>5.1f}%"
+                    f" {s['mean_ms']:>9.2f} {s['max_sec'] * 1000:>9.1f}"
+                )
+        return "\n".join(lines)
+
+
+@contextmanager
+def profiling(path: Optional[str] = DEFAULT_OUTPUT, interval: float = DEFAULT_INTERVAL):
+    """Profile the block into `path`; a falsy path runs it unprofiled."""
+    if not path:
+        yield None
+        return
+    session = ProfileSession(path, interval).start()
+    try:
+        yield session
+    finally:
+        session.stop()
+        session.write()
+        print(session.summary(), file=sys.stderr)
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser, default_output: str = DEFAULT_OUTPUT) -> None:
+    group = parser.add_argument_group("profiling")
+    group.add_argument("--profile", action="store_true",
+                       help="sample the run and write folded stacks for a flamegraph")
+    group.add_argument("--profile-out", default=default_output, metavar="PATH",
+                       help=f"profile output (default: {default_output}; .pstats for cProfile)")
+    group.add_argument("--profile-interval", type=float, default=DEFAULT_INTERVAL, metavar="SEC",
+                       help="sampling interval in seconds")
+
+
+def profiling_from_args(args: argparse.Namespace):
+    """profiling() configured by add_profile_arguments options."""
+    return profiling(args.profile_out if args.profile else None, args.profile_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a Python script under the sampling profiler",
+        usage="python dupr_profile.py [-o PATH] [--interval SEC] script.py [args ...]",
+    )
+    parser.add_argument("-o", "--out", default=DEFAULT_OUTPUT, help="output (.pstats for cProfile)")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL)
+    parser.add_argument("script")
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    # span() in the profiled code reads the session of the imported module, not __main__
+    import dupr_profile
+
+    sys.argv = [args.script] + args.args
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+    with dupr_profile.profiling(args.out, args.interval):
+        runpy.run_path(args.script, run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+    Sorted doubles/singles rating index for range, top-N and percentile queries.
+
+    Shared by the MCP server (over the cached club roster) and the backend
+    API (over the local player/rating tables). Ratings are kept in sorted
+    lists per kind, so a range or top-N query is a bisect plus a slice:
+    O(log n + k) instead of parsing and sorting every member per call.
+"""
+import math
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+KINDS = ("doubles", "singles")
+
+
+def member_rating(member: dict, kind: str = "doubles") -> Optional[float]:
+    """Numeric rating from a club member / player dict, None when unrated (NR)."""
+    for ratings in (member.get("ratings"), member.get("rating")):
+        if not isinstance(ratings, dict):
+            continue
+        # Try common key variants (API may use different casing or naming)
+        keys = (
+            ["doubles", "Doubles", "DOUBLES", "doublesRating", "doubles_rating"]
+            if kind == "doubles"
+            else ["singles", "Singles", "SINGLES", "singlesRating", "singles_rating"]
+        )
+        for key in keys:
+            value = _to_rating(ratings.get(key))
+            if value is not None:
+                return value
+    # Top-level fallback (some APIs put rating at member root)
+    return _to_rating(member.get(kind))
+
+
+def _to_rating(value) -> Optional[float]:
+    if value is None:
+        return None
+    s = str(value).strip()
+    if not s or s.upper() == "NR":
+        return None
+    try:
+        return float(s)
+    except ValueError:
+        return None
+
+
+class RatingIndex:
+    """
+    Items keyed by a hashable id, ordered by rating per kind.
+
+    Each kind keeps two parallel lists sorted by rating (ratings, keys) that
+    are updated in place by `upsert` / `remove`. Unrated items are tracked
+    separately so listings can put them last.
+    """
+
+    def __init__(self) -> None:
+        self._items: Dict[Hashable, Any] = {}
+        self._ratings: Dict[Hashable, Dict[str, Optional[float]]] = {}
+        self._sorted: Dict[str, Tuple[List[float], List[Hashable]]] = {k: ([], []) for k in KINDS}
+        self._order: Dict[Hashable, int] = {}  # insertion order, for unrated listings
+        self._seq = 0
+
+    @classmethod
+    def from_members(
+        cls,
+        members: Iterable[dict],
+        key: Callable[[dict], Hashable] = lambda m: m.get("id") or m.get("duprId"),
+    ) -> "RatingIndex":
+        """Index club member dicts (as returned by get_members_by_club / get_player)."""
+        index = cls()
+        for m in members:
+            k = key(m)
+            if k is None:
+                k = ("anon", id(m))
+            index.upsert(k, m, member_rating(m, "doubles"), member_rating(m, "singles"))
+        return index
+
+    @classmethod
+    def from_players(cls, players: Iterable[Any]) -> "RatingIndex":
+        """Index dupr_db.Player rows (rating relationship loaded)."""
+        index = cls()
+        for p in players:
+            r = p.rating
+            index.upsert(p.id, p, r.doubles if r else None, r.singles if r else None)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def upsert(
+        self, key: Hashable, item: Any, doubles: Optional[float] = None, singles: Optional[float] = None
+    ) -> None:
+        if key in self._items:
+            self._unlink(key)
+        else:
+            self._order[key] = self._seq
+            self._seq += 1
+        self._items[key] = item
+        values = {"doubles": doubles, "singles": singles}
+        self._ratings[key] = values
+        for kind, value in values.items():
+            if value is None:
+                continue
+            ratings, keys = self._sorted[kind]
+            # ties go before earlier items, so descending listings keep insertion order
+            pos = bisect_left(ratings, value)
+            ratings.insert(pos, value)
+            keys.insert(pos, key)
+
+    def remove(self, key: Hashable) -> bool:
+        if key not in self._items:
+            return False
+        self._unlink(key)
+        del self._items[key], self._ratings[key], self._order[key]
+        return True
+
+    def _unlink(self, key: Hashable) -> None:
+        for kind, value in self._ratings[key].items():
+            if value is None:
+                continue
+            ratings, keys = self._sorted[kind]
+            lo = bisect_left(ratings, value)
+            hi = bisect_right(ratings, value)
+            pos = keys.index(key, lo, hi)
+            del ratings[pos], keys[pos]
+
+    def rating(self, key: Hashable, kind: str = "doubles") -> Optional[float]:
+        values = self._ratings.get(key)
+        return values[kind] if values else None
+
+    def count(self, kind: str = "doubles") -> int:
+        """Number of items with a rating of this kind."""
+        return len(self._sorted[kind][0])
+
+    def range(
+        self,
+        kind: str = "doubles",
+        lo: Optional[float] = None,
+        hi: Optional[float] = None,
+        descending: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[Any]:
+        """Items with lo <= rating <= hi (either bound optional)."""
+        ratings, keys = self._sorted[kind]
+        start = 0 if lo is None else bisect_left(ratings, lo)
+        stop = len(ratings) if hi is None else bisect_right(ratings, hi)
+        if descending:
+            if limit is not None:
+                start = max(start, stop - limit)
+            picked = keys[start:stop][::-1]
+        else:
+            if limit is not None:
+                stop = min(stop, start + limit)
+            picked = keys[start:stop]
+        return [self._items[k] for k in picked]
+
+    def top(self, n: int, kind: str = "doubles") -> List[Any]:
+        """The n highest rated items, best first."""
+        return self.range(kind, descending=True, limit=n)
+
+    def unrated(self, kind: str = "doubles") -> List[Any]:
+        """Items without a rating of this kind, in insertion order."""
+        keys = [k for k, v in self._ratings.items() if v[kind] is None]
+        keys.sort(key=self._order.__getitem__)
+        return [self._items[k] for k in keys]
+
+    def sorted_items(self, kind: str = "doubles", descending: bool = True) -> List[Any]:
+        """Every item by rating, unrated last."""
+        return self.range(kind, descending=descending) + self.unrated(kind)
+
+    def percentile(self, rating: float, kind: str = "doubles") -> Optional[float]:
+        """Percent (0-100) of rated items strictly below `rating`."""
+        ratings = self._sorted[kind][0]
+        if not ratings:
+            return None
+        return 100.0 * bisect_left(ratings, rating) / len(ratings)
+
+    def rating_at_percentile(self, pct: float, kind: str = "doubles") -> Optional[float]:
+        """Lowest rating at or above the given percentile (nearest rank)."""
+        ratings = self._sorted[kind][0]
+        if not ratings:
+            return None
+        pos = min(len(ratings) - 1, max(0, math.ceil(pct / 100.0 * len(ratings)) - 1))
+        return ratings[pos]
@@ -0,0 +1,279 @@
+"""
+    Compressed storage for club_match_raw payloads.
+
+    Match JSON repeats the same keys and player objects in every row, so it
+    compresses well, and far better with a dictionary trained on sample
+    rows: each row is a few hundred bytes instead of a few KB. A row is
+    stored as raw_codec + raw_data (raw_json left "") where raw_codec is
+
+        "zlib"             zlib, no dictionary
+        "zlib:<dict_id>"   zlib with a preset dictionary (up to 32 KB)
+        "zstd:<dict_id>"   zstd with a trained dictionary (needs zstandard)
+
+    and dict_id is a content hash of a raw_json_dict row, so cached
+    dictionaries are safe to share between databases. Rows with no codec
+    are plain JSON in raw_json, so old and new rows mix freely.
+
+    Writers call encode_raw(); the codec comes from DUPRLY_RAW_CODEC:
+    "auto" (default) follows the newest dictionary in the database, i.e.
+    stays plain until scripts/compress_club_match_raw.py has been run (and
+    again after it is run with --codec none, which leaves a codec "none"
+    marker as the newest row); writers re-read it every ACTIVE_TTL_SEC;
+    "none", "zlib" or "zstd" force one. Readers select RAW_COLUMNS and call
+    load_raw(), or ClubMatchRaw.payload() on ORM rows. Whole-table scans use
+    map_raw(), which decompresses and reduces rows (e.g. with
+    dupr_json.decode_match) in a process pool once the table is large.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from dupr_db import ClubMatchRaw, RawJsonDict
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - exercised when zstandard is absent
+    zstandard = None
+
+CODECS = ("none", "zlib", "zstd")
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 9
+ZLIB_DICT_SIZE = 32 * 1024  # zlib only looks back 32 KB
+ZSTD_DICT_SIZE = 64 * 1024
+POOL_MIN_ROWS = 20000  # below this, process start-up costs more than it saves
+MAP_BATCH = 2000
+ACTIVE_TTL_SEC = 10.0  # how long writers trust the cached newest dictionary
+
+RAW_COLUMNS = (ClubMatchRaw.raw_json, ClubMatchRaw.raw_codec, ClubMatchRaw.raw_data)
+
+_dicts: Dict[str, bytes] = {}  # dict_id -> dictionary bytes
+_active: Dict[str, Tuple[float, Optional[Tuple[str, str]]]] = {}  # db url -> (read at, (codec, dict_id)) for "auto"
+_local = threading.local()  # zstd (de)compressor objects are not thread-safe
+_lock = threading.Lock()
+
+
+def default_codec() -> str:
+    return os.getenv("DUPRLY_RAW_CODEC", "auto").lower()
+
+
+def _url(bind) -> str:
+    if hasattr(bind, "get_bind"):  # Session
+        bind = bind.get_bind()
+    return str(getattr(bind, "engine", bind).url)
+
+
+def _dictionary(bind, dict_id: str) -> bytes:
+    d = _dicts.get(dict_id)
+    if d is None:
+        d = bind.execute(select(RawJsonDict.data).where(RawJsonDict.dict_id == dict_id)).scalar()
+        if d is None:
+            raise LookupError(f"raw_json_dict {dict_id} is missing")
+        _dicts[dict_id] = d
+    return d
+
+
+def _zstd_objects(dict_id: str, data: bytes):
+    cache = getattr(_local, "zstd", None)
+    if cache is None:
+        cache = _local.zstd = {}
+    pair = cache.get(dict_id)
+    if pair is None:
+        zd = zstandard.ZstdCompressionDict(data)
+        pair = cache[dict_id] = (
+            zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=zd),
+            zstandard.ZstdDecompressor(dict_data=zd),
+        )
+    return pair
+
+
+def compress(text: str, codec: str, dict_id: Optional[str] = None, dictionary: Optional[bytes] = None) -> bytes:
+    raw = text.encode("utf-8")
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd storage needs the zstandard package")
+        return _zstd_objects(dict_id, dictionary)[0].compress(raw)
+    if dictionary is not None:
+        c = zlib.compressobj(ZLIB_LEVEL, zdict=dictionary)
+        return c.compress(raw) + c.flush()
+    return zlib.compress(raw, ZLIB_LEVEL)
+
+
+def decode_raw(bind, raw_json: Optional[str], raw_codec: Optional[str], raw_data: Optional[bytes]) -> str:
+    """The stored JSON text of one row."""
+    if not raw_codec:
+        return raw_json
+    codec, _, dict_id = raw_codec.partition(":")
+    if codec == "zlib":
+        if not dict_id:
+            return zlib.decompress(raw_data).decode("utf-8")
+        d = zlib.decompressobj(zdict=_dictionary(bind, dict_id))
+        return (d.decompress(raw_data) + d.flush()).decode("utf-8")
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("reading zstd rows needs the zstandard package")
+        return _zstd_objects(dict_id, _dictionary(bind, dict_id))[1].decompress(raw_data).decode("utf-8")
+    raise ValueError(f"unknown raw_codec {raw_codec!r}")
+
+
+def load_raw(bind, raw_json: Optional[str], raw_codec: Optional[str], raw_data: Optional[bytes]) -> dict:
+    """The match JSON of one row; `bind` (session or connection) loads dictionaries."""
+    return json.loads(decode_raw(bind, raw_json, raw_codec, raw_data))
+
+
+def _active_dict(bind) -> Optional[Tuple[str, str]]:
+    url = _url(bind)
+    now = time.monotonic()
+    cached = _active.get(url)
+    if cached is None or now - cached[0] > ACTIVE_TTL_SEC:
+        row = bind.execute(
+            select(RawJsonDict.codec, RawJsonDict.dict_id).order_by(RawJsonDict.created_at.desc()).limit(1)
+        ).first()
+        cached = (now, tuple(row) if row else None)
+        with _lock:
+            _active[url] = cached
+    return cached[1]
+
+
+def _forget_active(bind) -> None:
+    with _lock:
+        _active.pop(_url(bind), None)
+
+
+def encode_raw(bind, text: str, codec: Optional[str] = None) -> dict:
+    """
+    raw_json / raw_codec / raw_data values for a new club_match_raw row,
+    e.g. ClubMatchRaw(match_id=..., **encode_raw(sess, json.dumps(m))).
+    """
+    codec = requested = codec or default_codec()
+    dict_id = None
+    if codec in ("auto", "zstd"):
+        active = _active_dict(bind)
+        if active is not None and (codec == "auto" or active[0] == "zstd"):
+            codec, dict_id = active
+        elif codec == "auto":
+            codec = "none"
+        else:
+            raise RuntimeError("no zstd dictionary in this database; run scripts/compress_club_match_raw.py")
+    if codec == "none":
+        return {"raw_json": text, "raw_codec": None, "raw_data": None}
+    if codec == "zstd" and zstandard is None:
+        # the DB was compressed elsewhere with zstd; store zlib rather than fail the crawl
+        codec, dict_id = "zlib", None
+    try:
+        dictionary = _dictionary(bind, dict_id) if dict_id else None
+    except LookupError:
+        if requested not in ("auto", "zstd"):
+            raise
+        # the dictionary was dropped since we cached it; look again
+        _forget_active(bind)
+        return encode_raw(bind, text, requested)
+    data = compress(text, codec, dict_id, dictionary)
+    return {"raw_json": "", "raw_codec": f"{codec}:{dict_id}" if dict_id else codec, "raw_data": data}
+
+
+def train_dictionary(samples: List[bytes], codec: str) -> bytes:
+    """
+    Dictionary bytes from sample payloads. zstd uses its trainer; for zlib
+    the samples themselves are the dictionary (zlib matches against the
+    preset bytes, and whole sample rows carry every repeated key and value).
+    """
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd dictionaries need the zstandard package")
+        return zstandard.train_dictionary(ZSTD_DICT_SIZE, samples, level=ZSTD_LEVEL).as_bytes()
+    out = bytearray()
+    for s in samples:
+        if len(out) + len(s) > ZLIB_DICT_SIZE:
+            break
+        out += s
+    return bytes(out)
+
+
+def save_dictionary(sess, codec: str, data: bytes) -> str:
+    """Store a dictionary (if new) and make it the one "auto" writers use; returns its dict_id."""
+    dict_id = hashlib.sha1(data).hexdigest()[:16]
+    row = sess.get(RawJsonDict, dict_id)
+    if row is None:
+        sess.add(RawJsonDict(dict_id=dict_id, codec=codec, data=data))
+    else:
+        row.created_at = datetime.utcnow()
+    _dicts[dict_id] = data
+    _forget_active(sess)
+    return dict_id
+
+
+def sample_payloads(bind, n: int = 2000) -> List[bytes]:
+    """Up to n payloads spread evenly over the table, as UTF-8 JSON."""
+    total = bind.execute(select(ClubMatchRaw.id).order_by(ClubMatchRaw.id.desc()).limit(1)).scalar() or 0
+    step = max(1, total // n)
+    rows = bind.execute(
+        select(*RAW_COLUMNS).where(ClubMatchRaw.id % step == 0).limit(n)
+    ).all()
+    return [decode_raw(bind, *r).encode("utf-8") for r in rows]
+
+
+def _init_worker(dicts: Dict[str, bytes]) -> None:
+    # workers have no connection; every dictionary is loaded up front
+    _dicts.update(dicts)
+
+
+def _map_rows(fn: Callable[[str], Any], rows: List[tuple], bind=None) -> List[Any]:
+    out = []
+    for raw in rows:
+        try:
+            out.append(fn(decode_raw(bind, *raw)))
+        except (TypeError, ValueError):
+            out.append(None)
+    return out
+
+
+def map_raw(bind, fn: Callable[[str], Any], where=None, workers: Optional[int] = None,
+            batch: int = MAP_BATCH) -> Iterator[Any]:
+    """
+    fn(JSON text) for every club_match_raw row (matching `where`), in id
+    order; None for rows that do not decode. fn should reduce the payload
+    to something small, since with workers > 1 it runs in a process pool
+    and its results are pickled back. workers=None uses one process per CPU
+    when the table has POOL_MIN_ROWS rows or more, else runs in-process.
+    """
+    conditions = [where] if where is not None else []
+    if workers is None:
+        rows = bind.execute(select(func.count()).select_from(ClubMatchRaw).where(*conditions)).scalar()
+        workers = (os.cpu_count() or 1) if rows >= POOL_MIN_ROWS else 1
+
+    def batches():
+        last_id = 0
+        while True:
+            page = bind.execute(
+                select(ClubMatchRaw.id, *RAW_COLUMNS)
+                .where(ClubMatchRaw.id > last_id, *conditions)
+                .order_by(ClubMatchRaw.id)
+                .limit(batch)
+            ).all()
+            if not page:
+                return
+            last_id = page[-1][0]
+            yield [tuple(r[1:]) for r in page]
+
+    if workers <= 1:
+        for page in batches():
+            yield from _map_rows(fn, page, bind)
+        return
+
+    dicts = dict(bind.execute(select(RawJsonDict.dict_id, RawJsonDict.data)).all())
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(dicts,)) as pool:
+        pending = []
+        for page in batches():
+            pending.append(pool.submit(_map_rows, fn, page))
+            if len(pending) > 2 * workers:  # bound the pages held in memory
+                yield from pending.pop(0).result()
+        for future in pending:
+            yield from future.result()
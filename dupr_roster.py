@@ -0,0 +1,157 @@
+"""
+    In-memory club roster with ratings, kept warm in the background.
+
+    Paging a club and enriching every member with get_player takes minutes
+    for large clubs, so the MCP server keeps one enriched snapshot per club
+    and answers roster questions (sort by rating, rating ranges) from it.
+    Stale snapshots are still served while a refresh runs in the background.
+"""
+import os
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from loguru import logger
+
+from dupr_client import DuprClient
+from dupr_rating_index import RatingIndex
+
+ROSTER_TTL_SEC = int(os.getenv("ROSTER_TTL_SEC", "900"))
+ROSTER_REFRESH_SEC = int(os.getenv("ROSTER_REFRESH_SEC", "600"))
+ROSTER_ENRICH_WORKERS = 10
+# members whose stored ratings are newer than this are not refetched
+ROSTER_RATING_MAX_AGE_SEC = int(os.getenv("ROSTER_RATING_MAX_AGE_SEC", "3600"))
+
+
+class RosterFetchError(RuntimeError):
+    def __init__(self, status: int):
+        super().__init__(f"Failed to get club members (status: {status})")
+        self.status = status
+
+
+class RosterSnapshot(NamedTuple):
+    club_id: str
+    members: List[dict]
+    fetched_at: float  # time.time()
+    index: RatingIndex  # members by doubles/singles rating
+
+    @property
+    def age_sec(self) -> float:
+        return max(0.0, time.time() - self.fetched_at)
+
+
+def format_age(seconds: float) -> str:
+    if seconds < 90:
+        return f"{int(seconds)}s"
+    if seconds < 5400:
+        return f"{int(seconds // 60)} min"
+    return f"{seconds / 3600:.1f} h"
+
+
+class RosterCache:
+    """
+    Enriched roster snapshots keyed by club id.
+
+    `get` returns a fresh snapshot from memory, a stale one while kicking off
+    a background refresh, or blocks for the first load of a club. `start`
+    runs a daemon thread that re-fetches the given club every `interval_sec`
+    so callers normally never wait. With a `rating_store`, a refresh only
+    calls get_player for members not enriched in the last
+    `rating_max_age_sec`.
+    """
+
+    def __init__(
+        self,
+        client: DuprClient,
+        ttl_sec: int = ROSTER_TTL_SEC,
+        auth: Optional[Callable[[], None]] = None,
+        enrich_workers: int = ROSTER_ENRICH_WORKERS,
+        rating_store=None,
+        rating_max_age_sec: float = ROSTER_RATING_MAX_AGE_SEC,
+    ):
+        self.client = client
+        self.ttl_sec = ttl_sec
+        self.auth = auth
+        self.enrich_workers = enrich_workers
+        self.rating_store = rating_store
+        self.rating_max_age_sec = rating_max_age_sec
+        self._snapshots: Dict[str, RosterSnapshot] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _lock_for(self, club_id: str) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(club_id, threading.Lock())
+
+    def peek(self, club_id: str) -> Optional[RosterSnapshot]:
+        return self._snapshots.get(str(club_id))
+
+    def get(self, club_id: str, force: bool = False) -> RosterSnapshot:
+        club_id = str(club_id)
+        snap = self._snapshots.get(club_id)
+        if force:
+            return self.refresh(club_id, rating_max_age_sec=0)
+        if snap is None:
+            return self.refresh(club_id)
+        if snap.age_sec > self.ttl_sec:
+            self.refresh_async(club_id)
+        return snap
+
+    def refresh(self, club_id: str, rating_max_age_sec: Optional[float] = None) -> RosterSnapshot:
+        """Fetch and enrich the whole roster; concurrent callers share one fetch."""
+        club_id = str(club_id)
+        if rating_max_age_sec is None:
+            rating_max_age_sec = self.rating_max_age_sec
+        lock = self._lock_for(club_id)
+        started = time.time()
+        with lock:
+            snap = self._snapshots.get(club_id)
+            if snap is not None and snap.fetched_at >= started:
+                return snap  # another thread refreshed while we waited
+            if self.auth is not None:
+                self.auth()
+            rc, members = self.client.get_members_by_club(club_id)
+            if rc != 200:
+                raise RosterFetchError(rc)
+            members = self.client.enrich_members_with_ratings(
+                members,
+                limit=len(members),
+                max_workers=self.enrich_workers,
+                store=self.rating_store,
+                max_age_sec=rating_max_age_sec,
+            )
+            snap = RosterSnapshot(club_id, members, time.time(), RatingIndex.from_members(members))
+            self._snapshots[club_id] = snap
+            logger.info(f"roster {club_id}: {len(members)} members in {snap.fetched_at - started:.1f}s")
+            return snap
+
+    def refresh_async(self, club_id: str) -> None:
+        if self._lock_for(str(club_id)).locked():
+            return
+        threading.Thread(target=self._refresh_quietly, args=(club_id,), daemon=True).start()
+
+    def _refresh_quietly(self, club_id: str) -> None:
+        try:
+            self.refresh(club_id)
+        except Exception:
+            logger.exception(f"roster refresh for club {club_id} failed")
+
+    def start(self, club_id: str, interval_sec: int = ROSTER_REFRESH_SEC) -> None:
+        """Keep `club_id` warm: load now, then refresh every interval_sec."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            while True:
+                self._refresh_quietly(club_id)
+                if self._stop.wait(interval_sec):
+                    return
+
+        self._thread = threading.Thread(target=loop, name="roster-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
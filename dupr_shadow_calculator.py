@@ -10,7 +10,9 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
 
 from dupr_predictor import DuprPredictor
 
@@ -181,27 +183,100 @@ def _extract_date(match: Dict[str, Any]) -> Optional[datetime]:
     return None
 
 
-def normalize_match_for_player(
-    match: Dict[str, Any], player_id: str, idx: int
-) -> Optional[NormalizedMatch]:
+class _IndexedMatch:
+    """Player-independent view of one raw match, parsed once."""
+
+    __slots__ = (
+        "match_id",
+        "event_date",
+        "player_ids",
+        "ratings",
+        "reliabilities",
+        "games1",
+        "games2",
+        "winner",
+    )
+
+    def __init__(
+        self,
+        match_id: str,
+        event_date: Optional[datetime],
+        player_ids: Tuple[Optional[str], Optional[str], Optional[str], Optional[str]],
+        ratings: Tuple[float, float, float, float],
+        reliabilities: Tuple[Optional[float], Optional[float], Optional[float], Optional[float]],
+        games1: int,
+        games2: int,
+        winner: int,
+    ) -> None:
+        self.match_id = match_id
+        self.event_date = event_date
+        self.player_ids = player_ids
+        self.ratings = ratings
+        self.reliabilities = reliabilities
+        self.games1 = games1
+        self.games2 = games2
+        self.winner = winner
+
+    def slot_of(self, player_id: str) -> Optional[int]:
+        for idx, pid in enumerate(self.player_ids):
+            if pid is not None and pid == player_id:
+                return idx + 1
+        return None
+
+    def for_slot(self, slot: int) -> NormalizedMatch:
+        ids = self.player_ids
+        if slot in (1, 2):
+            partner_id = ids[1] if slot == 1 else ids[0]
+            opponent_ids = (ids[2], ids[3])
+        else:
+            partner_id = ids[3] if slot == 3 else ids[2]
+            opponent_ids = (ids[0], ids[1])
+        r1, r2, r3, r4 = self.ratings
+        rel1, rel2, rel3, rel4 = self.reliabilities
+        return NormalizedMatch(
+            match_id=self.match_id,
+            event_date=self.event_date,
+            r1=r1,
+            r2=r2,
+            r3=r3,
+            r4=r4,
+            games1=self.games1,
+            games2=self.games2,
+            winner=self.winner,
+            rel1=rel1,
+            rel2=rel2,
+            rel3=rel3,
+            rel4=rel4,
+            slot=slot,
+            target_pre_rating=self.ratings[slot - 1],
+            target_reliability=self.reliabilities[slot - 1],
+            partner_id=partner_id,
+            opponent_ids=opponent_ids,
+        )
+
+
+def _match_players(match: Dict[str, Any]) -> Optional[Tuple[Any, ...]]:
+    """Return (team0, team1, players, player_ids) or None for non-doubles shapes."""
     teams = match.get("teams")
     if not isinstance(teams, list) or len(teams) != 2:
         return None
     team0 = teams[0] if isinstance(teams[0], dict) else {}
     team1 = teams[1] if isinstance(teams[1], dict) else {}
-
     t0p1, t0p2 = _extract_team_players(team0)
     t1p1, t1p2 = _extract_team_players(team1)
+    players = (t0p1, t0p2, t1p1, t1p2)
+    ids = tuple(_extract_player_id(p) for p in players)
+    return team0, team1, players, ids
 
-    t0p1_id = _extract_player_id(t0p1)
-    t0p2_id = _extract_player_id(t0p2)
-    t1p1_id = _extract_player_id(t1p1)
-    t1p2_id = _extract_player_id(t1p2)
-    all_ids = [t0p1_id, t0p2_id, t1p1_id, t1p2_id]
 
-    player_id_str = str(player_id)
-    if player_id_str not in [pid for pid in all_ids if pid is not None]:
+def _index_match(
+    match: Dict[str, Any], idx: int, parsed: Optional[Tuple[Any, ...]] = None
+) -> Optional[_IndexedMatch]:
+    if parsed is None:
+        parsed = _match_players(match)
+    if parsed is None:
         return None
+    team0, team1, (t0p1, t0p2, t1p1, t1p2), ids = parsed
 
     pre0 = team0.get("preMatchRatingAndImpact") if isinstance(team0.get("preMatchRatingAndImpact"), dict) else {}
     pre1 = team1.get("preMatchRatingAndImpact") if isinstance(team1.get("preMatchRatingAndImpact"), dict) else {}
@@ -213,62 +288,47 @@ def normalize_match_for_player(
     if None in (r1, r2, r3, r4):
         return None
 
-    rel1 = _extract_player_reliability(t0p1)
-    rel2 = _extract_player_reliability(t0p2)
-    rel3 = _extract_player_reliability(t1p1)
-    rel4 = _extract_player_reliability(t1p2)
-
-    g1 = _games_from_team(team0)
-    g2 = _games_from_team(team1)
-    winner = 1 if bool(team0.get("winner")) else 2
-
-    if t0p1_id == player_id_str:
-        slot = 1
-        partner_id = t0p2_id
-        opponent_ids = (t1p1_id, t1p2_id)
-        target_pre = r1
-        target_rel = rel1
-    elif t0p2_id == player_id_str:
-        slot = 2
-        partner_id = t0p1_id
-        opponent_ids = (t1p1_id, t1p2_id)
-        target_pre = r2
-        target_rel = rel2
-    elif t1p1_id == player_id_str:
-        slot = 3
-        partner_id = t1p2_id
-        opponent_ids = (t0p1_id, t0p2_id)
-        target_pre = r3
-        target_rel = rel3
-    else:
-        slot = 4
-        partner_id = t1p1_id
-        opponent_ids = (t0p1_id, t0p2_id)
-        target_pre = r4
-        target_rel = rel4
-
-    return NormalizedMatch(
+    return _IndexedMatch(
         match_id=_extract_match_id(match, idx),
         event_date=_extract_date(match),
-        r1=float(r1),
-        r2=float(r2),
-        r3=float(r3),
-        r4=float(r4),
-        games1=g1,
-        games2=g2,
-        winner=winner,
-        rel1=rel1,
-        rel2=rel2,
-        rel3=rel3,
-        rel4=rel4,
-        slot=slot,
-        target_pre_rating=float(target_pre),
-        target_reliability=target_rel,
-        partner_id=partner_id,
-        opponent_ids=opponent_ids,
+        player_ids=ids,
+        ratings=(float(r1), float(r2), float(r3), float(r4)),
+        reliabilities=(
+            _extract_player_reliability(t0p1),
+            _extract_player_reliability(t0p2),
+            _extract_player_reliability(t1p1),
+            _extract_player_reliability(t1p2),
+        ),
+        games1=_games_from_team(team0),
+        games2=_games_from_team(team1),
+        winner=1 if bool(team0.get("winner")) else 2,
+    )
+
+
+def _chronological_key(m: Any) -> Tuple[bool, datetime, str]:
+    return (
+        m.event_date is None,
+        m.event_date or datetime.max.replace(tzinfo=timezone.utc),
+        m.match_id,
     )
 
 
+def normalize_match_for_player(
+    match: Dict[str, Any], player_id: str, idx: int
+) -> Optional[NormalizedMatch]:
+    parsed = _match_players(match)
+    if parsed is None:
+        return None
+    player_id_str = str(player_id)
+    if player_id_str not in [pid for pid in parsed[3] if pid is not None]:
+        return None
+
+    indexed = _index_match(match, idx, parsed)
+    if indexed is None:
+        return None
+    return indexed.for_slot(indexed.slot_of(player_id_str))
+
+
 def normalize_matches_for_player(
     matches: Sequence[Dict[str, Any]], player_id: str
 ) -> List[NormalizedMatch]:
@@ -280,16 +340,222 @@ def normalize_matches_for_player(
         if nm is not None:
             normalized.append(nm)
 
-    normalized.sort(
-        key=lambda m: (
-            m.event_date is None,
-            m.event_date or datetime.max.replace(tzinfo=timezone.utc),
-            m.match_id,
-        )
-    )
+    normalized.sort(key=_chronological_key)
     return normalized
 
 
+class MatchIndex:
+    """
+    One-time normalization of raw match JSON, indexed by player id.
+
+    Each raw match is parsed once into a compact slotted record; per-player
+    lookups then skip all key probing and date parsing. Records are kept in
+    chronological order so per-player lists never need re-sorting.
+    """
+
+    __slots__ = ("_records", "_by_player")
+
+    def __init__(self, raw_matches: Iterable[Any]) -> None:
+        records: List[_IndexedMatch] = []
+        for idx, match in enumerate(raw_matches):
+            if not isinstance(match, dict):
+                continue
+            record = _index_match(match, idx)
+            if record is not None:
+                records.append(record)
+        records.sort(key=_chronological_key)
+
+        by_player: Dict[str, List[int]] = {}
+        for pos, record in enumerate(records):
+            seen = set()
+            for pid in record.player_ids:
+                if pid is None or pid in seen:
+                    continue
+                seen.add(pid)
+                by_player.setdefault(pid, []).append(pos)
+
+        self._records = records
+        self._by_player = by_player
+
+    @classmethod
+    def from_club_match_raw(cls, engine: Any, club_id: Optional[int] = None) -> "MatchIndex":
+        """Build an index from every stored `club_match_raw` row (optionally one club)."""
+        from sqlalchemy import select
+
+        from dupr_db import ClubMatchRaw
+        from dupr_raw_codec import RAW_COLUMNS, load_raw
+
+        stmt = select(*RAW_COLUMNS).order_by(ClubMatchRaw.id)
+        if club_id is not None:
+            stmt = stmt.where(ClubMatchRaw.club_id == int(club_id))
+
+        def _rows() -> Iterable[Any]:
+            with engine.connect() as conn:
+                for row in conn.execute(stmt):
+                    try:
+                        yield load_raw(conn, *row)
+                    except (TypeError, ValueError):
+                        yield None
+
+        return cls(_rows())
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, player_id: object) -> bool:
+        return str(player_id) in self._by_player
+
+    def player_ids(self) -> List[str]:
+        return list(self._by_player)
+
+    def match_count(self, player_id: str) -> int:
+        return len(self._by_player.get(str(player_id), ()))
+
+    def matches_for_player(self, player_id: str, last: Optional[int] = None) -> List[NormalizedMatch]:
+        """The player's matches, oldest first; only the most recent `last` if given."""
+        player_id_str = str(player_id)
+        out: List[NormalizedMatch] = []
+        positions = self._by_player.get(player_id_str, ())
+        for pos in positions[-last:] if last else positions:
+            record = self._records[pos]
+            out.append(record.for_slot(record.slot_of(player_id_str)))
+        return out
+
+
+class MatchArrayIndex:
+    """
+    MatchIndex over a MATCH_DTYPE match array (see dupr_match_array),
+    usually memory-mapped from a file shared by several processes. Only the
+    player -> rows lookup lives in process memory; NormalizedMatch records
+    are built for the matches a simulation asks for, with the slot, partner
+    and opponents of all of them worked out in one pass over the columns.
+    Matches without all four pre-match ratings are left out, as in
+    MatchIndex.
+    """
+
+    __slots__ = ("_arr", "_rows", "_span", "_count")
+
+    def __init__(self, arr: np.ndarray) -> None:
+        usable = ~np.isnan(arr["rating"]).any(axis=1)
+        ids = arr["player"].ravel()
+        rows = np.repeat(np.arange(len(arr)), 4)
+        keep = (ids >= 0) & np.repeat(usable, 4)
+        ids, rows = ids[keep], rows[keep]
+        order = np.argsort(ids, kind="stable")  # rows stay chronological per player
+        ids, rows = ids[order], rows[order]
+        # a player listed twice in one match counts it once
+        first = np.ones(len(ids), dtype=bool)
+        first[1:] = (ids[1:] != ids[:-1]) | (rows[1:] != rows[:-1])
+        ids, rows = ids[first], rows[first]
+        players, start, count = np.unique(ids, return_index=True, return_counts=True)
+        self._arr = np.asarray(arr)  # a plain view of the mapping; np.memmap slows every small op
+        self._rows = rows
+        self._span = {
+            str(pid): (lo, lo + n) for pid, lo, n in zip(players.tolist(), start.tolist(), count.tolist())
+        }
+        self._count = int(usable.sum())
+
+    @classmethod
+    def open(cls, path: str) -> "MatchArrayIndex":
+        """Index a match array file written by scripts/export_match_array.py."""
+        from dupr_match_array import open_match_array
+
+        return cls(open_match_array(path))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, player_id: object) -> bool:
+        return str(player_id) in self._span
+
+    def player_ids(self) -> List[str]:
+        return list(self._span)
+
+    def match_count(self, player_id: str) -> int:
+        lo, hi = self._span.get(str(player_id), (0, 0))
+        return hi - lo
+
+    def player_records(self, player_id: str, last: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The player's MATCH_DTYPE records, oldest first (only the most recent
+        `last` if given), and the player's 0-based position in each.
+        """
+        player_id_str = str(player_id)
+        lo, hi = self._span.get(player_id_str, (0, 0))
+        if last:
+            lo = max(lo, hi - last)
+        recs = self._arr[self._rows[lo:hi]]
+        if not len(recs):
+            return recs, np.zeros(0, dtype=np.intp)
+        return recs, (recs["player"] == int(player_id_str)).argmax(axis=1)
+
+    def matches_for_player(self, player_id: str, last: Optional[int] = None) -> List[NormalizedMatch]:
+        """The player's matches, oldest first; only the most recent `last` if given."""
+        from dupr_match_array import NO_GAMES, NO_PLAYER, day_datetime
+
+        recs, slot = self.player_records(player_id, last)
+        n = len(recs)
+        if not n:
+            return []
+        at = np.arange(n)
+        partner, opponents = _partners_and_opponents(recs["player"], slot)
+        ratings = recs["rating"]
+        rels = recs["reliability"]
+        games = np.where(recs["games"] == NO_GAMES, 0, recs["games"])
+
+        def names(col: np.ndarray) -> List[Optional[str]]:
+            return [str(p) if p != NO_PLAYER else None for p in col.tolist()]
+
+        def maybe(values: List[float]) -> List[Optional[float]]:
+            return [v if v == v else None for v in values]  # NaN -> None
+
+        # whole columns to Python at once; per-record numpy access is far slower
+        return [
+            NormalizedMatch(
+                match_id=str(match_id),
+                event_date=day_datetime(day),
+                r1=r1,
+                r2=r2,
+                r3=r3,
+                r4=r4,
+                games1=g1,
+                games2=g2,
+                winner=winner,
+                rel1=rel1,
+                rel2=rel2,
+                rel3=rel3,
+                rel4=rel4,
+                slot=s + 1,
+                target_pre_rating=target_rating,
+                target_reliability=target_rel,
+                partner_id=partner_id,
+                opponent_ids=(opp1, opp2),
+            )
+            for (match_id, day, (r1, r2, r3, r4), (rel1, rel2, rel3, rel4), (g1, g2), winner, s,
+                 target_rating, target_rel, partner_id, opp1, opp2) in zip(
+                recs["match_id"].tolist(),
+                recs["event_day"].tolist(),
+                ratings.tolist(),
+                [maybe(row) for row in rels.tolist()],
+                games.tolist(),
+                recs["winner"].tolist(),
+                slot.tolist(),
+                ratings[at, slot].tolist(),
+                maybe(rels[at, slot].tolist()),
+                names(partner),
+                names(opponents[:, 0]),
+                names(opponents[:, 1]),
+            )
+        ]
+
+
+def _partners_and_opponents(ids: np.ndarray, slot: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Partner ids (N,) and opponent ids (N, 2) of the player at 0-based `slot` of each match."""
+    partner = ids[np.arange(len(ids)), slot ^ 1]
+    opponents = np.where((slot < 2)[:, None], ids[:, 2:], ids[:, :2])
+    return partner, opponents
+
+
 def _target_impact(slot: int, impacts: Tuple[float, float, float, float]) -> float:
     return impacts[slot - 1]
 
@@ -374,8 +640,21 @@ def replay_window(
             if opp:
                 opponents.add(opp)
 
+    return _window_result(len(matches), used, skipped, baseline, shadow, partners, opponents, skip_reasons)
+
+
+def _window_result(
+    considered: int,
+    used: int,
+    skipped: int,
+    baseline: float,
+    shadow: float,
+    partners: set,
+    opponents: set,
+    skip_reasons: Dict[str, int],
+) -> Dict[str, Any]:
     return {
-        "matches_considered": len(matches),
+        "matches_considered": considered,
         "matches_used": used,
         "matches_skipped": skipped,
         "baseline_rating": baseline,
@@ -388,9 +667,89 @@ def replay_window(
     }
 
 
+def replay_windows_array(
+    predictor: DuprPredictor,
+    recs: np.ndarray,
+    slot: np.ndarray,
+    windows: Sequence[int],
+    mode: str,
+    min_rel: Optional[float],
+    baseline_rating: Optional[float],
+    current_reliability: Optional[float],
+) -> Dict[int, Dict[str, Any]]:
+    """
+    replay_window for every window at once over a player's MATCH_DTYPE
+    records (MatchArrayIndex.player_records), without building
+    NormalizedMatch objects: the player's slot, partner, opponents and
+    reliability come from whole-column operations, each match's impact is
+    predicted once for all windows, and each window sums its own suffix.
+    predict_impacts stays per match so the numbers are identical to
+    replay_window's (numpy's pow can differ from Python's in the last bit).
+    """
+    from dupr_match_array import NO_GAMES, NO_PLAYER
+
+    n = len(recs)
+    at = np.arange(n)
+    ratings = recs["rating"]
+    rels = recs["reliability"]
+    target_rel = rels[at, slot]
+    if mode == "min_rel_threshold":
+        use = ~np.isnan(target_rel)
+        if min_rel is not None:
+            use &= target_rel >= min_rel
+    else:
+        use = np.ones(n, dtype=bool)
+    games = np.where(recs["games"] == NO_GAMES, 0, recs["games"])
+    impacts = [
+        predictor.predict_impacts(
+            r1, r2, r3, r4, g1, g2, winner,
+            rel1=rel1 if rel1 == rel1 else None,  # NaN -> None
+            rel2=rel2 if rel2 == rel2 else None,
+            rel3=rel3 if rel3 == rel3 else None,
+            rel4=rel4 if rel4 == rel4 else None,
+        )[s]
+        for (r1, r2, r3, r4), (g1, g2), winner, (rel1, rel2, rel3, rel4), s in zip(
+            ratings.tolist(), games.tolist(), recs["winner"].tolist(), rels.tolist(), slot.tolist()
+        )
+    ]
+    if mode == "weighted_current":
+        impacts = [
+            impact * _weighted_multiplier(v if v == v else None, current_reliability)
+            for impact, v in zip(impacts, target_rel.tolist())
+        ]
+    partner, opponents = _partners_and_opponents(recs["player"], slot)
+    target_rating = ratings[at, slot].tolist()
+    use = use.tolist()
+    partner = partner.tolist()
+    opponents = opponents.tolist()
+
+    results: Dict[int, Dict[str, Any]] = {}
+    for window in windows:
+        lo = max(0, n - window)
+        baseline = float(baseline_rating) if baseline_rating is not None else target_rating[lo]
+        shadow = baseline
+        partners = set()
+        opponent_ids = set()
+        for i in range(lo, n):
+            if not use[i]:
+                continue
+            shadow += impacts[i]
+            partners.add(partner[i])
+            opponent_ids.update(opponents[i])
+        partners.discard(NO_PLAYER)
+        opponent_ids.discard(NO_PLAYER)
+        used = sum(use[lo:])
+        skipped = (n - lo) - used
+        results[window] = _window_result(
+            n - lo, used, skipped, baseline, shadow, partners, opponent_ids,
+            {"insufficient_data": 0, "low_reliability": skipped},
+        )
+    return results
+
+
 def simulate_shadow_reset(
     predictor: DuprPredictor,
-    raw_matches: Sequence[Dict[str, Any]],
+    raw_matches: Union[Sequence[Dict[str, Any]], MatchIndex, MatchArrayIndex],
     player_id: str,
     windows: Sequence[int] = (8, 16, 24),
     mode: str = "include_all",
@@ -402,24 +761,45 @@ def simulate_shadow_reset(
     if mode not in {"include_all", "min_rel_threshold", "weighted_current"}:
         raise ValueError(f"Unsupported mode: {mode}")
 
-    normalized = normalize_matches_for_player(raw_matches, player_id=str(player_id))
-    if not normalized:
+    unique_windows = sorted({int(w) for w in windows if int(w) > 0})
+    replayed = None
+    if isinstance(raw_matches, MatchArrayIndex):
+        available = raw_matches.match_count(str(player_id))
+        recs, slot = raw_matches.player_records(
+            str(player_id), last=unique_windows[-1] if unique_windows else None
+        )
+        if not len(recs):
+            raise ValueError("No usable matches found for this player.")
+        replayed = replay_windows_array(
+            predictor, recs, slot, unique_windows, mode, min_rel, baseline_rating, current_reliability
+        )
+    elif isinstance(raw_matches, MatchIndex):
+        # windows only look at the most recent matches
+        available = raw_matches.match_count(str(player_id))
+        normalized = raw_matches.matches_for_player(
+            str(player_id), last=unique_windows[-1] if unique_windows else None
+        )
+    else:
+        normalized = normalize_matches_for_player(raw_matches, player_id=str(player_id))
+        available = len(normalized)
+    if replayed is None and not normalized:
         raise ValueError("No usable matches found for this player.")
 
-    unique_windows = sorted({int(w) for w in windows if int(w) > 0})
     results: Dict[str, Any] = {}
     for window in unique_windows:
-        subset = normalized[-window:]
-        result = replay_window(
-            predictor=predictor,
-            matches=subset,
-            mode=mode,
-            min_rel=min_rel,
-            baseline_rating=baseline_rating,
-            current_reliability=current_reliability,
-        )
+        if replayed is not None:
+            result = replayed[window]
+        else:
+            result = replay_window(
+                predictor=predictor,
+                matches=normalized[-window:],
+                mode=mode,
+                min_rel=min_rel,
+                baseline_rating=baseline_rating,
+                current_reliability=current_reliability,
+            )
         result["window"] = window
-        result["total_player_matches_available"] = len(normalized)
+        result["total_player_matches_available"] = available
         result["meets_minimum_8_matches"] = result["matches_used"] >= 8
         result["meets_partner_diversity_2"] = result["partner_diversity"] >= 2
         result["qualifies_reset_style"] = (
@@ -431,7 +811,7 @@ def simulate_shadow_reset(
         "player_id": str(player_id),
         "mode": mode,
         "windows": unique_windows,
-        "total_player_matches_available": len(normalized),
+        "total_player_matches_available": available,
         "results": results,
     }
 
@@ -0,0 +1,431 @@
+"""
+    Synthetic DUPR clubs: players and match histories shaped like the API.
+
+    Used by the fake DUPR server (dupr_fake_server.py) and benchmarks so the
+    client, crawler and ingest paths can run offline at any club size.
+    Generation is deterministic for a given seed. Each player has a hidden
+    skill and an activity level; a Matchmaker picks four players who play
+    near their level, often with a regular partner. The result is drawn
+    from the skill gap and ratings move by a simple impact rule, or by a
+    DuprPredictor used as the ground-truth rating process, so pre-match
+    ratings, impacts and reliabilities look like real club data and a fit
+    on them can be checked against known parameters.
+
+    write_to_db bulk-loads generated matches into club_match_raw and the
+    match tables for scale tests with millions of matches.
+"""
+import bisect
+import itertools
+import json
+import math
+import random
+from datetime import date, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional
+
+FIRST_NAMES = (
+    "Alex", "Blake", "Casey", "Dana", "Eli", "Frankie", "Gray", "Harper", "Indy", "Jordan",
+    "Kai", "Logan", "Morgan", "Noel", "Oakley", "Parker", "Quinn", "Riley", "Sage", "Taylor",
+)
+LAST_NAMES = (
+    "Adams", "Brooks", "Chen", "Diaz", "Evans", "Foster", "Garcia", "Hughes", "Ito", "Jones",
+    "Kim", "Lopez", "Miller", "Nguyen", "Ortiz", "Patel", "Reyes", "Smith", "Tran", "Wong",
+)
+
+PLAYER_ID_BASE = 7_000_000_000
+MATCH_ID_BASE = 50_000_000
+IMPACT_K = 0.08
+RATING_MIN, RATING_MAX = 2.0, 7.0
+
+
+def _short_id(i: int) -> str:
+    """6-character duprId-style code (letters and digits)."""
+    alphabet = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+    out = []
+    n = i * 7919 + 104729  # spread ids so neighbours do not look alike
+    for _ in range(6):
+        n, r = divmod(n, len(alphabet))
+        out.append(alphabet[r])
+    return "".join(out)
+
+
+def make_players(n: int, rng: random.Random) -> List[dict]:
+    """Player dicts as returned by GET /player/{id} (ratings filled later)."""
+    players = []
+    for i in range(n):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        skill = min(RATING_MAX - 0.5, max(RATING_MIN + 0.5, rng.gauss(3.6, 0.6)))
+        players.append({
+            "id": PLAYER_ID_BASE + i,
+            "duprId": _short_id(i),
+            "fullName": f"{first} {last}",
+            "firstName": first,
+            "lastName": last,
+            "gender": rng.choice(("MALE", "FEMALE")),
+            "age": rng.randint(18, 75),
+            "imageUrl": None,
+            "_skill": skill,
+            "_rating": round(min(RATING_MAX, max(RATING_MIN, skill + rng.gauss(0, 0.4))), 3),
+            "_played": rng.randint(0, 10),
+            "_activity": rng.lognormvariate(0.0, 0.75),  # relative share of matches played
+        })
+    return players
+
+
+def reliability(played: int) -> int:
+    """Doubles reliability (0-100) after `played` rated matches."""
+    return min(100, 20 + 4 * played)
+
+
+def win_probability(team1: float, team2: float) -> float:
+    return 1.0 / (1.0 + math.exp(-(team1 - team2) / 0.35))
+
+
+class Matchmaker:
+    """
+    Picks the four players of the next match. Anchors are drawn by
+    activity; partners and opponents come from a window of players with
+    similar hidden skill, and with probability `partner_rate` a player
+    teams up with one of their `regular_partners`.
+    """
+
+    def __init__(
+        self,
+        players: List[dict],
+        rng: random.Random,
+        regular_partners: int = 3,
+        partner_rate: float = 0.6,
+        window: Optional[int] = None,
+    ):
+        if len(players) < 4:
+            raise ValueError("need at least 4 players")
+        self.players = players
+        self.rng = rng
+        self.partner_rate = partner_rate
+        self.by_skill = sorted(range(len(players)), key=lambda i: players[i]["_skill"])
+        self.rank = [0] * len(players)
+        for r, i in enumerate(self.by_skill):
+            self.rank[i] = r
+        self.window = min(len(players) - 1, window or max(8, len(players) // 25))
+        self.cum_activity = list(itertools.accumulate(p.get("_activity", 1.0) for p in players))
+        self.partners = [
+            [self.near(i, {i}) for _ in range(regular_partners)] for i in range(len(players))
+        ]
+
+    def anchor(self) -> int:
+        x = self.rng.random() * self.cum_activity[-1]
+        return min(bisect.bisect_right(self.cum_activity, x), len(self.players) - 1)
+
+    def near(self, i: int, exclude: set) -> int:
+        """A player within `window` skill ranks of player i, not in `exclude`."""
+        r = self.rank[i]
+        lo, hi = max(0, r - self.window), min(len(self.players) - 1, r + self.window)
+        while True:
+            j = self.by_skill[self.rng.randint(lo, hi)]
+            if j not in exclude:
+                return j
+
+    def partner(self, i: int, exclude: set) -> int:
+        if self.rng.random() < self.partner_rate:
+            regulars = [j for j in self.partners[i] if j not in exclude]
+            if regulars:
+                return self.rng.choice(regulars)
+        return self.near(i, exclude)
+
+    def pick(self) -> List[dict]:
+        a = self.anchor()
+        b = self.partner(a, {a})
+        c = self.near(a, {a, b})
+        d = self.partner(c, {a, b, c})
+        four = [a, b, c, d] if self.rng.random() < 0.5 else [c, d, a, b]
+        return [self.players[i] for i in four]
+
+
+def _match_player(p: dict) -> dict:
+    """The few player fields the match history call embeds."""
+    return {
+        "id": p["id"],
+        "duprId": p["duprId"],
+        "fullName": p["fullName"],
+        "imageUrl": None,
+        "ratings": {"doubles": f"{p['_rating']:.3f}", "doublesReliabilityScore": reliability(p["_played"])},
+    }
+
+
+def iter_matches(
+    players: List[dict],
+    n_matches: int,
+    rng: random.Random,
+    club_id: int = 1,
+    end: date = date(2025, 12, 31),
+    days: int = 365,
+    predictor=None,
+    impact_noise: float = 0.0,
+    first_match_id: int = MATCH_ID_BASE,
+) -> Iterator[dict]:
+    """
+    Yield `n_matches` doubles match dicts in date order, updating each
+    player's `_rating` / `_played` as matches are played.
+
+    With a `predictor` (DuprPredictor), results follow its win curve on the
+    hidden skills and impacts are exactly its predict_impacts for the
+    pre-match ratings, score and reliabilities in the match JSON, plus
+    Gaussian `impact_noise`. Without one, a simple Elo-style rule is used.
+    """
+    start = end - timedelta(days=days - 1)
+    matchmaker = Matchmaker(players, rng)
+    for k in range(n_matches):
+        four = matchmaker.pick()
+        pre = [p["_rating"] for p in four]
+        rels = [reliability(p["_played"]) for p in four]
+        skill1 = (four[0]["_skill"] + four[1]["_skill"]) / 2
+        skill2 = (four[2]["_skill"] + four[3]["_skill"]) / 2
+        if predictor is not None:
+            p_win = 1.0 / (1.0 + 10 ** (-(skill1 - skill2) * predictor.scale / 400))
+        else:
+            p_win = win_probability(skill1, skill2)
+        team1_wins = rng.random() < p_win
+        closeness = 1.0 - abs(skill1 - skill2)
+        loser_games = max(0, min(9, int(round(rng.gauss(6.0 * max(closeness, 0.2), 2.0)))))
+        games = (11, loser_games) if team1_wins else (loser_games, 11)
+
+        if predictor is not None:
+            impacts = predictor.predict_impacts(*pre, games[0], games[1], 1 if team1_wins else 2, *rels)
+            impacts = [round(v + (rng.gauss(0.0, impact_noise) if impact_noise else 0.0), 6) for v in impacts]
+        else:
+            expected1 = win_probability((pre[0] + pre[1]) / 2, (pre[2] + pre[3]) / 2)
+            impacts = []
+            for j, rel in enumerate(rels):
+                won = team1_wins if j < 2 else not team1_wins
+                expected = expected1 if j < 2 else 1.0 - expected1
+                impacts.append(round(IMPACT_K * ((1.0 if won else 0.0) - expected) / (1.0 + rel / 100.0), 4))
+
+        teams = []
+        for t in range(2):
+            a, b = four[2 * t], four[2 * t + 1]
+            teams.append({
+                "player1": _match_player(a),
+                "player2": _match_player(b),
+                "game1": games[t],
+                "game2": -1,
+                "game3": -1,
+                "winner": team1_wins if t == 0 else not team1_wins,
+                "preMatchRatingAndImpact": {
+                    "preMatchDoubleRatingPlayer1": pre[2 * t],
+                    "preMatchDoubleRatingPlayer2": pre[2 * t + 1],
+                    "matchDoubleRatingImpactPlayer1": impacts[2 * t],
+                    "matchDoubleRatingImpactPlayer2": impacts[2 * t + 1],
+                },
+            })
+        for p, impact in zip(four, impacts):
+            p["_rating"] = round(min(RATING_MAX, max(RATING_MIN, p["_rating"] + impact)), 3)
+            p["_played"] += 1
+
+        yield {
+            "matchId": first_match_id + k,
+            "clubId": club_id,
+            "eventDate": (start + timedelta(days=k * days // max(n_matches, 1))).isoformat(),
+            "eventName": "Club Play",
+            "eventFormat": "DOUBLES",
+            "matchSource": "CLUB",
+            "matchType": "SIDE_ONLY",
+            "confirmed": True,
+            "matchScoreAdded": True,
+            "teams": teams,
+        }
+
+
+def player_json(p: dict) -> dict:
+    """Public player dict (GET /player/{id} result) without generator state."""
+    out = {k: v for k, v in p.items() if not k.startswith("_")}
+    out["ratings"] = {
+        "doubles": f"{p['_rating']:.3f}" if p["_played"] else "NR",
+        "singles": "NR",
+        "doublesReliabilityScore": reliability(p["_played"]),
+        "doublesProvisional": p["_played"] < 5,
+        "singlesProvisional": True,
+    }
+    return out
+
+
+class SyntheticClub:
+    """
+    A club of `n_players` with `n_matches` matches among them.
+
+    `members` are the club member list entries (no ratings, like the real
+    members endpoint), `players` the full player dicts by id, and
+    `history(player_id)` a player's matches newest first. Everything is
+    held in memory; for millions of matches stream iter_matches into
+    write_to_db instead.
+    """
+
+    def __init__(
+        self,
+        n_players: int = 200,
+        n_matches: int = 2000,
+        seed: int = 0,
+        club_id: int = 1,
+        predictor=None,
+    ):
+        self.club_id = club_id
+        self.seed = seed
+        rng = random.Random(seed)
+        raw_players = make_players(n_players, rng)
+        self.matches: List[dict] = list(
+            iter_matches(raw_players, n_matches, rng, club_id=club_id, predictor=predictor)
+        )
+        self.players: Dict[int, dict] = {p["id"]: player_json(p) for p in raw_players}
+        self.members: List[dict] = [
+            {k: p[k] for k in ("id", "duprId", "fullName", "firstName", "lastName", "gender", "age", "imageUrl")}
+            for p in self.players.values()
+        ]
+        self._history: Dict[int, List[int]] = {pid: [] for pid in self.players}
+        for idx, m in enumerate(self.matches):
+            for team in m["teams"]:
+                for key in ("player1", "player2"):
+                    self._history[team[key]["id"]].append(idx)
+
+    def player(self, player_id) -> Optional[dict]:
+        try:
+            return self.players.get(int(player_id))
+        except (TypeError, ValueError):
+            return None
+
+    def history(self, player_id) -> List[dict]:
+        """Matches for this player, newest first (the API's MATCH_DATE DESC)."""
+        try:
+            indexes = self._history.get(int(player_id), [])
+        except (TypeError, ValueError):
+            return []
+        return [self.matches[i] for i in reversed(indexes)]
+
+    def search(self, query: str) -> List[dict]:
+        q = (query or "").strip().lower()
+        if not q or q == "*":
+            return list(self.players.values())
+        return [
+            p for p in self.players.values()
+            if q in p["fullName"].lower() or q == p["duprId"].lower() or q == str(p["id"])
+        ]
+
+
+def write_to_db(
+    engine,
+    players: List[dict],
+    matches: Iterable[dict],
+    club_id: int = 1,
+    normalized: bool = True,
+    batch_size: int = 5000,
+    progress=None,
+) -> int:
+    """
+    Bulk-load generated matches the way a crawl of the club stores them:
+    raw JSON in club_match_raw with its club_match_player rows and, with
+    `normalized`, match / match_team / match_team_player rows plus player
+    and rating rows (final ratings) for players not stored yet. Uses core
+    executemany inserts with assigned ids, one transaction per `batch_size`
+    matches, so millions of matches load in minutes instead of hours
+    through Match.save.
+
+    `players` must be the list `matches` was generated from; matches whose
+    matchId is already stored are skipped. `progress(n_written)` is called
+    after each batch. Returns the number of matches written.
+    """
+    from sqlalchemy import func, insert, select
+
+    from dupr_db import ClubMatchPlayer, ClubMatchRaw, Match, MatchTeam, Player, Rating, match_team_player
+    from dupr_raw_codec import encode_raw
+
+    def next_id(conn, model) -> int:
+        return (conn.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+    pk_of: Dict[int, int] = {}
+    new_players: List[dict] = []
+    with engine.connect() as conn:
+        if normalized:
+            ids = [p["id"] for p in players]
+            for i in range(0, len(ids), 500):
+                rows = conn.execute(select(Player.dupr_id, Player.id).where(Player.dupr_id.in_(ids[i:i + 500])))
+                pk_of.update((int(dupr_id), pk) for dupr_id, pk in rows)
+            pk = next_id(conn, Player)
+            for p in players:
+                if p["id"] not in pk_of:
+                    pk_of[p["id"]] = pk
+                    new_players.append(p)
+                    pk += 1
+            if new_players:
+                conn.execute(insert(Player), [
+                    {"id": pk_of[p["id"]], "dupr_id": p["id"], "full_name": p["fullName"],
+                     "first_name": p["firstName"], "last_name": p["lastName"],
+                     "gender": p["gender"], "age": p["age"], "image_url": p["imageUrl"]}
+                    for p in new_players
+                ])
+            conn.commit()
+
+        match_pk = next_id(conn, Match)
+        team_pk = next_id(conn, MatchTeam)
+        written = 0
+        it = iter(matches)
+        while True:
+            batch = list(itertools.islice(it, batch_size))
+            if not batch:
+                break
+            lo = min(m["matchId"] for m in batch)
+            hi = max(m["matchId"] for m in batch)
+            stored = set(conn.execute(
+                select(ClubMatchRaw.match_id).where(ClubMatchRaw.match_id.between(lo, hi))
+            ).scalars())
+            if normalized:
+                stored.update(conn.execute(
+                    select(Match.match_id).where(Match.match_id.between(lo, hi))
+                ).scalars())
+            batch = [m for m in batch if m["matchId"] not in stored]
+            if not batch:
+                continue
+
+            conn.execute(insert(ClubMatchRaw), [
+                {"match_id": m["matchId"], "club_id": club_id,
+                 "event_date": m["eventDate"], **encode_raw(conn, json.dumps(m))}
+                for m in batch
+            ])
+            conn.execute(insert(ClubMatchPlayer), [
+                row for m in batch for row in ClubMatchPlayer.rows_from_json(m)
+            ])
+            if normalized:
+                match_rows, team_rows, link_rows = [], [], []
+                for m in batch:
+                    match_rows.append({
+                        "id": match_pk, "match_id": m["matchId"], "name": m["eventName"],
+                        "date": m["eventDate"], "match_type": m["matchType"],
+                        "match_source": m["matchSource"], "match_score_added": m["matchScoreAdded"],
+                    })
+                    for team in m["teams"]:
+                        team_rows.append({
+                            "id": team_pk, "match_id": match_pk, "score1": team["game1"],
+                            "score2": team["game2"], "score3": team["game3"], "is_winner": team["winner"],
+                        })
+                        for key in ("player1", "player2"):
+                            link_rows.append({"match_team_id": team_pk, "player_id": pk_of[team[key]["id"]]})
+                        team_pk += 1
+                    match_pk += 1
+                conn.execute(insert(Match), match_rows)
+                conn.execute(insert(MatchTeam), team_rows)
+                conn.execute(insert(match_team_player), link_rows)
+            conn.commit()
+            written += len(batch)
+            if progress is not None:
+                progress(written)
+
+        if new_players:
+            rating_pk = next_id(conn, Rating)
+            rows = []
+            for n, p in enumerate(new_players):
+                ratings = player_json(p)["ratings"]
+                rows.append({
+                    "id": rating_pk + n, "player_id": pk_of[p["id"]],
+                    "doubles": float(ratings["doubles"]) if ratings["doubles"] != "NR" else None,
+                    "is_doubles_provisional": ratings["doublesProvisional"],
+                    "singles": None, "is_singles_provisional": True,
+                })
+            conn.execute(insert(Rating), rows)
+            conn.commit()
+    return written
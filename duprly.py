@@ -1,20 +1,39 @@
+from __future__ import annotations
+
 import os
 from loguru import logger
 import click
 import json
-from dupr_client import DuprClient
-from openpyxl import Workbook
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
-from sqlalchemy import select, delete
-from sqlalchemy.orm import Session
-from dupr_db import open_db, Base, Player, Match, MatchTeam, Rating, MatchDetail
+
+# requests, SQLAlchemy (dupr_db) and openpyxl are imported inside the commands
+# that use them so `duprly.py --help` does not pay for them.
+if TYPE_CHECKING:
+    from dupr_db import Match, MatchTeam, Player
 
 load_dotenv()
-dupr = DuprClient()
 
-eng = open_db()
-with Session(eng) as sess:
-    Base.metadata.create_all(eng)
+_dupr = None
+_eng = None
+
+
+def get_dupr():
+    """DuprClient, created on first use (reads ~/.duprly_config)"""
+    global _dupr
+    if _dupr is None:
+        from dupr_client import DuprClient
+        _dupr = DuprClient()
+    return _dupr
+
+
+def get_eng():
+    """Engine for dupr.sqlite, opened (and schema checked) on first use"""
+    global _eng
+    if _eng is None:
+        from dupr_db import open_db
+        _eng = open_db()
+    return _eng
 
 
 def ppj(data):
@@ -24,89 +43,88 @@ def ppj(data):
 def dupr_auth():
     username = os.getenv("DUPR_USERNAME")
     password = os.getenv("DUPR_PASSWORD")
-    dupr.auth_user(username, password)
+    get_dupr().auth_user(username, password)
 
 
 def get_player_from_dupr(pid: int) -> Player:
+    from sqlalchemy.orm import Session
+    from dupr_db import Player, mark_db_written
 
-    rc, pdata = dupr.get_player(pid)
+    rc, pdata = get_dupr().get_player(pid)
     logger.debug(f"dupr.get_player for id {pid} GET...")
     ppj(pdata)
 
     player = None
 
-    with Session(eng) as sess:
+    with Session(get_eng()) as sess:
         player = Player().from_json(pdata)
         logger.debug(f"{player.dupr_id}, {player.full_name}, {player.rating}")
         Player.save(sess, player)
         sess.commit()
+    mark_db_written()
 
     return player
 
 
 def get_all_players_from_dupr():
+    from sqlalchemy.orm import Session
+    from dupr_db import Player, mark_db_written
+
     club_id = os.getenv("DUPR_CLUB_ID")
-    _rc, players = dupr.get_members_by_club(club_id)
+    _rc, players = get_dupr().get_members_by_club(club_id)
     for pdata in players:
-        with Session(eng) as sess:
+        with Session(get_eng()) as sess:
             player = Player().from_json(pdata)
             logger.debug(f"{player.id}, {player.full_name}, {player.rating}")
             Player.save(sess, player)
             sess.commit()
+    mark_db_written()
+
+
+def load_predictor():
+    """Predictor for match_feature.expected_points_for, or None if no model file"""
+    from dupr_predictor import DuprPredictor
+
+    try:
+        return DuprPredictor()
+    except FileNotFoundError:
+        logger.warning("dupr_model.json not found, expected_points_for left empty")
+        return None
 
 
 def get_matches_from_dupr(dupr_id: int):
     """Get match history for specified player"""
+    from sqlalchemy.orm import Session
+    from dupr_db import Match, MatchFeature, mark_db_written
+    from dupr_profile import span
 
-    _rc, matches = dupr.get_member_match_history_p(dupr_id)
+    _rc, matches = get_dupr().get_member_match_history_p(dupr_id)
+    predictor = load_predictor()
 
-    with Session(eng) as sess:
+    with Session(get_eng()) as sess:
 
         for mdata in matches:
             print("match")
             ppj(mdata)
-            m = Match().from_json(mdata)
-            # now we have match, and potentially four new players
-            # deal with the fact that player may already exists
-            m1 = Match.get_by_id(sess, m.match_id)
-            if m1:
-                # update
-                continue  # skip
-
-            for team in m.teams:
-                print(f"team {team}")
-                plist = []
-                for p in team.players:
-                    # This is very kludgy, the player data returned from the MatchHistory
-                    # call only has a few fields
-                    p1 = sess.execute(
-                        select(Player).where(Player.dupr_id == p.dupr_id)
-                    ).scalar_one_or_none()
-                    if p1:
-                        # set team to this player object instead
-                        plist.append(p1)
-                        print(f"use existing populated player")
-                    else:
-                        # We need to handle a strange case where the same player
-                        # enter himself/herself twice on a doubles team.
-                        # If we just add both "new limited (but same)" team members
-                        # SQLA seems to happily add both?
-                        # so check to see if p already has been added:
-                        if len(plist) > 0 and plist[0].dupr_id == p.dupr_id:
-                            logger.warning(
-                                f"same player on doubles team {p.dupr_id} {m.match_id}"
-                            )
-                            continue
-                        plist.append(p)
-                        print(f"saved new limited data player")
-                team.players = plist
-            sess.add(m)
-            sess.commit()
+            with span("db_write"):
+                m = Match.save(sess, Match().from_json(mdata))
+            if m is None:
+                continue  # already stored
+            with span("predict"):
+                feature = MatchFeature.from_json(mdata, predictor)
+            with span("db_write"):
+                if feature is not None:
+                    MatchFeature.save(sess, feature)
+                sess.commit()
+    mark_db_written()
 
 
 def update_ratings_from_dupr():
+    from sqlalchemy import select
+    from sqlalchemy.orm import Session
+    from dupr_db import Player, Rating
 
-    with Session(eng) as sess:
+    with Session(get_eng()) as sess:
         # Has to use "has" not "any" because it is 1=1? Also need to have something
         # in the has() function
         dupr_ids = sess.scalars(
@@ -120,7 +138,12 @@ def update_ratings_from_dupr():
 @click.command()
 def build_match_detail():
     """Flatten match data for faster query"""
-    with Session(eng) as sess:
+    from sqlalchemy import delete, select
+    from sqlalchemy.orm import Session
+    from dupr_db import Match, MatchDetail
+    from dupr_profile import span
+
+    with Session(get_eng()) as sess:
         sess.execute(delete(MatchDetail))
         matches = sess.scalars(select(Match))
         for match in matches:
@@ -138,7 +161,80 @@ def build_match_detail():
             if len(t2.players) > 1:
                 md.team_2_player_2_id = t2.players[1].id
             sess.add(md)
+            with span("db_write"):
+                sess.commit()
+
+
+@click.command()
+def build_match_features():
+    """Backfill match_feature from stored club_match_raw JSON and save the similarity index"""
+    from sqlalchemy import select
+    from sqlalchemy.orm import Session
+    from backend.similarity_index import INDEX_PATH, SimilarityIndex
+    from dupr_db import ClubMatchRaw, MatchFeature, mark_db_written
+    from dupr_profile import span
+
+    predictor = load_predictor()
+    n = 0
+    with Session(get_eng()) as sess:
+        for raw in sess.scalars(select(ClubMatchRaw)):
+            with span("json"):
+                data = raw.payload()
+            with span("predict"):
+                feature = MatchFeature.from_json(data, predictor)
+            if feature is None:
+                continue
+            with span("db_write"):
+                MatchFeature.save(sess, feature)
+                n += 1
+                if n % 500 == 0:
+                    sess.commit()
+        with span("db_write"):
             sess.commit()
+    mark_db_written()
+    print(f"match features written: {n}")
+
+    with span("index"):
+        index = SimilarityIndex.from_db(get_eng())
+        index.save(INDEX_PATH)
+    print(f"similarity index of {len(index)} matches saved to {INDEX_PATH}")
+
+
+@click.command()
+@click.option("--workers", type=int, default=None,
+              help="Decode processes (default: one per CPU on large tables, else 1)")
+def build_club_match_players(workers):
+    """Backfill club_match_player from stored club_match_raw JSON"""
+    from sqlalchemy import insert, select, update
+    from dupr_db import ClubMatchPlayer, ClubMatchRaw, club_match_unsplit, mark_db_written
+    from dupr_json import decode_match
+    from dupr_raw_codec import map_raw
+    from dupr_profile import span
+
+    missing = club_match_unsplit()
+    n = 0
+    rows = []
+    skipped = []
+    with get_eng().begin() as conn:
+        # map_raw yields in id order, one result per row, so this pairs them up
+        ids = conn.execute(select(ClubMatchRaw.id).where(missing).order_by(ClubMatchRaw.id)).scalars().all()
+        for pk, match in zip(ids, map_raw(conn, decode_match, missing, workers=workers)):
+            if match is None:
+                skipped.append(pk)
+            rows.extend(ClubMatchPlayer.rows_from_match(match))
+            if len(rows) >= 8000:
+                with span("db_write"):
+                    conn.execute(insert(ClubMatchPlayer), rows)
+                n += len(rows) // 4
+                rows = []
+        if rows:
+            with span("db_write"):
+                conn.execute(insert(ClubMatchPlayer), rows)
+            n += len(rows) // 4
+        if skipped:
+            conn.execute(update(ClubMatchRaw).where(ClubMatchRaw.id.in_(skipped)).values(players_skipped=True))
+    mark_db_written()
+    print(f"club match players written for {n} matches, {len(skipped)} skipped (not two teams of two)")
 
 
 def match_row(m: Match) -> tuple:
@@ -169,7 +265,9 @@ def team_row(t: MatchTeam, ratings) -> tuple:
 
 @click.command()
 def write_excel():
+    from openpyxl import Workbook
     from openpyxl.styles import numbers
+    from dupr_db import Match, Player
 
     wb = Workbook()
     ws = wb.active
@@ -258,7 +356,10 @@ def write_excel():
 
 @click.command()
 def stats():
-    with Session(eng) as sess:
+    from sqlalchemy.orm import Session
+    from dupr_db import Match, Player
+
+    with Session(get_eng()) as sess:
         c = sess.query(Player).count()
         print(f"number of players {c}")
         c = sess.query(Match).count()
@@ -289,11 +390,15 @@ def update_ratings():
 
 @click.command()
 def test_db():
+    from sqlalchemy import select
+    from sqlalchemy.orm import Session
+    from dupr_db import Player, Rating
+
     dupr_auth()
     club_id = os.getenv("DUPR_CLUB_ID")
-    _rc, players = dupr.get_members_by_club(club_id)
+    _rc, players = get_dupr().get_members_by_club(club_id)
     return
-    with Session(eng) as sess:
+    with Session(get_eng()) as sess:
         # Has to use "has" not "any" because it is 1=1? Also need to have something
         # in the has() function
         # use sess.scalars instead of execute(...).scalars() for more concise use
@@ -321,10 +426,14 @@ def get_matches(dupr_id: int):
 @click.command()
 def get_data():
     """Update all data"""
+    from sqlalchemy import select
+    from sqlalchemy.orm import Session
+    from dupr_db import Player
+
     logger.info("Getting data from DUPR...")
     dupr_auth()
     get_all_players_from_dupr()
-    with Session(eng) as sess:
+    with Session(get_eng()) as sess:
         for p in sess.execute(select(Player)).scalars():
             get_matches_from_dupr(p.dupr_id)
 
@@ -340,7 +449,7 @@ def search_players(query: str):
     print(f"🔍 Searching for players matching: '{query}'")
     print("=" * 60)
 
-    rc, results = dupr.search_players(query)
+    rc, results = get_dupr().search_players(query)
 
     if rc == 200 and results:
         hits = results.get("hits", [])
@@ -392,7 +501,7 @@ def expected_score(player1_id: int, player2_id: int, player3_id: int, player4_id
     print(f"Team 2: Players {player3_id} & {player4_id}")
     print()
 
-    rc, results = dupr.get_expected_score(teams)
+    rc, results = get_dupr().get_expected_score(teams)
 
     if rc == 200 and results:
         teams_result = results.get("teams", [])
@@ -428,7 +537,7 @@ def expected_score(player1_id: int, player2_id: int, player3_id: int, player4_id
                 {"player1Id": team2_numeric[0], "player2Id": team2_numeric[1]},
             ]
 
-            rc, results = dupr.get_expected_score(teams)
+            rc, results = get_dupr().get_expected_score(teams)
 
             if rc == 200 and results:
                 teams_result = results.get("teams", [])
@@ -628,7 +737,7 @@ def analyze_matches(match_file: str):
                 {"player1Id": team2_numeric[0], "player2Id": team2_numeric[1]},
             ]
 
-            rc, results = dupr.get_expected_score(teams)
+            rc, results = get_dupr().get_expected_score(teams)
 
             if rc == 200 and results:
                 teams_result = results.get("teams", [])
@@ -725,3 +834,41 @@ def create_match_template():
     print("📝 Created match_template.json")
     print("Edit this file with your actual matches and run:")
     print("python3 duprly.py analyze-matches match_template.json")
+
+
+@click.group()
+@click.option("--profile", is_flag=True, help="Sample the command and write folded stacks for a flamegraph.")
+@click.option("--profile-out", default="duprly-profile.collapsed", show_default=True,
+              help="Profile output file (.pstats for cProfile).")
+@click.pass_context
+def cli(ctx, profile, profile_out):
+    """DUPR club data: sync players and matches into dupr.sqlite, reports and predictions"""
+    if profile:
+        from dupr_profile import profiling
+
+        ctx.with_resource(profiling(profile_out))
+
+
+for command in (
+    get_data,
+    get_player,
+    get_all_players,
+    get_matches,
+    update_ratings,
+    delete_player,
+    stats,
+    write_excel,
+    build_match_detail,
+    build_match_features,
+    build_club_match_players,
+    search_players,
+    expected_score,
+    create_match_template,
+    analyze_matches,
+    test_db,
+):
+    cli.add_command(command)
+
+
+if __name__ == "__main__":
+    cli()
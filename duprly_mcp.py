@@ -4,9 +4,12 @@ DUPRLY MCP Server
 Exposes DUPR (Dynamic Universal Pickleball Rating) functionality via MCP
 """
 
+import asyncio
+import base64
 import os
 import sys
-import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Optional
 from dotenv import load_dotenv
 
@@ -22,10 +25,7 @@ except ImportError as e:
     print(f"Import error: {e}", file=sys.stderr)
     sys.exit(1)
 
-from dupr_client import DuprClient
-from dupr_db import open_db, Player, Match, Rating, MatchDetail
-from sqlalchemy import select, func
-from sqlalchemy.orm import Session
+import dupr_json
 
 try:
     from duprly_secrets import get_secret
@@ -33,13 +33,62 @@ except ImportError:
     def get_secret(key: str):
         return os.getenv(key)
 
-# Initialize DUPR client and database
-dupr = DuprClient()
-eng = open_db()
+# DUPR client, database and roster cache are built on first use so the server
+# answers initialize / list_tools without loading requests and SQLAlchemy.
+dupr = None
+eng = None
+rating_store = None
+roster = None
+_lazy_lock = threading.RLock()
+
+
+def get_dupr():
+    global dupr
+    with _lazy_lock:
+        if dupr is None:
+            from dupr_client import DuprClient
+            dupr = DuprClient()
+        return dupr
+
+
+def get_eng():
+    global eng
+    with _lazy_lock:
+        if eng is None:
+            from dupr_db import open_db
+            eng = open_db()
+        return eng
+
+
+def get_rating_store():
+    global rating_store
+    with _lazy_lock:
+        if rating_store is None:
+            from dupr_db import MemberRatingStore
+            rating_store = MemberRatingStore(get_eng())
+        return rating_store
+
+
+def get_roster():
+    global roster
+    with _lazy_lock:
+        if roster is None:
+            from dupr_roster import RosterCache
+            roster = RosterCache(get_dupr(), auth=lambda: ensure_auth(), rating_store=get_rating_store())
+        return roster
 
 # Create MCP server
 server = Server("duprly")
 
+# Tool bodies do blocking HTTP and SQLite work; they run on this pool so one
+# slow tool call does not stall other SSE sessions sharing the event loop.
+MCP_TOOL_WORKERS = int(os.getenv("MCP_TOOL_WORKERS", "8"))
+_tool_pool = ThreadPoolExecutor(max_workers=MCP_TOOL_WORKERS, thread_name_prefix="mcp-tool")
+
+# Paged tool output (page_size / cursor arguments)
+MCP_PAGE_SIZE = 25
+MCP_MAX_PAGE_SIZE = 100
+
 
 def ensure_auth():
     """Ensure we're authenticated with DUPR (credentials from .env or keychain)."""
@@ -50,7 +99,101 @@ def ensure_auth():
             "DUPR_USERNAME and DUPR_PASSWORD must be set in .env or keychain. "
             "Run: python3 scripts/set_secrets.py"
         )
-    dupr.auth_user(username, password)
+    get_dupr().auth_user(username, password)
+
+
+def _page_size(value) -> int:
+    return max(1, min(int(value or MCP_PAGE_SIZE), MCP_MAX_PAGE_SIZE))
+
+
+def _page_token(kind: str, key: str, **state) -> str:
+    """Opaque cursor for the next page of a paged tool call."""
+    raw = dupr_json.dumpb({"k": kind, "id": key, **state})
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _read_page_token(token: str, kind: str, key: str) -> dict:
+    try:
+        state = dupr_json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except Exception:
+        raise ValueError(f"Invalid cursor: {token}")
+    if not isinstance(state, dict) or state.get("k") != kind or state.get("id") != key:
+        raise ValueError("cursor belongs to a different tool call; start again without cursor")
+    return state
+
+
+def _format_match(i: int, match: dict) -> str:
+    event_date = match.get("eventDate", "Unknown")
+    event_name = match.get("eventName", match.get("league", match.get("tournament", "Unknown")))
+    lines = [f"{i}. {event_name} ({event_date})\n"]
+    for team in match.get("teams", []):
+        p1 = team.get("player1", {})
+        p2 = team.get("player2", {})
+        score = team.get("game1", "N/A")
+        winner = "🏆" if team.get("winner") else ""
+        p1_name = p1.get("fullName", "Unknown")
+        p2_name = p2.get("fullName", "") if p2 else ""
+        team_str = f"{p1_name}" + (f" & {p2_name}" if p2_name else "")
+        lines.append(f"   {winner} {team_str}: {score}\n")
+    lines.append("\n")
+    return "".join(lines)
+
+
+def _player_matches_page(dupr_id: str, arguments: dict) -> list[TextContent]:
+    """
+    One page of get_player_matches, fetched as a single DUPR history window
+    instead of the whole history. Newest first, or oldest first with oldest=true.
+    """
+    dupr = get_dupr()
+    page_size = _page_size(arguments.get("page_size"))
+    raw_json = arguments.get("raw_json", False)
+    cursor = arguments.get("cursor")
+    if cursor:
+        state = _read_page_token(cursor, "matches", str(dupr_id))
+        oldest, offset, size = bool(state["old"]), int(state["o"]), int(state["n"])
+        page_size = _page_size(state["p"])
+    else:
+        oldest, offset, size = bool(arguments.get("oldest", False)), 0, page_size
+        if oldest:
+            rc, _, total = dupr.get_member_match_history_page(dupr_id, 0, 1)
+            if rc != 200:
+                return [TextContent(type="text", text=f"Failed to get matches (status: {rc})")]
+            offset = max(0, total - page_size)
+            size = total - offset
+    rc, matches, total = dupr.get_member_match_history_page(dupr_id, offset, size)
+    if rc != 200:
+        return [TextContent(type="text", text=f"Failed to get matches (status: {rc})")]
+
+    # Number matches 1 = most recent, or 1 = first ever match with oldest=true
+    if oldest:
+        numbered = [(total - offset - j, m) for j, m in enumerate(matches)][::-1]
+        next_state = None
+        if offset > 0:
+            prev = max(0, offset - page_size)
+            next_state = {"o": prev, "n": offset - prev, "p": page_size, "old": 1}
+        order = "oldest first"
+    else:
+        numbered = [(offset + j + 1, m) for j, m in enumerate(matches)]
+        next_state = None
+        if offset + len(matches) < total and matches:
+            next_state = {"o": offset + len(matches), "n": page_size, "p": page_size, "old": 0}
+        order = "newest first"
+
+    if numbered:
+        span = f"{numbered[0][0]}-{numbered[-1][0]}"
+    else:
+        span = "none"
+    out = [f"Matches {span} of {total} for player {dupr_id} ({order}):\n\n"]
+    for i, match in numbered:
+        if raw_json:
+            out.append(f"{'=' * 80}\nMATCH {i}\n{'=' * 80}\n")
+            out.append(dupr_json.dumps(match, indent=True))
+            out.append("\n\n")
+        else:
+            out.append(_format_match(i, match))
+    if next_state is not None:
+        out.append(f"Next page: cursor={_page_token('matches', str(dupr_id), **next_state)}\n")
+    return [TextContent(type="text", text="".join(out))]
 
 
 @server.list_tools()
@@ -92,7 +235,7 @@ async def list_tools() -> list[Tool]:
         ),
         Tool(
             name="get_player_matches",
-            description="Get match history for a specific player. Use raw_json=true to see full JSON. Use oldest=true with raw_json to see oldest (first) matches for rating progression.",
+            description="Get match history for a specific player. Use raw_json=true to see full JSON. Use oldest=true with raw_json to see oldest (first) matches for rating progression. Use page_size/cursor to walk long histories page by page.",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -109,6 +252,14 @@ async def list_tools() -> list[Tool]:
                         "type": "boolean",
                         "description": "If true with raw_json, return oldest (first) N matches to see rating at the start",
                         "default": False
+                    },
+                    "page_size": {
+                        "type": "integer",
+                        "description": f"Return one page of this many matches (max {MCP_MAX_PAGE_SIZE}) plus a cursor for the next page; fetches only that window from DUPR"
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "Cursor from the previous page's output, to continue paging"
                     }
                 },
                 "required": ["dupr_id"]
@@ -142,7 +293,7 @@ async def list_tools() -> list[Tool]:
         ),
         Tool(
             name="get_club_members",
-            description="Get all members from your DUPR club. Use recent=true for newest join first; use by_rating=true for highest DUPR (doubles) to lowest. Use all_members=true to return ALL members (not just first 50). Ratings are filled via parallel get_player lookups (DUPR has no batch API).",
+            description="Get all members from your DUPR club. Use recent=true for newest join first; use by_rating=true for highest DUPR (doubles) to lowest. Use all_members=true to return ALL members (not just first 50), or page_size/cursor to page through them. Ratings are filled via parallel get_player lookups (DUPR has no batch API).",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -172,6 +323,19 @@ async def list_tools() -> list[Tool]:
                     "rating_max": {
                         "type": "number",
                         "description": "Optional: filter to members with doubles rating <= this value (e.g. 4.2)"
+                    },
+                    "refresh": {
+                        "type": "boolean",
+                        "description": "If true, re-fetch the roster and every rating from DUPR now instead of using the cached copy",
+                        "default": False
+                    },
+                    "page_size": {
+                        "type": "integer",
+                        "description": f"Return one page of this many members (max {MCP_MAX_PAGE_SIZE}) plus a cursor for the next page"
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "Cursor from the previous page's output; pass the same recent/by_rating/rating_min/rating_max"
                     }
                 }
             }
@@ -233,8 +397,22 @@ async def list_tools() -> list[Tool]:
 
 @server.call_tool()
 async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
-    """Handle tool calls"""
+    """Handle tool calls on the worker pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_tool_pool, run_tool, name, arguments)
+
+
+def run_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
+    """Run one tool synchronously (blocking DUPR API / DB calls)"""
     try:
+        # Loaded on the first tool call rather than at server startup
+        from sqlalchemy import select, func
+        from sqlalchemy.orm import Session
+        from dupr_db import Player, Match, Rating, MatchDetail
+        from dupr_rating_index import RatingIndex
+        from dupr_roster import RosterFetchError, format_age
+        dupr = get_dupr()
+
         if name == "search_players":
             ensure_auth()
             query = arguments.get("query")
@@ -245,7 +423,7 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
                 hits = results.get("hits", [])
                 total = results.get("total", 0)
                 
-                output = f"Found {total} players matching '{query}':\n\n"
+                out = [f"Found {total} players matching '{query}':\n\n"]
                 for i, player in enumerate(hits[:limit], 1):
                     name = player.get("fullName", "Unknown")
                     dupr_id = player.get("duprId", "Unknown")
@@ -256,12 +434,14 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
                     doubles = ratings.get("doubles", "NR")
                     singles = ratings.get("singles", "NR")
                     
-                    output += f"{i}. {name}\n"
-                    output += f"   DUPR ID: {dupr_id}\n"
-                    output += f"   Age: {age}, Location: {location}\n"
-                    output += f"   Doubles: {doubles}, Singles: {singles}\n\n"
+                    out.append(
+                        f"{i}. {name}\n"
+                        f"   DUPR ID: {dupr_id}\n"
+                        f"   Age: {age}, Location: {location}\n"
+                        f"   Doubles: {doubles}, Singles: {singles}\n\n"
+                    )
                 
-                return [TextContent(type="text", text=output)]
+                return [TextContent(type="text", text="".join(out))]
             else:
                 return [TextContent(type="text", text=f"Search failed (status: {rc})")]
         
@@ -271,7 +451,7 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
             
             rc, player_data = dupr.get_player(player_id)
             if rc == 200 and player_data:
-                output = json.dumps(player_data, indent=2)
+                output = dupr_json.dumps(player_data, indent=True)
                 return [TextContent(type="text", text=output)]
             else:
                 return [TextContent(type="text", text=f"Failed to get player (status: {rc})")]
@@ -281,6 +461,8 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
             dupr_id = arguments.get("dupr_id")
             raw_json = arguments.get("raw_json", False)
             oldest = arguments.get("oldest", False)
+            if arguments.get("page_size") or arguments.get("cursor"):
+                return _player_matches_page(dupr_id, arguments)
             
             rc, matches = dupr.get_member_match_history_p(dupr_id)
             if rc == 200:
@@ -293,44 +475,26 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
                     else:
                         slice_matches = matches[:n_show]
                         label = "RAW JSON DATA (first 3 matches):" if not oldest else f"OLDEST {len(slice_matches)} matches:"
-                    output = f"Found {len(matches)} matches for player {dupr_id}\n\n"
-                    output += "="*80 + "\n"
-                    output += label + "\n"
-                    output += "="*80 + "\n\n"
+                    rule = "=" * 80
+                    out = [f"Found {len(matches)} matches for player {dupr_id}\n\n{rule}\n{label}\n{rule}\n\n"]
                     for i, match in enumerate(slice_matches, 1):
-                        output += f"{'='*80}\n"
-                        output += f"MATCH {i}\n"
-                        output += f"{'='*80}\n"
-                        output += json.dumps(match, indent=2)
-                        output += "\n\n"
+                        out.append(f"{rule}\nMATCH {i}\n{rule}\n")
+                        out.append(dupr_json.dumps(match, indent=True))
+                        out.append("\n\n")
                     if len(matches) > n_show and not oldest:
-                        output += f"... and {len(matches) - n_show} more matches (use raw_json=false for formatted view)\n"
+                        out.append(f"... and {len(matches) - n_show} more matches (use raw_json=false for formatted view)\n")
                     elif oldest and len(matches) > n_show:
-                        output += f"... plus {len(matches) - n_show} more recent matches\n"
+                        out.append(f"... plus {len(matches) - n_show} more recent matches\n")
                 else:
                     # Formatted display
-                    output = f"Found {len(matches)} matches for player {dupr_id}:\n\n"
+                    out = [f"Found {len(matches)} matches for player {dupr_id}:\n\n"]
                     for i, match in enumerate(matches[:10], 1):  # Limit to 10 for display
-                        event_date = match.get("eventDate", "Unknown")
-                        event_name = match.get("eventName", match.get("league", match.get("tournament", "Unknown")))
-                        teams = match.get("teams", [])
-                        
-                        output += f"{i}. {event_name} ({event_date})\n"
-                        for team in teams:
-                            p1 = team.get("player1", {})
-                            p2 = team.get("player2", {})
-                            score = team.get("game1", "N/A")
-                            winner = "🏆" if team.get("winner") else ""
-                            p1_name = p1.get("fullName", "Unknown")
-                            p2_name = p2.get("fullName", "") if p2 else ""
-                            team_str = f"{p1_name}" + (f" & {p2_name}" if p2_name else "")
-                            output += f"   {winner} {team_str}: {score}\n"
-                        output += "\n"
+                        out.append(_format_match(i, match))
                     
                     if len(matches) > 10:
-                        output += f"... and {len(matches) - 10} more matches\n"
+                        out.append(f"... and {len(matches) - 10} more matches\n")
                 
-                return [TextContent(type="text", text=output)]
+                return [TextContent(type="text", text="".join(out))]
             else:
                 return [TextContent(type="text", text=f"Failed to get matches (status: {rc})")]
         
@@ -381,31 +545,55 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
             all_members = arguments.get("all_members", False)  # New: return all members, not just first 50
             rating_min = arguments.get("rating_min")  # Optional: filter by minimum doubles rating
             rating_max = arguments.get("rating_max")  # Optional: filter by maximum doubles rating
+            has_range = rating_min is not None or rating_max is not None
+
+            # Paging: the cursor pins the offset and the filters it was issued for
+            paged = bool(arguments.get("page_size") or arguments.get("cursor"))
+            page_size = _page_size(arguments.get("page_size"))
+            filters = [bool(recent), bool(by_rating), rating_min, rating_max]
+            offset, token = 0, {}
+            if arguments.get("cursor"):
+                token = _read_page_token(arguments["cursor"], "members", str(club_id))
+                if token.get("f") != filters:
+                    raise ValueError("cursor was issued for different recent/by_rating/rating_min/rating_max arguments")
+                offset, page_size = int(token["o"]), int(token["n"])
             
-            rc, members = dupr.get_members_by_club(club_id, sort_by_recent=recent, sort_by_rating=by_rating)
+            age_note = "live"
+            snap = None
+            if recent:
+                # Join-date order comes from the API sort, so this is not cached
+                rc, members = dupr.get_members_by_club(club_id, sort_by_recent=True)
+                if rc == 200:
+                    # Enrich with ratings: DUPR has no batch player API, so we fetch in parallel (e.g. 10 at a time)
+                    enrich_limit = len(members) if all_members else 50
+                    to_enrich = members
+                    if paged and not has_range:
+                        # only the requested page needs ratings
+                        to_enrich, enrich_limit = members[offset:offset + page_size], page_size
+                    dupr.enrich_members_with_ratings(
+                        to_enrich, limit=enrich_limit, max_workers=10,
+                        store=get_rating_store(), max_age_sec=get_roster().rating_max_age_sec,
+                    )
+            else:
+                # Fully enriched roster from memory, kept warm by the background refresher
+                try:
+                    snap = get_roster().get(club_id, force=arguments.get("refresh", False))
+                    rc, members = 200, list(snap.members)
+                    age_note = f"data age {format_age(snap.age_sec)}"
+                except RosterFetchError as e:
+                    rc, members = e.status, []
             if rc == 200:
-                # Enrich with ratings: DUPR has no batch player API, so we fetch in parallel (e.g. 10 at a time)
-                if all_members:
-                    enrich_limit = len(members)  # Enrich ALL members when all_members=True
-                else:
-                    enrich_limit = 200 if by_rating else 50  # Default: 200 when sorting by rating, 50 for first page
-                members = dupr.enrich_members_with_ratings(members, limit=enrich_limit, max_workers=10)
-                if by_rating:
-                    members = sorted(members, key=dupr._member_doubles_sort_key, reverse=True)
-                
-                # Filter by rating range if specified
-                if rating_min is not None or rating_max is not None:
-                    filtered = []
-                    for m in members:
-                        rating_str = dupr._member_rating_value(m, "doubles")
-                        if rating_str != "NR":
-                            try:
-                                rating_val = float(rating_str)
-                                if (rating_min is None or rating_val >= rating_min) and (rating_max is None or rating_val <= rating_max):
-                                    filtered.append(m)
-                            except (ValueError, TypeError):
-                                pass
-                    members = filtered
+                # Sort and range-filter through the rating index (prebuilt for the cached roster)
+                index = snap.index if snap is not None else RatingIndex.from_members(members)
+                if has_range:
+                    in_range = index.range("doubles", rating_min, rating_max, descending=by_rating)
+                    if by_rating:
+                        members = in_range
+                    else:
+                        keep = {id(m) for m in in_range}
+                        members = [m for m in members if id(m) in keep]
+                elif by_rating:
+                    members = index.sorted_items("doubles", descending=True)
                 
                 if by_rating:
                     title = "Club members (highest DUPR to lowest)"
@@ -413,12 +601,15 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
                     title = "Recent club members (newest first)"
                 else:
                     title = "Club members"
-                with_rating = sum(1 for m in members if dupr._member_rating_value(m, "doubles") != "NR")
-                output = f"Found {len(members)} {title.lower()} ({with_rating} with doubles rating, enriched via get_player). Reliability = doubles reliability (0-100).\n\n"
+                with_rating = len(members) if has_range else index.count("doubles")
+                out = [f"Found {len(members)} {title.lower()} ({with_rating} with doubles rating, enriched via get_player; {age_note}). Reliability = doubles reliability (0-100).\n\n"]
                 
                 # Display limit: all if all_members=True or rating filter active, else first 50
-                display_limit = len(members) if (all_members or rating_min is not None or rating_max is not None) else 50
-                for i, member in enumerate(members[:display_limit], 1):
+                display_limit = len(members) if (all_members or has_range) else 50
+                start, end = (offset, offset + page_size) if paged else (0, display_limit)
+                if paged and snap is not None and token.get("t") not in (None, int(snap.fetched_at)):
+                    out.append("Note: the roster was refreshed since the previous page; entries may have shifted.\n\n")
+                for i, member in enumerate(members[start:end], start + 1):
                     name = member.get("fullName", "Unknown")
                     dupr_id = member.get("duprId", member.get("id", "Unknown"))
                     doubles = dupr._member_rating_value(member, "doubles")
@@ -426,16 +617,25 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
                     ratings = member.get("ratings") or {}
                     rel = ratings.get("doublesReliabilityScore")
                     rel_str = str(rel) if rel is not None else "NR"
-                    output += f"{i}. {name} (ID: {dupr_id})\n"
-                    output += f"   Doubles: {doubles}, Singles: {singles}, Reliability: {rel_str}\n\n"
-                if len(members) > display_limit:
-                    output += f"... and {len(members) - display_limit} more members\n"
-                return [TextContent(type="text", text=output)]
+                    out.append(
+                        f"{i}. {name} (ID: {dupr_id})\n"
+                        f"   Doubles: {doubles}, Singles: {singles}, Reliability: {rel_str}\n\n"
+                    )
+                if paged:
+                    if end < len(members):
+                        next_token = _page_token(
+                            "members", str(club_id), o=end, n=page_size, f=filters,
+                            t=int(snap.fetched_at) if snap is not None else None,
+                        )
+                        out.append(f"Showing {start + 1}-{end}. Next page: cursor={next_token}\n")
+                elif len(members) > display_limit:
+                    out.append(f"... and {len(members) - display_limit} more members\n")
+                return [TextContent(type="text", text="".join(out))]
             else:
                 return [TextContent(type="text", text=f"Failed to get club members (status: {rc})")]
         
         elif name == "get_database_stats":
-            with Session(eng) as sess:
+            with Session(get_eng()) as sess:
                 player_count = sess.scalar(select(func.count(Player.id)))
                 match_count = sess.scalar(select(func.count(Match.id)))
                 
@@ -447,7 +647,7 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
         
         elif name == "query_players":
             query = arguments.get("query", "").lower()
-            with Session(eng) as sess:
+            with Session(get_eng()) as sess:
                 from sqlalchemy import cast, String, or_
                 # Search by name or DUPR ID
                 # Try to match as integer first, then as string
@@ -472,20 +672,20 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
                 if not players:
                     return [TextContent(type="text", text=f"No players found matching '{query}'")]
                 
-                output = f"Found {len(players)} players:\n\n"
+                out = [f"Found {len(players)} players:\n\n"]
                 for player in players:
                     rating_str = str(player.rating) if player.rating else "No rating"
-                    output += f"- {player.full_name} (DUPR ID: {player.dupr_id})\n"
-                    output += f"  Rating: {rating_str}\n"
+                    out.append(f"- {player.full_name} (DUPR ID: {player.dupr_id})\n")
+                    out.append(f"  Rating: {rating_str}\n")
                     if player.email:
-                        output += f"  Email: {player.email}\n"
-                    output += "\n"
+                        out.append(f"  Email: {player.email}\n")
+                    out.append("\n")
                 
-                return [TextContent(type="text", text=output)]
+                return [TextContent(type="text", text="".join(out))]
         
         elif name == "get_player_rating_history":
             dupr_id = arguments.get("dupr_id")
-            with Session(eng) as sess:
+            with Session(get_eng()) as sess:
                 # Try to convert to int if possible, otherwise search as string
                 try:
                     dupr_id_int = int(dupr_id)
@@ -615,12 +815,24 @@ async def run_sse(host: str = "0.0.0.0", port: int = 8000):
             return
         await sse_transport.handle_post_message(scope, receive, send)
 
-    starlette_app = Starlette(
-        routes=[
-            Route("/sse", endpoint=handle_sse, methods=["GET"]),
-            Mount("/messages/", app=messages_asgi_with_auth),
-        ]
-    )
+    async def handle_metrics(request):
+        ok, err_response = _check_api_key(request)
+        if not ok:
+            return err_response
+        from dupr_metrics import CLIENT_METRICS
+
+        if request.query_params.get("format") == "json":
+            from starlette.responses import JSONResponse
+            return JSONResponse(CLIENT_METRICS.snapshot())
+        return Response(CLIENT_METRICS.prometheus_text(), media_type="text/plain; version=0.0.4")
+
+    routes = [
+        Route("/sse", endpoint=handle_sse, methods=["GET"]),
+        Mount("/messages/", app=messages_asgi_with_auth),
+    ]
+    if os.getenv("DUPRLY_METRICS", "1") != "0":
+        routes.append(Route("/metrics", endpoint=handle_metrics, methods=["GET"]))
+    starlette_app = Starlette(routes=routes)
     config = uvicorn.Config(starlette_app, host=host, port=port)
     srv = uvicorn.Server(config)
     await srv.serve()
@@ -648,6 +860,10 @@ def main():
         help="Host for SSE server (default: 0.0.0.0)",
     )
     args = parser.parse_args()
+    club_id = get_secret("DUPR_CLUB_ID")
+    if club_id:
+        # warm the get_club_members roster in the background
+        threading.Thread(target=lambda: get_roster().start(club_id), name="roster-warmup", daemon=True).start()
     if args.sse:
         print(f"DUPRLY MCP SSE server: http://{args.host}:{args.port}/sse", file=sys.stderr)
         print("Use http://127.0.0.1:8000/sse (not 0.0.0.0) when connecting from the same machine (e.g. Poke).", file=sys.stderr)
@@ -661,6 +877,5 @@ def main():
 
 
 if __name__ == "__main__":
-    import asyncio
     main()
 
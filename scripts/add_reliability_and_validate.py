@@ -99,6 +99,7 @@ def load_matches_with_reliability(csv_file, dupr_client, n_matches=1000):
     # Load match JSON from DB to get player IDs
     try:
         from dupr_db import open_db, ClubMatchRaw
+        from dupr_raw_codec import decode_raw
         from sqlalchemy import select
         
         eng = open_db()
@@ -109,7 +110,7 @@ def load_matches_with_reliability(csv_file, dupr_client, n_matches=1000):
             for r in result:
                 match_id = str(r.match_id)
                 if match_id in match_dict:
-                    player_ids = get_player_ids_from_match(r.raw_json)
+                    player_ids = get_player_ids_from_match(decode_raw(conn, r.raw_json, r.raw_codec, r.raw_data))
                     if player_ids:
                         match_dict[match_id]['player_ids'] = player_ids
         
@@ -13,6 +13,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from dupr_db import open_db, ClubMatchRaw
+from dupr_raw_codec import load_raw
 from sqlalchemy import select
 from dupr_client import DuprClient
 from dotenv import load_dotenv
@@ -104,13 +105,14 @@ def main():
                 continue
             
             # Try to get player IDs from JSON
-            player_ids = get_player_ids_from_match_json(r.raw_json)
+            data = load_raw(conn, r.raw_json, r.raw_codec, r.raw_data)
+            player_ids = get_player_ids_from_match_json(data)
             if not player_ids:
                 continue
             
             # Try to get reliability from JSON first
             try:
-                data = json.loads(r.raw_json) if isinstance(r.raw_json, str) else r.raw_json
+                data = data
                 teams = data.get("teams", [])
                 rels = [None, None, None, None]
                 
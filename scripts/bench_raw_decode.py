@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark for bulk decoding of stored match JSON.
+
+Decodes every club_match_raw payload of a database into dupr_json.MatchRow
+the way scans used to (stdlib json.loads, then reading the dict), with
+orjson, and with dupr_json.decode_match (typed msgspec structs when
+installed); then times whole-table scans through dupr_raw_codec.map_raw
+(decompression included) in-process and in a process pool. Every path must
+give the same rows.
+
+Usage: python scripts/bench_raw_decode.py [--db dupr.sqlite] [--repeat 3] [--workers 4]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine, select
+
+import dupr_json
+from dupr_raw_codec import RAW_COLUMNS, decode_raw, map_raw
+
+
+def stdlib_row(text):
+    return dupr_json.match_row(json.loads(text))
+
+
+def bench(fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t)
+    return best * 1000, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk decoding of club_match_raw JSON")
+    parser.add_argument("--db", default="dupr.sqlite", help="SQLite file (default: dupr.sqlite)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes for the pool case")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"Error: {args.db} not found")
+        sys.exit(1)
+    engine = create_engine(f"sqlite+pysqlite:///{args.db}", echo=False)
+    with engine.connect() as conn:
+        texts = [decode_raw(conn, *r) for r in conn.execute(select(*RAW_COLUMNS))]
+    if not texts:
+        print("club_match_raw is empty")
+        return
+    mb = sum(len(t) for t in texts) / 1e6
+
+    def scan(fn, workers):
+        with engine.connect() as conn:
+            return list(map_raw(conn, fn, workers=workers))
+
+    cases = [
+        ("decode", "json.loads + dict (stdlib)", lambda: [stdlib_row(t) for t in texts]),
+        ("decode", f"dupr_json.loads + dict ({dupr_json.BACKEND})",
+         lambda: [dupr_json.match_row(dupr_json.loads(t)) for t in texts]),
+        ("decode", f"dupr_json.decode_match ({dupr_json.DECODE_BACKEND})",
+         lambda: [dupr_json.decode_match(t) for t in texts]),
+        ("scan", "map_raw json.loads, 1 process", lambda: scan(stdlib_row, 1)),
+        ("scan", "map_raw decode_match, 1 process", lambda: scan(dupr_json.decode_match, 1)),
+        ("scan", f"map_raw decode_match, {args.workers} processes",
+         lambda: scan(dupr_json.decode_match, args.workers)),
+    ]
+    print(f"{len(texts)} matches ({mb:.1f} MB of JSON), best of {args.repeat}, {os.cpu_count()} CPUs")
+    print("-" * 72)
+    expected = None
+    baseline = {}
+    for group, name, fn in cases:
+        ms, rows = bench(fn, args.repeat)
+        if expected is None:
+            expected = rows
+        assert rows == expected, f"{name} decoded different rows"
+        base = baseline.setdefault(group, ms)
+        print(f"[{group}] {name:44s} {ms:9.1f} ms  {base / ms:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
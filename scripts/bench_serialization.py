@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for response serialization.
+
+Encodes a 1,000-match PlayerMatchesResponse (4 participants per match) the
+way FastAPI does by default (jsonable_encoder + json.dumps) and through
+dupr_json, then encodes the same matches as raw DUPR history dicts the way
+the MCP get_player_matches tool does (2-space indented).
+
+Usage: python scripts/bench_serialization.py [--matches 1000] [--repeat 20]
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import dupr_json
+from backend.api_models import MatchParticipant, MatchSummary, PlayerMatchesResponse
+
+
+def build_response(n: int) -> PlayerMatchesResponse:
+    t0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    matches = []
+    for i in range(n):
+        participants = [
+            MatchParticipant(
+                player_id=str(1000 + (i + j) % 200),
+                side=1 + j // 2,
+                position=1 + j % 2,
+                display_name=f"Player {(i + j) % 200}",
+                doubles_rating=3.0 + ((i * 7 + j) % 150) / 100,
+                reliability=60 + (i + j) % 40,
+            )
+            for j in range(4)
+        ]
+        matches.append(
+            MatchSummary(
+                match_id=str(900000 + i),
+                played_at=t0 + timedelta(hours=i),
+                match_type="SIDE_ONLY",
+                score_for=11,
+                score_against=i % 11,
+                winner_side=1,
+                participants=participants,
+            )
+        )
+    return PlayerMatchesResponse(player_id="1000", matches=matches, next_cursor="WyIyMDI1LTAxLTAxIiwxXQ")
+
+
+def build_raw(n: int) -> list:
+    def player(pid):
+        return {"id": pid, "fullName": f"Player {pid}", "ratings": {"doubles": "3.512", "singles": "NR"}}
+
+    return [
+        {
+            "matchId": 900000 + i,
+            "eventDate": "2025-01-01",
+            "eventName": "Club Night ✓",
+            "matchSource": "CLUB",
+            "teams": [
+                {"player1": player(1000 + i % 200), "player2": player(1001 + i % 200), "game1": 11, "winner": True,
+                 "preMatchRatingAndImpact": {"preMatchDoubleRatingPlayer1": 3.51, "preMatchDoubleRatingPlayer2": 3.42}},
+                {"player1": player(1002 + i % 200), "player2": player(1003 + i % 200), "game1": i % 11, "winner": False,
+                 "preMatchRatingAndImpact": {"preMatchDoubleRatingPlayer1": 3.48, "preMatchDoubleRatingPlayer2": 3.55}},
+            ],
+        }
+        for i in range(n)
+    ]
+
+
+def bench(fn, repeat: int) -> float:
+    fn()  # warm up (adapter caches, imports)
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API / MCP JSON serialization")
+    parser.add_argument("--matches", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    from fastapi.encoders import jsonable_encoder
+
+    response = build_response(args.matches)
+    raw = build_raw(args.matches)
+    assert json.loads(dupr_json.dumpb(response)) == json.loads(json.dumps(jsonable_encoder(response)))
+
+    cases = [
+        ("api", "fastapi default (jsonable_encoder + json)", lambda: json.dumps(jsonable_encoder(response)).encode()),
+        ("api", "model_dump + json.dumps", lambda: json.dumps(response.model_dump(mode="json")).encode()),
+        ("api", f"dupr_json.dumpb ({dupr_json.BACKEND})", lambda: dupr_json.dumpb(response)),
+        ("mcp", "json.dumps(indent=2) += per match", lambda: _concat(raw)),
+        ("mcp", f"dupr_json.dumps(indent) join ({dupr_json.BACKEND})", lambda: _join(raw)),
+    ]
+    print(f"{args.matches} matches, best of {args.repeat}")
+    print("-" * 72)
+    baseline = {}
+    for group, name, fn in cases:
+        ms = bench(fn, args.repeat)
+        base = baseline.setdefault(group, ms)
+        print(f"[{group}] {name:48s} {ms:8.2f} ms  {base / ms:5.1f}x")
+
+
+def _concat(raw):
+    output = ""
+    for i, match in enumerate(raw, 1):
+        output += f"MATCH {i}\n"
+        output += json.dumps(match, indent=2)
+        output += "\n\n"
+    return output
+
+
+def _join(raw):
+    out = []
+    for i, match in enumerate(raw, 1):
+        out.append(f"MATCH {i}\n")
+        out.append(dupr_json.dumps(match, indent=True))
+        out.append("\n\n")
+    return "".join(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the duprly CLI and the MCP stdio server.
+
+Measures, best of --repeat fresh interpreters:
+  - `python duprly.py --help` wall time
+  - `import duprly` / `import duprly_mcp` cumulative time from `python -X importtime`
+  - MCP stdio startup: spawn duprly_mcp.py, send initialize + tools/list,
+    time until the tools/list reply arrives
+
+Usage: python scripts/bench_startup.py [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env["DUPR_CLUB_ID"] = ""  # no background roster warm-up (it would log in)
+    env["PYTHONPATH"] = str(ROOT)
+    return env
+
+
+def cli_help() -> float:
+    t = time.perf_counter()
+    subprocess.run(
+        [sys.executable, str(ROOT / "duprly.py"), "--help"],
+        env=_env(), check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - t
+
+
+def import_time(module: str) -> float:
+    """Cumulative import time of `module` in seconds, from -X importtime."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=_env(), check=True, capture_output=True, text=True,
+    )
+    for line in proc.stderr.splitlines():
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1e6
+    raise RuntimeError(f"no importtime line for {module}")
+
+
+def mcp_stdio() -> float:
+    """Seconds from process spawn to the tools/list response."""
+    requests = [
+        {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {
+            "protocolVersion": "2024-11-05", "capabilities": {},
+            "clientInfo": {"name": "bench_startup", "version": "0"},
+        }},
+        {"jsonrpc": "2.0", "method": "notifications/initialized"},
+        {"jsonrpc": "2.0", "id": 2, "method": "tools/list"},
+    ]
+    t = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, str(ROOT / "duprly_mcp.py")],
+        env=_env(), stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+    try:
+        for req in requests:
+            proc.stdin.write(json.dumps(req) + "\n")
+        proc.stdin.flush()
+        for line in proc.stdout:
+            if json.loads(line).get("id") == 2:
+                return time.perf_counter() - t
+        raise RuntimeError("MCP server exited before answering tools/list")
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def best(fn, repeat: int) -> float:
+    return min(fn() for _ in range(repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark duprly / MCP startup time")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cases = [
+        ("duprly.py --help", cli_help),
+        ("import duprly", lambda: import_time("duprly")),
+        ("import duprly_mcp", lambda: import_time("duprly_mcp")),
+        ("MCP stdio initialize + tools/list", mcp_stdio),
+    ]
+    print(f"best of {args.repeat}")
+    print("-" * 56)
+    for name, fn in cases:
+        print(f"{name:40s} {best(fn, args.repeat) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Sanity check for DuprClient request metrics (dupr_metrics.py).
+
+Runs a DuprClient with its own ClientMetrics against the local fake DUPR
+server with injected 403s and latency, then checks the snapshot against
+the server's own counts (requests, status codes, retries, bytes), that
+latency quantiles are ordered and near the injected delay, and that the
+Prometheus text has consistent histogram series.
+
+Run from repo root: python scripts/check_client_metrics.py
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# never let a fake login overwrite the real saved token
+os.environ["DUPR_TOKEN_FILE"] = os.path.join(tempfile.mkdtemp(), "token.json")
+
+from loguru import logger
+
+from dupr_client import DuprClient
+from dupr_fake_server import Faults, FakeDuprServer
+from dupr_metrics import ClientMetrics
+from dupr_synthetic import SyntheticClub
+
+logger.remove()
+
+
+def main() -> None:
+    club = SyntheticClub(n_players=60, n_matches=600, seed=2)
+    metrics = ClientMetrics()
+    with FakeDuprServer(club, Faults(latency_ms=20, rate_403=0.2), seed=4) as server:
+        client = DuprClient(api_url=server.url, metrics=metrics)
+        assert client.login_user("check@example.com", "secret") == 200
+        pids = [str(p) for p in list(club.players)[:50]]
+        for pid in pids:
+            client.get_player(pid)
+        client.get_member_match_history_p(pids[0])
+        server_stats = server.stats()
+
+    snap = metrics.snapshot()
+    player = snap["endpoints"]["get_player"]
+    history = snap["endpoints"]["get_member_match_history"]
+    assert snap["endpoints"]["login"]["status"] == {"200": 1}
+
+    # every attempt the server saw is in the snapshot, 403 retries included
+    assert player["requests"] == server_stats.get("player 200", 0) + server_stats.get("player 403", 0)
+    assert player["status"].get("403", 0) == server_stats.get("player 403", 0) > 0
+    assert 0 < player["retries"] <= player["status"]["403"]  # a retry can itself get a 403
+    assert snap["totals"]["requests"] == server_stats["requests"]
+    assert history["bytes"] > player["bytes"] / len(pids)
+
+    lat = player["latency_ms"]
+    assert 20 <= lat["p50"] <= lat["p95"] <= lat["p99"] <= lat["max"], lat
+    assert lat["p50"] < 40, lat  # 20 ms injected + local round trip
+
+    text = metrics.prometheus_text()
+    assert '# TYPE dupr_client_request_duration_seconds histogram' in text
+    count = f'dupr_client_request_duration_seconds_count{{endpoint="get_player"}} {player["requests"]}'
+    inf = f'dupr_client_request_duration_seconds_bucket{{endpoint="get_player",le="+Inf"}} {player["requests"]}'
+    assert count in text and inf in text
+    assert f'dupr_client_retries_total{{endpoint="get_player"}} {player["retries"]}' in text
+
+    print(f"get_player: {player['requests']} requests, {player['retries']} retries, "
+          f"p50 {lat['p50']} ms, p95 {lat['p95']} ms, p99 {lat['p99']} ms")
+    print("OK: client metrics")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Sanity check for the local fake DUPR server (dupr_fake_server.py).
+
+Runs a real DuprClient against an in-process FakeDuprServer:
+  1. every client call the crawler / MCP server use returns the synthetic
+     club's data (paging included)
+  2. injected 429s show up in the server stats
+  3. a burst without a RateLimiter trips the server-side rate limit, and the
+     same burst through RateLimiter does not
+
+Run from repo root: python scripts/check_fake_dupr_server.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# never let a fake login overwrite the real saved token
+os.environ["DUPR_TOKEN_FILE"] = os.path.join(tempfile.mkdtemp(), "token.json")
+
+from loguru import logger
+
+from dupr_client import DuprClient, RateLimiter
+from dupr_fake_server import Faults, FakeDuprServer
+from dupr_synthetic import SyntheticClub
+
+logger.remove()
+
+
+def client_for(server: FakeDuprServer, **kwargs) -> DuprClient:
+    client = DuprClient(api_url=server.url, **kwargs)
+    assert client.auth_user("check@example.com", "secret") in (0, 200)  # 0: saved token reused
+    return client
+
+
+def check_endpoints(club: SyntheticClub) -> None:
+    with FakeDuprServer(club) as server:
+        client = client_for(server)
+        rc, members = client.get_members_by_club(str(club.club_id))
+        assert rc == 200 and len(members) == len(club.members), (rc, len(members))
+
+        pid = members[0]["id"]
+        rc, player = client.get_player(str(pid))
+        assert rc == 200 and player["ratings"]["doubles"] == club.players[pid]["ratings"]["doubles"]
+        rc, player = client.get_player(club.players[pid]["duprId"])  # short id -> search fallback
+        assert rc == 200 and player["id"] == pid
+
+        expected = club.history(pid)
+        rc, matches = client.get_member_match_history_p(str(pid))
+        assert rc == 200 and [m["matchId"] for m in matches] == [m["matchId"] for m in expected]
+        rc, window, total = client.get_member_match_history_page(str(pid), offset=5, limit=7)
+        assert rc == 200 and total == len(expected) and window == expected[5:12]
+
+        rc, found = client.search_players(club.players[pid]["fullName"].split()[1])
+        assert rc == 200 and any(h["id"] == pid for h in found["hits"])
+        ids = [m["id"] for m in members[:4]]
+        rc, score = client.get_expected_score([
+            {"player1Id": ids[0], "player2Id": ids[1]},
+            {"player1Id": ids[2], "player2Id": ids[3]},
+        ])
+        assert rc == 200 and len(score["teams"]) == 2
+        rc, profile = client.get_profile()
+        assert rc == 200 and profile["id"] in club.players
+        print(f"endpoints OK ({server.stats()['requests']} requests)")
+
+
+def check_injected_429(club: SyntheticClub) -> None:
+    with FakeDuprServer(club, Faults(rate_429=0.2), seed=1) as server:
+        client = client_for(server)
+        for pid in list(club.players)[:40]:
+            client.get_player(str(pid))
+        stats = server.stats()
+        n429 = stats.get("player 429", 0)
+        assert 0 < n429 < 40, stats
+        print(f"injected 429s OK ({n429} of 40 player calls)")
+
+
+def check_rate_limit(club: SyntheticClub) -> None:
+    per_min = 1200  # 20/s with 1s of burst
+    pids = [str(p) for p in list(club.players)[:60]]
+    with FakeDuprServer(club, Faults(rate_limit_per_min=per_min)) as server:
+        client = client_for(server)
+        server.reset_stats()
+        for pid in pids:
+            client.get_player(pid)
+        unthrottled = server.stats().get("player 429", 0)
+
+        client = client_for(server, rate_limiter=RateLimiter(per_min))
+        time.sleep(1.0)  # let the bucket refill
+        server.reset_stats()
+        t = time.perf_counter()
+        for pid in pids:
+            client.get_player(pid)
+        elapsed = time.perf_counter() - t
+        throttled = server.stats().get("player 429", 0)
+    print(f"rate limit: {unthrottled} x 429 without RateLimiter, {throttled} with ({elapsed:.1f}s)")
+    assert unthrottled > 0 and throttled == 0
+
+
+def main() -> None:
+    club = SyntheticClub(n_players=120, n_matches=1500, seed=7)
+    check_endpoints(club)
+    check_injected_429(club)
+    check_rate_limit(club)
+    print("OK: fake DUPR server")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Sanity check for the memory-mapped match array (dupr_match_array.py).
+
+  1. export: a synthetic club written with write_to_db exports one record
+     per match, oldest first, with the ratings / impacts / ids of the JSON
+  2. shadow: MatchArrayIndex over the mapped file gives every player the
+     same NormalizedMatch list as MatchIndex over the raw JSON, and the
+     same shadow-reset results as replaying the raw match list
+  3. sharing: worker processes opening the same file reproduce the
+     in-process sweep, and a file with another layout is refused
+
+Run from repo root: python scripts/check_match_array.py
+"""
+
+import json
+import random
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+from sqlalchemy import create_engine
+
+from dupr_db import ensure_schema
+from dupr_match_array import MATCH_DTYPE, build_match_array, event_day, open_match_array, write_match_array
+from dupr_predictor import DuprPredictor
+from dupr_shadow_calculator import MatchArrayIndex, MatchIndex, simulate_shadow_reset
+from dupr_synthetic import iter_matches, make_players, write_to_db
+
+MODEL_FILE = Path(__file__).resolve().parent.parent / "dupr_model.json"
+WINDOWS = (8, 16, 24)
+
+
+def sweep(path, player_ids):
+    """Shadow-reset every player from a mapped file (runs in worker processes)."""
+    predictor = DuprPredictor(str(MODEL_FILE))
+    index = MatchArrayIndex.open(path)
+    return [simulate_shadow_reset(predictor, index, pid, windows=WINDOWS) for pid in player_ids]
+
+
+def main() -> None:
+    rng = random.Random(7)
+    truth = DuprPredictor(str(MODEL_FILE))
+    players = make_players(150, rng)
+    matches = [json.loads(json.dumps(m)) for m in iter_matches(players, 4000, rng, predictor=truth)]
+
+    tmp = Path(tempfile.mkdtemp())
+    engine = create_engine(f"sqlite+pysqlite:///{tmp / 'club.sqlite'}", echo=False)
+    ensure_schema(engine)
+    write_to_db(engine, players, iter(matches), normalized=False)
+    with engine.connect() as conn:
+        arr = build_match_array(conn)
+    path = str(tmp / "club_matches.npy")
+    write_match_array(arr, path)
+
+    mapped = open_match_array(path)
+    assert isinstance(mapped, np.memmap) and not mapped.flags.writeable
+    assert mapped.dtype == MATCH_DTYPE and MATCH_DTYPE.itemsize == 152
+    assert len(mapped) == len(matches)
+    assert np.all(np.diff(mapped["event_day"]) >= 0)
+    by_id = {m["matchId"]: m for m in matches}
+    for rec in mapped[::251]:
+        m = by_id[int(rec["match_id"])]
+        assert rec["event_day"] == event_day(m["eventDate"])
+        t1, t2 = m["teams"]
+        pre = [t["preMatchRatingAndImpact"] for t in (t1, t2)]
+        assert rec["rating"].tolist() == [p[f"preMatchDoubleRatingPlayer{n}"] for p in pre for n in (1, 2)]
+        assert rec["impact"].tolist() == [p[f"matchDoubleRatingImpactPlayer{n}"] for p in pre for n in (1, 2)]
+        assert rec["player"].tolist() == [int(t[f"player{n}"]["id"]) for t in (t1, t2) for n in (1, 2)]
+        assert rec["winner"] == (1 if t1["winner"] else 2)
+    print(f"export OK ({len(mapped)} matches, {Path(path).stat().st_size / 1e6:.1f} MB)")
+
+    by_json = MatchIndex(matches)
+    by_array = MatchArrayIndex(mapped)
+    assert len(by_array) == len(by_json)
+    assert sorted(by_array.player_ids()) == sorted(by_json.player_ids())
+    for pid in by_json.player_ids():
+        assert by_array.matches_for_player(pid) == by_json.matches_for_player(pid), pid
+    ids = sorted(by_json.player_ids())
+    expected = [simulate_shadow_reset(truth, matches, pid, windows=WINDOWS) for pid in ids]
+    assert sweep(path, ids) == expected
+    assert "not-a-player" not in by_array and by_array.match_count(ids[0]) > 0
+    print(f"shadow OK ({len(ids)} players)")
+
+    chunks = [ids[i::3] for i in range(3)]
+    with ProcessPoolExecutor(max_workers=3) as pool:
+        results = list(pool.map(sweep, [path] * 3, chunks))
+    by_player = {r["player_id"]: r for chunk in results for r in chunk}
+    assert [by_player[pid] for pid in ids] == expected
+    print("worker processes OK (3 workers, one shared file)")
+
+    other = str(tmp / "other.npy")
+    np.save(other, np.zeros(3, dtype=[("match_id", "<i8")]))
+    try:
+        open_match_array(other)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("open_match_array accepted a foreign layout")
+    print("OK: match array")
+
+
+if __name__ == "__main__":
+    main()
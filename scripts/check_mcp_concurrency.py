@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Sanity check that MCP tool calls run concurrently.
+
+Two slow tool calls (a 1s DUPR profile fetch and a 1s player search, faked
+in-process) are issued at once through call_tool. With tool bodies on the
+worker pool they overlap and finish in about 1s; run inline on the event
+loop they would take about 2s. A cheap DB tool issued alongside must not
+wait for either.
+
+Run from repo root: python scripts/check_mcp_concurrency.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("DUPR_USERNAME", "check@example.com")
+os.environ.setdefault("DUPR_PASSWORD", "unused")
+
+import duprly_mcp
+from dupr_client import DuprClient
+
+SLOW_SEC = 1.0
+
+
+class SlowClient(DuprClient):
+    """DuprClient whose API calls just sleep; no network is touched."""
+
+    def __init__(self):
+        super().__init__()
+        self.access_token = "check"
+
+    def get_profile(self):
+        time.sleep(SLOW_SEC)
+        return 200, {"fullName": "Check Player", "duprId": "CHECK1", "ratings": {}}
+
+    def search_players(self, query, limit=25, **kwargs):
+        time.sleep(SLOW_SEC)
+        return 200, {"total": 0, "hits": []}
+
+
+async def _timed(name: str, args: dict) -> float:
+    t = time.perf_counter()
+    result = await duprly_mcp.call_tool(name, args)
+    assert result and not result[0].text.startswith("Error"), result[0].text
+    return time.perf_counter() - t
+
+
+async def main() -> None:
+    duprly_mcp.dupr = SlowClient()
+    await _timed("get_database_stats", {})  # first call loads SQLAlchemy and opens the DB
+    t = time.perf_counter()
+    profile, search, stats = await asyncio.gather(
+        _timed("get_my_profile", {}),
+        _timed("search_players", {"query": "check"}),
+        _timed("get_database_stats", {}),
+    )
+    total = time.perf_counter() - t
+    print(f"get_my_profile {profile:.2f}s, search_players {search:.2f}s, "
+          f"get_database_stats {stats:.2f}s, wall {total:.2f}s")
+    assert total < 1.5 * SLOW_SEC, f"slow tools did not overlap (wall {total:.2f}s)"
+    assert stats < 0.5 * SLOW_SEC, f"fast tool waited behind slow ones ({stats:.2f}s)"
+    print("OK: tool calls run concurrently")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Sanity check for the predictor-driven synthetic generator (dupr_synthetic.py).
+
+  1. model recovery: impacts generated with DuprPredictor as ground truth
+     (plus noise) are extracted from the match JSON like the fit scripts do,
+     and refitting K and scale recovers the model's values
+  2. write_to_db: club_match_raw, club_match_player and match tables hold
+     every match, ORM reads of the bulk-inserted rows and the SQL wide rows
+     agree with the JSON, and a second load of the same matches writes nothing
+
+Run from repo root: python scripts/check_synthetic_generator.py
+"""
+
+import copy
+import json
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+from scipy.optimize import minimize
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from dupr_db import ClubMatchPlayer, ClubMatchRaw, Match, Player, club_match_wide_select, ensure_schema
+from dupr_predictor import DuprPredictor
+from dupr_synthetic import iter_matches, make_players, write_to_db
+
+MODEL_FILE = Path(__file__).resolve().parent.parent / "dupr_model.json"
+
+
+def arrays(matches):
+    """(ratings, games1, winner, reliabilities, impacts) from match JSON."""
+    ratings, games1, winner, rels, impacts = [], [], [], [], []
+    for m in matches:
+        t1, t2 = m["teams"]
+        row_r, row_i, row_rel = [], [], []
+        for team in (t1, t2):
+            pre = team["preMatchRatingAndImpact"]
+            for n in (1, 2):
+                row_r.append(pre[f"preMatchDoubleRatingPlayer{n}"])
+                row_i.append(pre[f"matchDoubleRatingImpactPlayer{n}"])
+                row_rel.append(team[f"player{n}"]["ratings"]["doublesReliabilityScore"])
+        ratings.append(row_r)
+        impacts.append(row_i)
+        rels.append(row_rel)
+        games1.append(t1["game1"])
+        winner.append(1 if t1["winner"] else 2)
+    return np.array(ratings), np.array(games1), np.array(winner), np.array(rels, float), np.array(impacts)
+
+
+def check_model_recovery(truth: DuprPredictor) -> None:
+    rng = random.Random(3)
+    players = make_players(400, rng)
+    matches = list(iter_matches(players, 20000, rng, predictor=truth, impact_noise=0.002))
+    ratings, games1, winner, rels, impacts = arrays(matches)
+
+    trial = copy.copy(truth)
+
+    def loss(params):
+        trial.K, trial.scale = params
+        return float(np.mean((trial.predict_impacts_batch(ratings, games1, winner, rels) - impacts) ** 2))
+
+    fit = minimize(loss, x0=[truth.K * 2, truth.scale * 0.5], method="Nelder-Mead",
+                   options={"xatol": 1e-8, "fatol": 1e-12, "maxiter": 2000})
+    k, scale = fit.x
+    print(f"model recovery: K {k:.5f} (true {truth.K:.5f}), scale {scale:.1f} (true {truth.scale:.1f})")
+    assert abs(k - truth.K) / truth.K < 0.02, (k, truth.K)
+    assert abs(scale - truth.scale) / truth.scale < 0.05, (scale, truth.scale)
+
+    spread = np.ptp([p["_rating"] for p in players])
+    assert spread > 0.5, f"ratings collapsed (range {spread:.2f})"
+
+
+def check_write_to_db(truth: DuprPredictor) -> None:
+    rng = random.Random(5)
+    players = make_players(120, rng)
+    matches = list(iter_matches(players, 3000, rng, predictor=truth))
+    path = Path(tempfile.mkdtemp()) / "synthetic.sqlite"
+    engine = create_engine(f"sqlite+pysqlite:///{path}", echo=False)
+    ensure_schema(engine)
+
+    written = write_to_db(engine, players, (json.loads(json.dumps(m)) for m in matches), batch_size=700)
+    assert written == len(matches), written
+    assert write_to_db(engine, players, iter(matches)) == 0  # all already stored
+
+    with Session(engine) as sess:
+        assert sess.scalar(select(func.count()).select_from(ClubMatchRaw)) == len(matches)
+        assert sess.scalar(select(func.count()).select_from(ClubMatchPlayer)) == 4 * len(matches)
+        assert sess.scalar(select(func.count()).select_from(Match)) == len(matches)
+        assert sess.scalar(select(func.count()).select_from(Player)) == len(players)
+        for m in matches[::397]:
+            stored = Match.get_by_id(sess, m["matchId"])
+            assert str(stored.date) == m["eventDate"]
+            for team, jt in zip(stored.teams, m["teams"]):
+                assert team.score1 == jt["game1"] and bool(team.is_winner) == jt["winner"]
+                assert [p.dupr_id for p in team.players] == [jt["player1"]["id"], jt["player2"]["id"]]
+            raw = sess.scalars(select(ClubMatchRaw).where(ClubMatchRaw.match_id == m["matchId"])).one()
+            assert raw.payload() == m
+        wide = sess.execute(club_match_wide_select()).all()
+        want_r, want_games1, want_winner, want_rel, want_i = arrays(matches)
+        assert [w.match_id for w in wide] == [m["matchId"] for m in matches]
+        assert np.allclose([[w.r1, w.r2, w.r3, w.r4] for w in wide], want_r)
+        assert np.allclose([[w.imp1, w.imp2, w.imp3, w.imp4] for w in wide], want_i)
+        assert np.allclose([[w.rel1, w.rel2, w.rel3, w.rel4] for w in wide], want_rel)
+        assert [w.games1 for w in wide] == list(want_games1)  # synthetic matches are one game
+        assert [1 if w.team1_won else 2 for w in wide] == list(want_winner)
+        p = sess.scalars(select(Player).where(Player.dupr_id == players[0]["id"])).one()
+        assert p.rating is not None and p.full_name == players[0]["fullName"]
+    print(f"write_to_db OK ({written} matches, {len(players)} players)")
+
+
+def main() -> None:
+    truth = DuprPredictor(str(MODEL_FILE))
+    check_model_recovery(truth)
+    check_write_to_db(truth)
+    print("OK: synthetic generator")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Compress (or decompress) the club_match_raw payloads of a database in place.
+
+Adds the raw_codec / raw_data columns to an older DB, trains a dictionary
+on a sample of rows, rewrites every row in batches with that dictionary and
+VACUUMs so the file actually shrinks. New rows written by the crawler then
+use the same dictionary (DUPRLY_RAW_CODEC=auto). --codec none restores
+plain JSON, switches "auto" writers back to it and drops the dictionaries.
+A dictionary is only dropped once no row uses it, so rows a running
+crawler wrote with the old one stay readable (re-run to convert them).
+Safe to re-run: rows already in the target format are skipped, and an
+interrupted run leaves a readable mix.
+
+Run from repo root:
+  python scripts/compress_club_match_raw.py                  # zstd if installed, else zlib
+  python scripts/compress_club_match_raw.py --codec zlib
+  python scripts/compress_club_match_raw.py --codec none     # back to plain JSON
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import bindparam, create_engine, delete, func, select, text, update
+from sqlalchemy.orm import Session
+
+from dupr_db import ClubMatchRaw, RawJsonDict, ensure_schema
+from dupr_raw_codec import (
+    ACTIVE_TTL_SEC,
+    RAW_COLUMNS,
+    compress,
+    decode_raw,
+    sample_payloads,
+    save_dictionary,
+    train_dictionary,
+    zstandard,
+)
+
+
+def stored_bytes(conn) -> int:
+    return conn.execute(select(
+        func.coalesce(func.sum(func.length(ClubMatchRaw.raw_json) + func.coalesce(func.length(ClubMatchRaw.raw_data), 0)), 0)
+    )).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compress club_match_raw payloads in place")
+    parser.add_argument("--db", default="dupr.sqlite", help="SQLite file (default: dupr.sqlite)")
+    parser.add_argument("--codec", choices=["zstd", "zlib", "none"],
+                        default="zstd" if zstandard is not None else "zlib")
+    parser.add_argument("--samples", type=int, default=2000, help="Rows to train the dictionary on")
+    parser.add_argument("--batch", type=int, default=2000, help="Rows rewritten per transaction")
+    parser.add_argument("--no-vacuum", action="store_true", help="Skip VACUUM (file keeps its size)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"Error: {args.db} not found")
+        sys.exit(1)
+    engine = create_engine(f"sqlite+pysqlite:///{args.db}", echo=False)
+    ensure_schema(engine)  # adds raw_codec / raw_data to an older club_match_raw
+
+    file_before = os.path.getsize(args.db)
+    with engine.connect() as conn:
+        rows = conn.execute(select(func.count()).select_from(ClubMatchRaw)).scalar()
+        bytes_before = stored_bytes(conn)
+    print(f"{rows} rows, {bytes_before / 1e6:.1f} MB of payload, file {file_before / 1e6:.1f} MB")
+    if not rows:
+        return
+
+    target = None  # raw_codec value every row should end up with
+    dictionary = None
+    dict_id = None
+    switched = time.monotonic()
+    if args.codec == "none":
+        # a codec "none" marker as the newest dictionary sends "auto" writers back to plain JSON
+        with Session(engine) as sess:
+            dict_id = save_dictionary(sess, "none", b"")
+            sess.commit()
+    else:
+        t0 = time.perf_counter()
+        with Session(engine) as sess:
+            samples = sample_payloads(sess, args.samples)
+            dictionary = train_dictionary(samples, args.codec)
+            dict_id = save_dictionary(sess, args.codec, dictionary)
+            sess.commit()
+        target = f"{args.codec}:{dict_id}"
+        switched = time.monotonic()
+        print(f"trained {args.codec} dictionary {dict_id} ({len(dictionary) // 1024} KB, "
+              f"{len(samples)} samples) in {time.perf_counter() - t0:.1f}s")
+
+    t0 = time.perf_counter()
+    changed = 0
+    last_id = 0
+    stmt = update(ClubMatchRaw).where(ClubMatchRaw.id == bindparam("pk")).values(
+        raw_json=bindparam("j"), raw_codec=bindparam("c"), raw_data=bindparam("d")
+    )
+    while True:
+        with engine.begin() as conn:
+            batch = conn.execute(
+                select(ClubMatchRaw.id, *RAW_COLUMNS)
+                .where(ClubMatchRaw.id > last_id)
+                .order_by(ClubMatchRaw.id)
+                .limit(args.batch)
+            ).all()
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            params = []
+            for pk, raw_json, raw_codec, raw_data in batch:
+                if raw_codec == target:
+                    continue
+                payload = decode_raw(conn, raw_json, raw_codec, raw_data)
+                if target is None:
+                    params.append({"pk": pk, "j": payload, "c": None, "d": None})
+                else:
+                    data = compress(payload, args.codec, dict_id, dictionary)
+                    params.append({"pk": pk, "j": "", "c": target, "d": data})
+            if params:
+                conn.execute(stmt, params)
+                changed += len(params)
+        print(f"  {changed} rows rewritten (through id {last_id})", end="\r")
+    print(f"\nrewrote {changed} rows in {time.perf_counter() - t0:.1f}s")
+
+    # running writers may still hold the previous dictionary for ACTIVE_TTL_SEC;
+    # let that lapse so their rows are in the table before deciding what is unused
+    with engine.connect() as conn:
+        old = conn.execute(select(func.count()).select_from(RawJsonDict).where(RawJsonDict.dict_id != dict_id)).scalar()
+    wait = ACTIVE_TTL_SEC - (time.monotonic() - switched)
+    if old and wait > 0:
+        time.sleep(wait)
+    with engine.begin() as conn:
+        # dictionaries no row refers to any more
+        used = {c.split(":", 1)[1] for c in conn.execute(
+            select(ClubMatchRaw.raw_codec).where(ClubMatchRaw.raw_codec.like("%:%")).distinct()
+        ).scalars()}
+        conn.execute(delete(RawJsonDict).where(RawJsonDict.dict_id.not_in(used | {dict_id})))
+        stragglers = conn.execute(
+            select(func.count()).select_from(ClubMatchRaw)
+            .where(ClubMatchRaw.raw_codec.is_distinct_from(target))
+        ).scalar()
+    if stragglers:
+        print(f"warning: {stragglers} rows were written in another format while this ran; "
+              f"re-run to convert them" + (" and drop their dictionaries" if used - {dict_id} else ""))
+
+    with engine.connect() as conn:
+        bytes_after = stored_bytes(conn)
+    if not args.no_vacuum:
+        with engine.connect() as conn:
+            conn.execute(text("VACUUM"))
+    file_after = os.path.getsize(args.db)
+    print(f"payload {bytes_before / 1e6:.1f} -> {bytes_after / 1e6:.1f} MB "
+          f"({bytes_after / max(1, bytes_before):.1%}), file {file_before / 1e6:.1f} -> {file_after / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,10 @@ Crawl all club members' match history and store club matches in the local DB.
 Used to collect data for reverse-engineering the DUPR rating algorithm.
 
 Run from repo root with .env set (DUPR_USERNAME, DUPR_PASSWORD, DUPR_CLUB_ID).
-Usage: python scripts/crawl_club_matches.py [--limit N] [--delay SEC]
+Usage: python scripts/crawl_club_matches.py [--limit N] [--delay SEC] [--profile]
+
+Progress events go to the crawl_event table (and --telemetry-jsonl if
+given); watch them with scripts/crawl_status.py --watch 5.
 """
 
 import os
@@ -21,7 +24,12 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from dupr_client import DuprClient
-from dupr_db import open_db, ClubMatchRaw
+from dupr_crawl_telemetry import CrawlTelemetry
+from dupr_db import open_db, ClubMatchPlayer, ClubMatchRaw, MatchFeature, mark_db_written
+from dupr_metrics import ClientMetrics
+from dupr_raw_codec import encode_raw
+from dupr_predictor import DuprPredictor
+from dupr_profile import add_profile_arguments, profiling_from_args, span
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
@@ -69,19 +77,30 @@ def get_reliability_from_player(player_data):
             pass
     return None
 
-def enrich_match_with_reliability(match_data, dupr_client):
-    """Fetch reliability for all players and add to match data"""
+def enrich_match_with_reliability(match_data, dupr_client, cache=None, stats=None):
+    """
+    Fetch reliability for all players and add to match data. `cache`
+    (player id -> reliability) skips players already fetched this run;
+    `stats["hits"]` counts the calls it saved.
+    """
     player_ids = get_player_ids_from_match(match_data)
     if not player_ids:
         return match_data
     
     reliabilities = []
     for pid in player_ids:
+        if cache is not None and pid in cache:
+            reliabilities.append(cache[pid])
+            if stats is not None:
+                stats["hits"] = stats.get("hits", 0) + 1
+            continue
         try:
             rc, player_data = dupr_client.get_player(pid)
             if rc == 200 and player_data:
                 rel = get_reliability_from_player(player_data)
                 reliabilities.append(rel)
+                if cache is not None:
+                    cache[pid] = rel
             else:
                 reliabilities.append(None)
             time.sleep(0.05)  # Small delay to avoid rate limits
@@ -107,8 +126,21 @@ def main():
     parser.add_argument("--limit", type=int, default=0, help="Max members to process (0 = all)")
     parser.add_argument("--max-matches", type=int, default=0, help="Stop after storing this many club matches (0 = no limit)")
     parser.add_argument("--delay", type=float, default=0.5, help="Delay between member API calls (seconds); increase if you see 429 rate limits")
+    parser.add_argument("--model-file", default="dupr_model.json", help="Predictor model used for expected_points_for in match_feature")
+    parser.add_argument("--telemetry-jsonl", default=None, help="Also append progress events to this JSONL file")
+    add_profile_arguments(parser, "crawl-profile.collapsed")
     args = parser.parse_args()
 
+    with profiling_from_args(args):
+        crawl(args)
+
+def crawl(args):
+    try:
+        predictor = DuprPredictor(args.model_file)
+    except FileNotFoundError:
+        print(f"[WARN] {args.model_file} not found; match_feature.expected_points_for will be empty")
+        predictor = None
+
     club_id = os.getenv("DUPR_CLUB_ID")
     if not club_id:
         print("Error: DUPR_CLUB_ID must be set in .env")
@@ -122,7 +154,7 @@ def main():
         sys.exit(1)
 
     print("Authenticating...")
-    dupr = DuprClient(verbose=False)
+    dupr = DuprClient(verbose=False, metrics=ClientMetrics())
     dupr.auth_user(username, password)
 
     print(f"Fetching club members (club_id={club_id})...")
@@ -151,6 +183,11 @@ def main():
         result = sess.execute(select(ClubMatchRaw.match_id))
         existing_match_ids = {r[0] for r in result}
     print(f"Found {len(existing_match_ids)} existing matches in DB")
+
+    telemetry = CrawlTelemetry(eng, source="club_crawl", metrics=dupr.metrics, jsonl_path=args.telemetry_jsonl)
+    telemetry.start(len(member_ids), f"club_id={club_id}")
+    reliability_cache = {}
+    cache_stats = {"hits": 0}
     
     seen_match_ids = set()
     new_matches = 0
@@ -169,9 +206,12 @@ def main():
             print(f"[{i:03d}] Progress: {i}/{len(member_ids)} members, {new_matches} matches stored, {reliability_fetched} with reliability")
         
         rc, matches = dupr.get_member_match_history_p(mid)
+        telemetry.members_done = i
         if rc != 200:
+            telemetry.tick()
             continue
         total_matches_fetched += len(matches)
+        telemetry.matches_fetched = total_matches_fetched
         
         for m in matches:
             match_id = m.get("matchId") or m.get("id")
@@ -191,7 +231,8 @@ def main():
             
             # Enrich with reliability at crawl time
             try:
-                enriched_match = enrich_match_with_reliability(m, dupr)
+                enriched_match = enrich_match_with_reliability(m, dupr, reliability_cache, cache_stats)
+                telemetry.cache_hits = cache_stats["hits"]
                 rel_data = enriched_match.get("_crawl_metadata", {}).get("reliability", {})
                 if all(rel_data.get(f"player{i}") is not None for i in range(1,5)):
                     reliability_fetched += 1
@@ -200,37 +241,48 @@ def main():
                 enriched_match = m
             
             event_date = enriched_match.get("eventDate", "")
-            raw_json = json.dumps(enriched_match)
+            with span("json"):
+                raw_json = json.dumps(enriched_match)
+            with span("predict"):
+                feature = MatchFeature.from_json(enriched_match, predictor)
             
             batch.append({
                 'match_id': match_id,
                 'club_id': club_id,
                 'event_date': event_date,
-                'raw_json': raw_json
+                'raw_json': raw_json,
+                'feature': feature,
+                'players': ClubMatchPlayer.from_json(enriched_match),
             })
             
             # Commit batch when it reaches batch_size
             if len(batch) >= batch_size:
                 batch_num += 1
                 print(f"[BATCH {batch_num:03d}] Committing batch of {len(batch)} matches...")
-                with Session(eng) as sess:
+                with span("db_write"), Session(eng) as sess:
                     for item in batch:
                         row = ClubMatchRaw(
                             match_id=item['match_id'],
                             club_id=item['club_id'],
                             event_date=item['event_date'],
-                            raw_json=item['raw_json'],
+                            **encode_raw(sess, item['raw_json']),
                         )
                         sess.add(row)
+                        if item['feature'] is not None:
+                            MatchFeature.save(sess, item['feature'])
+                        sess.add_all(item['players'])
                     sess.commit()
+                mark_db_written()
                 print(f"[BATCH {batch_num:03d}] ✓ Committed {len(batch)} matches (total stored: {new_matches + len(batch)})")
                 new_matches += len(batch)
+                telemetry.matches_stored = new_matches
                 batch = []
             
             if args.max_matches > 0 and new_matches >= args.max_matches:
                 print(f"[STOP] Reached --max-matches={args.max_matches}, stopping.")
                 break
         
+        telemetry.tick()
         if args.max_matches > 0 and new_matches >= args.max_matches:
             break
         time.sleep(args.delay)
@@ -239,24 +291,31 @@ def main():
     if batch:
         batch_num += 1
         print(f"\n[BATCH {batch_num:03d}] Committing final batch of {len(batch)} matches...")
-        with Session(eng) as sess:
+        with span("db_write"), Session(eng) as sess:
             for item in batch:
                 row = ClubMatchRaw(
                     match_id=item['match_id'],
                     club_id=item['club_id'],
                     event_date=item['event_date'],
-                    raw_json=item['raw_json'],
+                    **encode_raw(sess, item['raw_json']),
                 )
                 sess.add(row)
+                if item['feature'] is not None:
+                    MatchFeature.save(sess, item['feature'])
+                sess.add_all(item['players'])
             sess.commit()
+        mark_db_written()
         print(f"[BATCH {batch_num:03d}] ✓ Committed {len(batch)} matches")
         new_matches += len(batch)
+        telemetry.matches_stored = new_matches
+    telemetry.finish()
 
     print(f"\n[FINISH] Crawl complete!")
     print(f"[STATS] Fetched {total_matches_fetched} total match records")
     print(f"[STATS] Stored {new_matches} new club matches")
     print(f"[STATS] Matches with reliability: {reliability_fetched}/{new_matches}")
     print(f"[STATS] Total unique club matches: {len(seen_match_ids)}")
+    print(f"[STATS] Player lookups saved by cache: {cache_stats['hits']}")
 
 if __name__ == "__main__":
     main()
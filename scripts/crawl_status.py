@@ -1,22 +1,81 @@
 #!/usr/bin/env python3
 """
-Print crawler status from the local DB (match counts, recent activity).
+Print crawler status: progress, throughput and ETA from the crawl_event
+telemetry the crawler writes, plus match counts and recent activity from
+the local DB.
 Run on the VPS: /root/duprly/.venv/bin/python scripts/crawl_status.py
-Or from repo root: python scripts/crawl_status.py
+Or from repo root: python scripts/crawl_status.py [--watch 5] [--jsonl crawl.jsonl]
 """
 
+import argparse
 import sys
+import time
 from pathlib import Path
 from datetime import datetime
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+from dupr_crawl_telemetry import DEFAULT_INTERVAL, read_jsonl, run_events
 from dupr_db import open_db, ClubMatchRaw
 from sqlalchemy.orm import Session
 from sqlalchemy import select, func
 
-def main():
-    eng = open_db()
+
+def _duration(sec):
+    if sec is None:
+        return "?"
+    sec = int(sec)
+    if sec >= 3600:
+        return f"{sec // 3600}h {sec % 3600 // 60:02d}m"
+    if sec >= 60:
+        return f"{sec // 60}m {sec % 60:02d}s"
+    return f"{sec}s"
+
+
+def _pct(part, whole):
+    return f" ({100.0 * part / whole:.1f}%)" if whole else ""
+
+
+def print_telemetry(events, now=None):
+    """Render the last event of a run, with throughput since its start."""
+    now = now or time.time()
+    first, last = events[0], events[-1]
+    age = now - last["ts"]
+    if last["kind"] in ("finish", "error"):
+        state = "finished" if last["kind"] == "finish" else f"failed: {last.get('message')}"
+    elif age > 3 * DEFAULT_INTERVAL:
+        state = f"no events for {_duration(age)} (stopped?)"
+    else:
+        state = "running"
+    elapsed = last["ts"] - first["ts"]
+    started = datetime.fromtimestamp(first["ts"]).strftime("%Y-%m-%d %H:%M:%S")
+
+    print(f"Crawl {last['run_key']}: {state}")
+    print(f"  started    {started} ({_duration(elapsed)} elapsed, last event {_duration(age)} ago)")
+    print(f"  members    {last['members_done']}/{last['members_total']}"
+          f"{_pct(last['members_done'], last['members_total'])}")
+    print(f"  pages      {last['pages_fetched']}")
+    print(f"  matches    {last['matches_fetched']} fetched, {last['matches_stored']} stored")
+    print(f"  api calls  {last['api_calls']} made, {last['cache_hits']} saved by cache"
+          f"{_pct(last['cache_hits'], last['api_calls'] + last['cache_hits'])}")
+    if elapsed > 0:
+        overall = (last["api_calls"] - first["api_calls"]) / elapsed
+        stored_per_min = 60.0 * (last["matches_stored"] - first["matches_stored"]) / elapsed
+        recent = last.get("req_per_sec")
+        recent_s = f"{recent:.2f} req/s recent, " if recent is not None else ""
+        print(f"  throughput {recent_s}{overall:.2f} req/s overall, {stored_per_min:.1f} matches stored/min")
+    if state == "running":
+        eta = last.get("eta_sec")
+        if eta is None:
+            print("  ETA        ? (not enough progress yet)")
+        else:
+            # the ETA was computed at the last event
+            remaining = max(0.0, eta - age)
+            done_at = datetime.fromtimestamp(now + remaining).strftime("%H:%M")
+            print(f"  ETA        {_duration(remaining)} (~{done_at})")
+
+
+def print_db_summary(eng, recent_limit=10):
     with Session(eng) as sess:
         total = sess.execute(select(func.count(ClubMatchRaw.id))).scalar() or 0
         print(f"Total club matches in DB: {total}")
@@ -25,14 +84,17 @@ def main():
             print("No matches yet. Is the crawler running? Check: systemctl status duprly-crawler")
             return
 
+        if not recent_limit:
+            return
+
         # Most recently ingested matches
         recent = sess.execute(
             select(ClubMatchRaw)
             .order_by(ClubMatchRaw.created_at.desc())
-            .limit(10)
+            .limit(recent_limit)
         ).scalars().all()
 
-        print(f"\nLast 10 matches ingested (most recent first):")
+        print(f"\nLast {recent_limit} matches ingested (most recent first):")
         print("-" * 60)
         for r in recent:
             ts = r.created_at.strftime("%Y-%m-%d %H:%M") if r.created_at else "?"
@@ -51,5 +113,37 @@ def main():
             for d, c in by_date:
                 print(f"  {d}: {c} matches")
 
+
+def show(eng, args):
+    events = read_jsonl(args.jsonl, args.run) if args.jsonl else run_events(eng, args.run)
+    if events:
+        print_telemetry(events)
+    else:
+        print("No crawl telemetry yet (crawl_event is empty).")
+    print("")
+    # in watch mode keep the screen to the live numbers
+    print_db_summary(eng, recent_limit=0 if args.watch else 10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show crawler progress, throughput and ETA")
+    parser.add_argument("--watch", type=float, default=0, metavar="SEC",
+                        help="Refresh every SEC seconds until interrupted")
+    parser.add_argument("--jsonl", default=None, help="Read events from a crawler --telemetry-jsonl file")
+    parser.add_argument("--run", default=None, help="Run key to show (default: most recent run)")
+    args = parser.parse_args()
+
+    eng = open_db()
+    if not args.watch:
+        show(eng, args)
+        return
+    try:
+        while True:
+            print("\033[H\033[J", end="")  # clear screen
+            show(eng, args)
+            time.sleep(args.watch)
+    except KeyboardInterrupt:
+        pass
+
 if __name__ == "__main__":
     main()
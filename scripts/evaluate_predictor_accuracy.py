@@ -1,11 +1,15 @@
 #!/usr/bin/env python3
 """
-Evaluate DuprPredictor accuracy on Jon's last N matches from dupr.sqlite.
+Evaluate DuprPredictor accuracy on a player's last N matches from dupr.sqlite.
 
-Outputs two scorecards:
-1) Jon-only player impacts
+Outputs two scorecards (with bootstrap confidence intervals for MAE, Pearson
+and R^2):
+1) Target-player impacts (Jon by default, see --player-id)
 2) All-player impacts (all 4 players per match)
 
+With --all-players, every player in club_match_player is scored instead and a
+per-player strict grade table is reported alongside the pooled scorecard.
+
 NOTE:
 This evaluator is the source of truth for model trustworthiness. If strict
 thresholds fail, downstream simulation scripts should be treated as directional
@@ -16,6 +20,8 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
@@ -23,13 +29,13 @@ from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
 from scipy.stats import spearmanr
-from sqlalchemy import select
+from sqlalchemy import func, select
 
 import sys
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dupr_db import ClubMatchRaw, open_db
+from dupr_db import ClubMatchRaw, club_match_unsplit, club_match_wide_select, open_db
 from dupr_predictor import DuprPredictor
 
 
@@ -40,6 +46,9 @@ STRICT_THRESHOLDS = {
     "pearson_min": 0.85,
     "mae_max": 0.020,
 }
+BOOTSTRAP_SAMPLES = 2000
+BOOTSTRAP_CONFIDENCE = 0.95
+BOOTSTRAP_CHUNK = 256
 
 
 @dataclass
@@ -61,25 +70,8 @@ class EvalMatch:
     games1: int
     games2: int
     winner: int
-    jon_slot: int
-
-
-def _safe_float(value: Any) -> Optional[float]:
-    if value is None:
-        return None
-    try:
-        return float(value)
-    except (TypeError, ValueError):
-        return None
-
-
-def _safe_int(value: Any) -> Optional[int]:
-    if value is None:
-        return None
-    try:
-        return int(value)
-    except (TypeError, ValueError):
-        return None
+    target_slot: Optional[int]
+    player_ids: Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]
 
 
 def _parse_dt(value: Any) -> Optional[datetime]:
@@ -102,70 +94,6 @@ def _parse_dt(value: Any) -> Optional[datetime]:
     return None
 
 
-def _extract_team_players(team: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
-    p1 = team.get("player1") if isinstance(team.get("player1"), dict) else None
-    p2 = team.get("player2") if isinstance(team.get("player2"), dict) else None
-    if p1 and p2:
-        return p1, p2
-    players = team.get("players")
-    if isinstance(players, list) and len(players) >= 2:
-        return (
-            players[0] if isinstance(players[0], dict) else {},
-            players[1] if isinstance(players[1], dict) else {},
-        )
-    return p1 or {}, p2 or {}
-
-
-def _extract_player_ids(player: Dict[str, Any]) -> List[str]:
-    values = []
-    if not isinstance(player, dict):
-        return values
-    for key in ("id", "duprId", "playerId", "userId"):
-        raw = player.get(key)
-        if raw is not None:
-            values.append(str(raw))
-    return values
-
-
-def _extract_player_rel(player: Dict[str, Any]) -> Optional[float]:
-    if not isinstance(player, dict):
-        return None
-    for key in (
-        "doublesReliabilityScore",
-        "doublesVerified",
-        "reliability",
-        "doublesReliability",
-        "reliabilityScore",
-        "verified",
-    ):
-        val = _safe_float(player.get(key))
-        if val is not None:
-            return val
-    ratings = player.get("ratings")
-    if isinstance(ratings, dict):
-        for key in (
-            "doublesReliabilityScore",
-            "doublesVerified",
-            "reliability",
-            "doublesReliability",
-            "reliabilityScore",
-            "verified",
-        ):
-            val = _safe_float(ratings.get(key))
-            if val is not None:
-                return val
-    return None
-
-
-def _games_from_team(team: Dict[str, Any]) -> int:
-    vals = [_safe_int(team.get(k)) for k in ("game1", "game2", "game3")]
-    vals = [v for v in vals if v is not None and v >= 0]
-    if vals:
-        return int(sum(vals))
-    fallback = _safe_int(team.get("score"))
-    return fallback if fallback is not None else 0
-
-
 def _r2_score(y_true: np.ndarray, y_pred: np.ndarray) -> float:
     ss_res = float(np.sum((y_true - y_pred) ** 2))
     ss_tot = float(np.sum((y_true - np.mean(y_true)) ** 2))
@@ -214,6 +142,72 @@ def _score_metrics(y_true: np.ndarray, y_pred: np.ndarray) -> Dict[str, Any]:
     }
 
 
+def _bootstrap_chunk(
+    y_true: np.ndarray, y_pred: np.ndarray, b: int, seed: np.random.SeedSequence
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MAE, Pearson and R^2 of `b` resamples scored together as a (b, n) index matrix."""
+    n = int(y_true.size)
+    idx = np.random.default_rng(seed).integers(0, n, size=(b, n))
+    yt = y_true[idx]
+    yp = y_pred[idx]
+    maes = np.mean(np.abs(yp - yt), axis=1)
+
+    yt_c = yt - yt.mean(axis=1, keepdims=True)
+    yp_c = yp - yp.mean(axis=1, keepdims=True)
+    ss_tot = np.sum(yt_c**2, axis=1)
+    ss_pred = np.sum(yp_c**2, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pearsons = np.sum(yt_c * yp_c, axis=1) / np.sqrt(ss_tot * ss_pred)
+        r2s = 1.0 - np.sum((yt - yp) ** 2, axis=1) / ss_tot
+    return maes, pearsons, r2s
+
+
+def _bootstrap_ci(
+    y_true: np.ndarray,
+    y_pred: np.ndarray,
+    n_boot: int = BOOTSTRAP_SAMPLES,
+    confidence: float = BOOTSTRAP_CONFIDENCE,
+    seed: int = 0,
+    workers: Optional[int] = None,
+) -> Dict[str, Dict[str, float]]:
+    """
+    Percentile bootstrap intervals for MAE, Pearson and R^2.
+
+    Resamples are split into chunks of BOOTSTRAP_CHUNK rows (bounding memory
+    on large samples) that run on a thread pool of `workers` threads (default:
+    one per CPU); NumPy releases the GIL while indexing and reducing, so the
+    chunks run concurrently without copying the inputs. Each chunk draws from
+    its own child of `seed`, so the intervals do not depend on `workers`.
+    """
+    n = int(y_true.size)
+    nan_ci = {"low": float("nan"), "high": float("nan")}
+    if n < 2 or n_boot <= 0:
+        return {"mae": dict(nan_ci), "pearson": dict(nan_ci), "r2": dict(nan_ci)}
+
+    sizes = [min(BOOTSTRAP_CHUNK, n_boot - start) for start in range(0, n_boot, BOOTSTRAP_CHUNK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    workers = max(1, min(workers or os.cpu_count() or 1, len(sizes)))
+    if workers == 1:
+        chunks = [_bootstrap_chunk(y_true, y_pred, b, s) for b, s in zip(sizes, seeds)]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(lambda job: _bootstrap_chunk(y_true, y_pred, *job), zip(sizes, seeds)))
+
+    alpha = (1.0 - confidence) / 2.0
+    q = [alpha * 100.0, (1.0 - alpha) * 100.0]
+
+    def _interval(samples: List[np.ndarray]) -> Dict[str, float]:
+        values = np.concatenate(samples)
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            return dict(nan_ci)
+        low, high = np.percentile(values, q)
+        return {"low": float(low), "high": float(high)}
+
+    maes, pearsons, r2s = zip(*chunks)
+    return {"mae": _interval(maes), "pearson": _interval(pearsons), "r2": _interval(r2s)}
+
+
 def _grade_strict(metrics: Dict[str, Any]) -> Dict[str, Any]:
     mae_ok = metrics["mae"] <= STRICT_THRESHOLDS["mae_max"]
     pearson_ok = metrics["pearson"] >= STRICT_THRESHOLDS["pearson_min"]
@@ -236,122 +230,90 @@ def _grade_strict(metrics: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def _load_jon_matches(limit: int) -> Tuple[List[EvalMatch], Dict[str, int]]:
+def _load_matches(
+    target_ids: Optional[set], limit: Optional[int]
+) -> Tuple[List[EvalMatch], Dict[str, int]]:
+    """
+    Load scorable matches from club_match_player (one row per match via
+    club_match_wide_select).
+
+    With target_ids, only matches involving one of those ids are kept and the
+    most recent `limit` are selected; with target_ids=None every match is kept.
+    """
     eng = open_db()
     rows = []
     skipped_missing_fields = 0
-    skipped_no_jon = 0
+    skipped_no_player = 0
     reliability_points = 0
     reliability_total = 0
 
-    jon_ids = {JON_ID_NUMERIC, JON_ID_SHORT}
-
     with eng.connect() as conn:
-        result = conn.execute(select(ClubMatchRaw))
-        for row in result:
-            try:
-                data = json.loads(row.raw_json)
-            except Exception:
-                continue
-            teams = data.get("teams")
-            if not isinstance(teams, list) or len(teams) != 2:
-                continue
-            t0 = teams[0] if isinstance(teams[0], dict) else {}
-            t1 = teams[1] if isinstance(teams[1], dict) else {}
-            t0p1, t0p2 = _extract_team_players(t0)
-            t1p1, t1p2 = _extract_team_players(t1)
-            slot_to_player = {1: t0p1, 2: t0p2, 3: t1p1, 4: t1p2}
-
-            jon_slot = None
-            for slot, player in slot_to_player.items():
-                if set(_extract_player_ids(player)).intersection(jon_ids):
-                    jon_slot = slot
-                    break
-            if jon_slot is None:
-                skipped_no_jon += 1
-                continue
-
-            pre0 = t0.get("preMatchRatingAndImpact") if isinstance(t0.get("preMatchRatingAndImpact"), dict) else {}
-            pre1 = t1.get("preMatchRatingAndImpact") if isinstance(t1.get("preMatchRatingAndImpact"), dict) else {}
-            r1 = _safe_float(pre0.get("preMatchDoubleRatingPlayer1"))
-            r2 = _safe_float(pre0.get("preMatchDoubleRatingPlayer2"))
-            r3 = _safe_float(pre1.get("preMatchDoubleRatingPlayer1"))
-            r4 = _safe_float(pre1.get("preMatchDoubleRatingPlayer2"))
-            i1 = _safe_float(pre0.get("matchDoubleRatingImpactPlayer1"))
-            i2 = _safe_float(pre0.get("matchDoubleRatingImpactPlayer2"))
-            i3 = _safe_float(pre1.get("matchDoubleRatingImpactPlayer1"))
-            i4 = _safe_float(pre1.get("matchDoubleRatingImpactPlayer2"))
-            if None in (r1, r2, r3, r4, i1, i2, i3, i4):
+        n_raw = conn.execute(select(func.count()).select_from(ClubMatchRaw)).scalar()
+        n_missing = conn.execute(select(func.count()).select_from(ClubMatchRaw).where(club_match_unsplit())).scalar()
+        if n_missing:
+            print(f"[WARN] {n_missing} of {n_raw} club matches have no club_match_player rows; "
+                  "run: python duprly.py build-club-match-players")
+        for row in conn.execute(club_match_wide_select()):
+            target_slot = None
+            if target_ids is not None:
+                for slot in (1, 2, 3, 4):
+                    ids = {getattr(row, f"id{slot}"), getattr(row, f"dupr_id{slot}")}
+                    if ids & target_ids:
+                        target_slot = slot
+                        break
+                if target_slot is None:
+                    skipped_no_player += 1
+                    continue
+
+            ratings = (row.r1, row.r2, row.r3, row.r4)
+            impacts = (row.imp1, row.imp2, row.imp3, row.imp4)
+            if None in ratings or None in impacts:
                 skipped_missing_fields += 1
                 continue
 
-            rel_map = {}
-            crawl_meta = data.get("_crawl_metadata")
-            if isinstance(crawl_meta, dict):
-                rel_data = crawl_meta.get("reliability")
-                if isinstance(rel_data, dict):
-                    rel_map = {
-                        1: _safe_float(rel_data.get("player1")),
-                        2: _safe_float(rel_data.get("player2")),
-                        3: _safe_float(rel_data.get("player3")),
-                        4: _safe_float(rel_data.get("player4")),
-                    }
-            if not rel_map:
-                rel_map = {
-                    1: _extract_player_rel(t0p1),
-                    2: _extract_player_rel(t0p2),
-                    3: _extract_player_rel(t1p1),
-                    4: _extract_player_rel(t1p2),
-                }
-            for slot in (1, 2, 3, 4):
-                reliability_total += 1
-                if rel_map.get(slot) is not None:
-                    reliability_points += 1
-
-            winner = 1 if bool(t0.get("winner")) else 2
+            rels = (row.rel1, row.rel2, row.rel3, row.rel4)
+            reliability_total += 4
+            reliability_points += sum(r is not None for r in rels)
+
             rows.append(
                 EvalMatch(
                     match_id=str(row.match_id),
-                    event_date=_parse_dt(data.get("eventDate") or row.event_date),
-                    r1=float(r1),
-                    r2=float(r2),
-                    r3=float(r3),
-                    r4=float(r4),
-                    rel1=rel_map.get(1),
-                    rel2=rel_map.get(2),
-                    rel3=rel_map.get(3),
-                    rel4=rel_map.get(4),
-                    imp1=float(i1),
-                    imp2=float(i2),
-                    imp3=float(i3),
-                    imp4=float(i4),
-                    games1=_games_from_team(t0),
-                    games2=_games_from_team(t1),
-                    winner=winner,
-                    jon_slot=jon_slot,
+                    event_date=_parse_dt(row.event_date),
+                    r1=ratings[0],
+                    r2=ratings[1],
+                    r3=ratings[2],
+                    r4=ratings[3],
+                    rel1=rels[0],
+                    rel2=rels[1],
+                    rel3=rels[2],
+                    rel4=rels[3],
+                    imp1=impacts[0],
+                    imp2=impacts[1],
+                    imp3=impacts[2],
+                    imp4=impacts[3],
+                    games1=row.games1 or 0,
+                    games2=row.games2 or 0,
+                    winner=1 if row.team1_won else 2,
+                    target_slot=target_slot,
+                    player_ids=(row.id1, row.id2, row.id3, row.id4),
                 )
             )
 
-    rows.sort(
-        key=lambda m: (
-            m.event_date is None,
-            m.event_date or datetime.max.replace(tzinfo=timezone.utc),
-            m.match_id,
-        ),
-        reverse=True,
-    )
-    rows = rows[:limit]
-    rows.sort(
-        key=lambda m: (
+    def _chronological(m: EvalMatch) -> Tuple[bool, datetime, str]:
+        return (
             m.event_date is None,
             m.event_date or datetime.max.replace(tzinfo=timezone.utc),
             m.match_id,
         )
-    )
+
+    if limit is not None:
+        rows.sort(key=_chronological, reverse=True)
+        rows = rows[:limit]
+    rows.sort(key=_chronological)
     coverage = {
         "matches_selected": len(rows),
         "skipped_missing_fields": skipped_missing_fields,
-        "skipped_no_jon": skipped_no_jon,
+        "skipped_no_player": skipped_no_player,
         "reliability_points_present": reliability_points,
         "reliability_points_total": reliability_total,
         "reliability_coverage_pct": float(reliability_points / reliability_total * 100.0)
@@ -361,69 +323,174 @@ def _load_jon_matches(limit: int) -> Tuple[List[EvalMatch], Dict[str, int]]:
     return rows, coverage
 
 
-def evaluate(limit: int, model_file: str) -> Dict[str, Any]:
-    matches, coverage = _load_jon_matches(limit=limit)
+def _match_arrays(matches: Sequence[EvalMatch]) -> Dict[str, np.ndarray]:
+    """Pack EvalMatch rows into (N, 4)/(N,) arrays for batch prediction."""
+    nan = float("nan")
+    return {
+        "ratings": np.array([(m.r1, m.r2, m.r3, m.r4) for m in matches], dtype=float),
+        "reliabilities": np.array(
+            [
+                tuple(nan if v is None else v for v in (m.rel1, m.rel2, m.rel3, m.rel4))
+                for m in matches
+            ],
+            dtype=float,
+        ),
+        "impacts": np.array([(m.imp1, m.imp2, m.imp3, m.imp4) for m in matches], dtype=float),
+        "games1": np.array([m.games1 for m in matches], dtype=float),
+        "winner": np.array([m.winner for m in matches], dtype=int),
+    }
+
+
+def _scorecard(
+    y_true: np.ndarray, y_pred: np.ndarray, n_boot: int, seed: int, workers: Optional[int] = None
+) -> Dict[str, Any]:
+    metrics = _score_metrics(y_true, y_pred)
+    metrics["ci"] = _bootstrap_ci(y_true, y_pred, n_boot=n_boot, seed=seed, workers=workers)
+    return {"metrics": metrics, "grade": _grade_strict(metrics)}
+
+
+def _per_player_metrics(
+    player_ids: np.ndarray, y_true: np.ndarray, y_pred: np.ndarray, min_points: int
+) -> List[Dict[str, Any]]:
+    """
+    Grouped MAE / Pearson / R^2 for every player, computed with bincount
+    sums rather than a Python loop over players.
+    """
+    keys, inverse = np.unique(player_ids, return_inverse=True)
+    n = np.bincount(inverse).astype(float)
+    sum_t = np.bincount(inverse, weights=y_true)
+    sum_p = np.bincount(inverse, weights=y_pred)
+    sum_tt = np.bincount(inverse, weights=y_true * y_true)
+    sum_pp = np.bincount(inverse, weights=y_pred * y_pred)
+    sum_tp = np.bincount(inverse, weights=y_true * y_pred)
+    sum_abs = np.bincount(inverse, weights=np.abs(y_pred - y_true))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mae = sum_abs / n
+        cov = sum_tp - sum_t * sum_p / n
+        var_t = sum_tt - sum_t * sum_t / n
+        var_p = sum_pp - sum_p * sum_p / n
+        pearson = cov / np.sqrt(var_t * var_p)
+        ss_res = sum_tt - 2.0 * sum_tp + sum_pp
+        r2 = 1.0 - ss_res / var_t
+
+    out = []
+    for i, key in enumerate(keys):
+        if n[i] < min_points:
+            continue
+        metrics = {
+            "n_points": int(n[i]),
+            "mae": float(mae[i]),
+            "pearson": float(pearson[i]) if np.isfinite(pearson[i]) else float("nan"),
+            "r2": float(r2[i]) if np.isfinite(r2[i]) else float("nan"),
+        }
+        out.append({"player_id": str(key), "metrics": metrics, "pass": _grade_strict(metrics)["pass"]})
+    out.sort(key=lambda item: (-item["metrics"]["n_points"], item["player_id"]))
+    return out
+
+
+def evaluate(
+    limit: int,
+    model_file: str,
+    player_ids: Sequence[str] = (JON_ID_NUMERIC, JON_ID_SHORT),
+    n_boot: int = BOOTSTRAP_SAMPLES,
+    seed: int = 0,
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    matches, coverage = _load_matches(set(player_ids), limit=limit)
     if not matches:
-        raise RuntimeError("No matches found for Jon with required pre/impact fields.")
+        raise RuntimeError(
+            f"No matches found for player {', '.join(player_ids)} with required pre/impact fields."
+        )
 
     predictor = DuprPredictor(model_file)
-    all_true: List[float] = []
-    all_pred: List[float] = []
-    jon_true: List[float] = []
-    jon_pred: List[float] = []
-
-    for m in matches:
-        p1, p2, p3, p4 = predictor.predict_impacts(
-            m.r1,
-            m.r2,
-            m.r3,
-            m.r4,
-            m.games1,
-            m.games2,
-            m.winner,
-            rel1=m.rel1,
-            rel2=m.rel2,
-            rel3=m.rel3,
-            rel4=m.rel4,
-        )
-        preds = [p1, p2, p3, p4]
-        trues = [m.imp1, m.imp2, m.imp3, m.imp4]
-        all_pred.extend(preds)
-        all_true.extend(trues)
-        jon_pred.append(preds[m.jon_slot - 1])
-        jon_true.append(trues[m.jon_slot - 1])
-
-    all_true_arr = np.array(all_true, dtype=float)
-    all_pred_arr = np.array(all_pred, dtype=float)
-    jon_true_arr = np.array(jon_true, dtype=float)
-    jon_pred_arr = np.array(jon_pred, dtype=float)
-
-    score_all = _score_metrics(all_true_arr, all_pred_arr)
-    score_jon = _score_metrics(jon_true_arr, jon_pred_arr)
-    grade_all = _grade_strict(score_all)
-    grade_jon = _grade_strict(score_jon)
-    overall_pass = bool(grade_all["pass"] and grade_jon["pass"])
+    arrays = _match_arrays(matches)
+    preds = predictor.predict_impacts_batch(
+        arrays["ratings"], arrays["games1"], arrays["winner"], arrays["reliabilities"]
+    )
+    trues = arrays["impacts"]
+    slot_idx = np.array([m.target_slot - 1 for m in matches], dtype=int)
+    rows = np.arange(len(matches))
+
+    card_all = _scorecard(trues.ravel(), preds.ravel(), n_boot=n_boot, seed=seed, workers=workers)
+    card_player = _scorecard(
+        trues[rows, slot_idx], preds[rows, slot_idx], n_boot=n_boot, seed=seed, workers=workers
+    )
+    grade_all = card_all["grade"]
+    grade_player = card_player["grade"]
+    overall_pass = bool(grade_all["pass"] and grade_player["pass"])
 
     return {
         "config": {
             "model_file": model_file,
             "strict_thresholds": STRICT_THRESHOLDS,
             "limit_matches": limit,
+            "player_ids": list(player_ids),
+            "bootstrap_samples": n_boot,
+            "bootstrap_confidence": BOOTSTRAP_CONFIDENCE,
         },
         "coverage": coverage,
         "scorecards": {
-            "jon_only": {"metrics": score_jon, "grade": grade_jon},
-            "all_players": {"metrics": score_all, "grade": grade_all},
+            "player_only": card_player,
+            # Name of the player scorecard before --player-id existed; kept for existing consumers.
+            "jon_only": card_player,
+            "all_players": card_all,
         },
         "overall_strict_pass": overall_pass,
         "recommendation": (
             "trusted" if overall_pass else "caution"
-            if (grade_jon["pass"] or grade_all["pass"])
+            if (grade_player["pass"] or grade_all["pass"])
             else "low_trust"
         ),
     }
 
 
+def evaluate_all_players(
+    model_file: str,
+    min_matches: int = 8,
+    n_boot: int = BOOTSTRAP_SAMPLES,
+    seed: int = 0,
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Score every player in club_match_player with at least `min_matches` matches."""
+    matches, coverage = _load_matches(None, limit=None)
+    if not matches:
+        raise RuntimeError("No matches found with required pre/impact fields.")
+
+    predictor = DuprPredictor(model_file)
+    arrays = _match_arrays(matches)
+    preds = predictor.predict_impacts_batch(
+        arrays["ratings"], arrays["games1"], arrays["winner"], arrays["reliabilities"]
+    )
+    trues = arrays["impacts"]
+    ids = np.array(
+        [pid if pid is not None else "" for m in matches for pid in m.player_ids], dtype=object
+    )
+    known = ids != ""
+
+    per_player = _per_player_metrics(
+        ids[known].astype(str), trues.ravel()[known], preds.ravel()[known], min_points=min_matches
+    )
+    card_all = _scorecard(trues.ravel(), preds.ravel(), n_boot=n_boot, seed=seed, workers=workers)
+    players_passing = sum(1 for item in per_player if item["pass"])
+
+    return {
+        "config": {
+            "model_file": model_file,
+            "strict_thresholds": STRICT_THRESHOLDS,
+            "min_matches": min_matches,
+            "bootstrap_samples": n_boot,
+            "bootstrap_confidence": BOOTSTRAP_CONFIDENCE,
+        },
+        "coverage": coverage,
+        "scorecards": {"all_players": card_all},
+        "per_player": per_player,
+        "players_evaluated": len(per_player),
+        "players_passing": players_passing,
+        "overall_strict_pass": bool(card_all["grade"]["pass"]),
+    }
+
+
 def _print_scorecard(name: str, card: Dict[str, Any]) -> None:
     metrics = card["metrics"]
     grade = card["grade"]
@@ -438,6 +505,15 @@ def _print_scorecard(name: str, card: Dict[str, Any]) -> None:
     )
     print(f"Spearman: {metrics['spearman']:.6f}")
     print(f"R^2: {metrics['r2']:.6f} (target >= {STRICT_THRESHOLDS['r2_min']:.2f})")
+    ci = metrics.get("ci")
+    if ci:
+        pct = int(round(BOOTSTRAP_CONFIDENCE * 100))
+        print(
+            f"{pct}% CI -> "
+            f"MAE [{ci['mae']['low']:.6f}, {ci['mae']['high']:.6f}], "
+            f"Pearson [{ci['pearson']['low']:.4f}, {ci['pearson']['high']:.4f}], "
+            f"R^2 [{ci['r2']['low']:.4f}, {ci['r2']['high']:.4f}]"
+        )
     print(f"Sign accuracy: {metrics['sign_accuracy']:.3%}")
     print(
         "Abs error p50/p90/p95: "
@@ -454,11 +530,56 @@ def _print_scorecard(name: str, card: Dict[str, Any]) -> None:
         )
 
 
+def _print_per_player(output: Dict[str, Any], top: int) -> None:
+    print("\nPer-player strict grades")
+    print("-" * 60)
+    print(f"Players evaluated: {output['players_evaluated']}, passing: {output['players_passing']}")
+    print("player_id     | n_points |      MAE |  Pearson |      R^2 | pass")
+    for item in output["per_player"][:top]:
+        m = item["metrics"]
+        print(
+            f"{item['player_id']:<13} | {m['n_points']:>8} | {m['mae']:>8.5f} | "
+            f"{m['pearson']:>8.4f} | {m['r2']:>8.4f} | {'yes' if item['pass'] else 'no'}"
+        )
+    if len(output["per_player"]) > top:
+        print(f"... and {len(output['per_player']) - top} more players (use --json for all)")
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(
-        description="Evaluate DuprPredictor accuracy on Jon's last matches from dupr.sqlite."
+        description="Evaluate DuprPredictor accuracy on a player's last matches from dupr.sqlite."
+    )
+    parser.add_argument("--limit", type=int, default=74, help="How many recent matches for the target player.")
+    parser.add_argument(
+        "--player-id",
+        action="append",
+        default=None,
+        help="Target player id (numeric or short DUPR id); repeat for aliases. Defaults to Jon.",
+    )
+    parser.add_argument(
+        "--all-players",
+        action="store_true",
+        help="Evaluate every player in the DB instead of a single target player.",
+    )
+    parser.add_argument(
+        "--min-matches",
+        type=int,
+        default=8,
+        help="With --all-players, skip players with fewer scored matches.",
+    )
+    parser.add_argument(
+        "--bootstrap",
+        type=int,
+        default=BOOTSTRAP_SAMPLES,
+        help="Bootstrap resamples for confidence intervals (0 disables).",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Bootstrap RNG seed.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Threads for bootstrap resampling (default: one per CPU).",
     )
-    parser.add_argument("--limit", type=int, default=74, help="How many recent Jon matches.")
     parser.add_argument(
         "--model-file", default="dupr_model.json", help="Path to dupr model json."
     )
@@ -467,7 +588,23 @@ def main() -> int:
     )
     args = parser.parse_args()
 
-    output = evaluate(limit=args.limit, model_file=args.model_file)
+    if args.all_players:
+        output = evaluate_all_players(
+            model_file=args.model_file,
+            min_matches=args.min_matches,
+            n_boot=args.bootstrap,
+            seed=args.seed,
+            workers=args.workers,
+        )
+    else:
+        output = evaluate(
+            limit=args.limit,
+            model_file=args.model_file,
+            player_ids=args.player_id or (JON_ID_NUMERIC, JON_ID_SHORT),
+            n_boot=args.bootstrap,
+            seed=args.seed,
+            workers=args.workers,
+        )
     if args.json:
         print(json.dumps(output, indent=2, sort_keys=True))
         return 0
@@ -484,10 +621,18 @@ def main() -> int:
     print(
         "Skipped rows -> "
         f"missing_fields={cov['skipped_missing_fields']}, "
-        f"not_jon={cov['skipped_no_jon']}"
+        f"not_player={cov['skipped_no_player']}"
     )
 
-    _print_scorecard("Jon-only scorecard", output["scorecards"]["jon_only"])
+    if args.all_players:
+        _print_scorecard("All-player scorecard", output["scorecards"]["all_players"])
+        _print_per_player(output, top=25)
+        print("\nOverall strict status")
+        print("-" * 60)
+        print(f"Pooled strict pass: {'YES' if output['overall_strict_pass'] else 'NO'}")
+        return 0
+
+    _print_scorecard("Player-only scorecard", output["scorecards"]["player_only"])
     _print_scorecard("All-player scorecard", output["scorecards"]["all_players"])
 
     print("\nOverall strict status")
@@ -499,4 +644,3 @@ def main() -> int:
 
 if __name__ == "__main__":
     raise SystemExit(main())
-
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Export club matches to a fixed-width, memory-mappable match array (.npy).
+
+One MATCH_DTYPE record per match (layout documented in dupr_match_array),
+built from club_match_player with a single SQL join. Simulation and fitting
+workers then map the file read-only (dupr_match_array.open_match_array,
+dupr_shadow_calculator.MatchArrayIndex.open) and share it instead of each
+re-reading the DB. Re-run after a crawl; the file is replaced atomically.
+
+Run from repo root:
+  python scripts/export_match_array.py                       # -> club_matches.npy
+  python scripts/export_match_array.py --club-id 123 --out club123.npy
+  python scripts/shadow_reset.py --dupr-id 0YVNWN --from-db --match-array club_matches.npy
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+from sqlalchemy import create_engine, func, select
+
+from dupr_db import ClubMatchRaw, club_match_unsplit, ensure_schema
+from dupr_match_array import NO_DAY, build_match_array, write_match_array
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export club matches to a memory-mappable .npy match array")
+    parser.add_argument("--db", default="dupr.sqlite", help="SQLite file (default: dupr.sqlite)")
+    parser.add_argument("--out", default="club_matches.npy", help="Output file (default: club_matches.npy)")
+    parser.add_argument("--club-id", type=int, default=None, help="Only matches of this club")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"Error: {args.db} not found")
+        sys.exit(1)
+    engine = create_engine(f"sqlite+pysqlite:///{args.db}", echo=False)
+    ensure_schema(engine)
+
+    t0 = time.perf_counter()
+    with engine.connect() as conn:
+        n_raw = conn.execute(select(func.count()).select_from(ClubMatchRaw)).scalar()
+        n_missing = conn.execute(select(func.count()).select_from(ClubMatchRaw).where(club_match_unsplit())).scalar()
+        if n_missing:
+            print(f"[WARN] {n_missing} of {n_raw} club matches have no club_match_player rows; "
+                  "run: python duprly.py build-club-match-players")
+        arr = build_match_array(conn, club_id=args.club_id)
+    write_match_array(arr, args.out)
+
+    complete = int((~np.isnan(arr["rating"]).any(axis=1)).sum())
+    dated = arr["event_day"][arr["event_day"] != NO_DAY]
+    span = ""
+    if len(dated):
+        span = f", {np.datetime64(int(dated.min()), 'D')} .. {np.datetime64(int(dated.max()), 'D')}"
+    print(f"wrote {len(arr)} matches ({complete} with all four ratings{span}) to {args.out}: "
+          f"{os.path.getsize(args.out) / 1e6:.1f} MB, {arr.dtype.itemsize} bytes/match, "
+          f"{time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
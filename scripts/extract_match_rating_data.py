@@ -1,85 +1,50 @@
 #!/usr/bin/env python3
 """
-Read club_match_raw and output a CSV with one row per match for fitting the DUPR model.
+Read club matches and output a CSV with one row per match for fitting the DUPR model.
+The fields come from the club_match_player table the crawler fills (one SQL
+join), not from re-parsing club_match_raw JSON.
 Columns: match_id, event_date, r1..r4 (pre ratings), imp1..imp4 (impacts), games1, games2, winner (1 or 2).
 Run from repo root. Output: match_rating_data.csv
 """
 
-import json
 import csv
 import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from dupr_db import open_db, ClubMatchRaw
-from sqlalchemy import select
+from dupr_db import open_db, ClubMatchRaw, club_match_unsplit, club_match_wide_select
+from sqlalchemy import func, select
 
-def games_from_team(team):
-    g1, g2, g3 = team.get("game1") or 0, team.get("game2") or 0, team.get("game3") or 0
-    total = 0
-    for g in (g1, g2, g3):
-        if g is not None and g >= 0:
-            total += g
-    return total
-
-def extract_reliability_from_match(data):
-    """Extract reliability from match data (from _crawl_metadata if available)"""
-    crawl_meta = data.get("_crawl_metadata", {})
-    rel_data = crawl_meta.get("reliability", {})
-    
-    rel1 = rel_data.get("player1")
-    rel2 = rel_data.get("player2")
-    rel3 = rel_data.get("player3")
-    rel4 = rel_data.get("player4")
-    
-    return rel1, rel2, rel3, rel4
+def _csv_value(v):
+    return v if v is not None else ""
 
 def main():
     eng = open_db()
     out_path = Path(__file__).resolve().parent.parent / "match_rating_data.csv"
     rows = []
     with eng.connect() as conn:
-        result = conn.execute(select(ClubMatchRaw))
-        for r in result:
-            try:
-                data = json.loads(r.raw_json)
-            except Exception:
-                continue
-            teams = data.get("teams", [])
-            if len(teams) != 2:
-                continue
-            t0, t1 = teams[0], teams[1]
-            pre0 = t0.get("preMatchRatingAndImpact") or {}
-            pre1 = t1.get("preMatchRatingAndImpact") or {}
-            r1 = pre0.get("preMatchDoubleRatingPlayer1")
-            r2 = pre0.get("preMatchDoubleRatingPlayer2")
-            r3 = pre1.get("preMatchDoubleRatingPlayer1")
-            r4 = pre1.get("preMatchDoubleRatingPlayer2")
-            i1 = pre0.get("matchDoubleRatingImpactPlayer1")
-            i2 = pre0.get("matchDoubleRatingImpactPlayer2")
-            i3 = pre1.get("matchDoubleRatingImpactPlayer1")
-            i4 = pre1.get("matchDoubleRatingImpactPlayer2")
-            if None in (r1, r2, r3, r4, i1, i2, i3, i4):
-                continue
-            g1 = games_from_team(t0)
-            g2 = games_from_team(t1)
-            winner = 1 if t0.get("winner") else 2
-            
-            # Extract reliability
-            rel1, rel2, rel3, rel4 = extract_reliability_from_match(data)
-            
+        n_raw = conn.execute(select(func.count()).select_from(ClubMatchRaw)).scalar()
+        n_missing = conn.execute(select(func.count()).select_from(ClubMatchRaw).where(club_match_unsplit())).scalar()
+        if n_missing:
+            print(f"[WARN] {n_missing} of {n_raw} club matches have no club_match_player rows; "
+                  "run: python duprly.py build-club-match-players")
+        # only matches with every pre-match rating and impact
+        stmt = club_match_wide_select()
+        for col in ("r1", "r2", "r3", "r4", "imp1", "imp2", "imp3", "imp4"):
+            stmt = stmt.where(stmt.selected_columns[col].is_not(None))
+        for r in conn.execute(stmt):
             rows.append({
                 "match_id": r.match_id,
                 "event_date": r.event_date or "",
-                "r1": r1, "r2": r2, "r3": r3, "r4": r4,
-                "rel1": rel1 if rel1 is not None else "",
-                "rel2": rel2 if rel2 is not None else "",
-                "rel3": rel3 if rel3 is not None else "",
-                "rel4": rel4 if rel4 is not None else "",
-                "imp1": i1, "imp2": i2, "imp3": i3, "imp4": i4,
-                "games1": g1, "games2": g2,
-                "winner": winner,
+                "r1": r.r1, "r2": r.r2, "r3": r.r3, "r4": r.r4,
+                "rel1": _csv_value(r.rel1),
+                "rel2": _csv_value(r.rel2),
+                "rel3": _csv_value(r.rel3),
+                "rel4": _csv_value(r.rel4),
+                "imp1": r.imp1, "imp2": r.imp2, "imp3": r.imp3, "imp4": r.imp4,
+                "games1": r.games1 or 0, "games2": r.games2 or 0,
+                "winner": 1 if r.team1_won else 2,
             })
     if not rows:
         print("No rows extracted. Run crawl_club_matches.py first.")
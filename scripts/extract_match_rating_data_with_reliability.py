@@ -6,7 +6,6 @@ Columns: match_id, event_date, r1..r4, rel1..rel4, imp1..imp4, games1, games2, w
 Run from repo root. Output: match_rating_data_with_reliability.csv
 """
 
-import json
 import csv
 import sys
 from pathlib import Path
@@ -14,6 +13,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from dupr_db import open_db, ClubMatchRaw
+from dupr_raw_codec import load_raw
 from sqlalchemy import select
 
 def games_from_team(team):
@@ -116,7 +116,7 @@ def main():
         for r in result:
             total_matches += 1
             try:
-                data = json.loads(r.raw_json)
+                data = load_raw(conn, r.raw_json, r.raw_codec, r.raw_data)
             except Exception:
                 continue
             teams = data.get("teams", [])
@@ -195,7 +195,7 @@ def main():
             result = conn.execute(select(ClubMatchRaw).limit(1))
             for r in result:
                 try:
-                    data = json.loads(r.raw_json)
+                    data = load_raw(conn, r.raw_json, r.raw_codec, r.raw_data)
                     print("\nSample match JSON keys:")
                     print(f"  Top level: {list(data.keys())[:10]}")
                     if "teams" in data and len(data["teams"]) > 0:
@@ -4,9 +4,15 @@ Fit DUPR rating impact model from match_rating_data.csv.
 Outputs: fit_results.txt with fitted parameters and accuracy.
 """
 
+import argparse
 import csv
 import json
 import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dupr_profile import add_profile_arguments, profiling_from_args, span
 
 # Check dependencies
 try:
@@ -104,13 +110,14 @@ def main():
     log("Fitting model (K, scale)...")
     log("This may take 30-60 seconds...\n")
     try:
-        result = minimize(
-            loss_function,
-            x0=[0.01, 400],
-            args=(train_data,),
-            method='Nelder-Mead',
-            options={'maxiter': 500, 'xatol': 1e-6}
-        )
+        with span("fit"):
+            result = minimize(
+                loss_function,
+                x0=[0.01, 400],
+                args=(train_data,),
+                method='Nelder-Mead',
+                options={'maxiter': 500, 'xatol': 1e-6}
+            )
         K_fit, scale_fit = result.x
     except Exception as e:
         log(f"ERROR during fitting: {e}")
@@ -186,4 +193,7 @@ def main():
         f.write('\n'.join(output_lines))
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Fit the DUPR impact model from match_rating_data.csv")
+    add_profile_arguments(parser, "fit-profile.collapsed")
+    with profiling_from_args(parser.parse_args()):
+        main()
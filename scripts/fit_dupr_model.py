@@ -8,12 +8,20 @@ Since we don't have reliability in CSV, we'll:
 2. Optionally fetch reliability for players and refit
 """
 
+import argparse
 import csv
+import sys
+from pathlib import Path
+
 import numpy as np
 from scipy.optimize import minimize
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 import json
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dupr_profile import add_profile_arguments, profiling_from_args, span
+
 def load_data(csv_path):
     """Load match data from CSV"""
     rows = []
@@ -111,13 +119,14 @@ def main():
     
     # Initial guess: K=0.01, scale=400 (standard ELO)
     log("\nFitting model (K, scale)...")
-    result = minimize(
-        loss_function,
-        x0=[0.01, 400],
-        args=(train_data,),
-        method='Nelder-Mead',
-        options={'maxiter': 1000}
-    )
+    with span("fit"):
+        result = minimize(
+            loss_function,
+            x0=[0.01, 400],
+            args=(train_data,),
+            method='Nelder-Mead',
+            options={'maxiter': 1000}
+        )
     
     K_fit, scale_fit = result.x
     log(f"\nFitted parameters:")
@@ -182,8 +191,12 @@ def main():
     log_file.close()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit the DUPR impact model from match_rating_data.csv")
+    add_profile_arguments(parser, "fit-profile.collapsed")
+    args = parser.parse_args()
     try:
-        main()
+        with profiling_from_args(args):
+            main()
     except Exception as e:
         with open('fit_error.txt', 'w') as f:
             import traceback
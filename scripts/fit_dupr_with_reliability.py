@@ -4,12 +4,18 @@ Fit DUPR model WITH reliability included.
 Formula: impact = K * (actual_games - expected_games) * g(reliability)
 """
 
+import argparse
 import csv
 import json
+import sys
 import numpy as np
 from scipy.optimize import minimize
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dupr_profile import add_profile_arguments, profiling_from_args, span
+
 def load_data(csv_path):
     """Load match data with reliability"""
     matches = []
@@ -152,13 +158,14 @@ def main():
     
     # Fit with inverse reliability function: g(rel) = a / (1 + rel/b)
     try:
-        result = minimize(
-            loss_function_inverse,
-            x0=[0.01, 400, 1.0, 100.0],  # K, scale, a, b
-            args=(train_data,),
-            method='Nelder-Mead',
-            options={'maxiter': 1000}
-        )
+        with span("fit"):
+            result = minimize(
+                loss_function_inverse,
+                x0=[0.01, 400, 1.0, 100.0],  # K, scale, a, b
+                args=(train_data,),
+                method='Nelder-Mead',
+                options={'maxiter': 1000}
+            )
         
         K_fitted = result.x[0]
         scale_fitted = result.x[1]
@@ -245,4 +252,7 @@ def main():
     print("="*80)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Fit the DUPR impact model with reliability from match_rating_data.csv")
+    add_profile_arguments(parser, "fit-profile.collapsed")
+    with profiling_from_args(parser.parse_args()):
+        main()
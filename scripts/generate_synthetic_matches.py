@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic club and bulk-load its match history into a sqlite DB.
+
+Players get a hidden skill, an activity level and a few regular partners;
+DuprPredictor (dupr_model.json) is the ground-truth rating process, so the
+preMatchRatingAndImpact values in club_match_raw follow the fitted model
+exactly (plus --impact-noise). Matches go into club_match_raw and, unless
+--raw-only, the match / match_team / player tables. Writes to a separate DB
+by default; point --db at dupr.sqlite only on purpose.
+
+Usage:
+  python scripts/generate_synthetic_matches.py --players 20000 --matches 2000000
+  python scripts/generate_synthetic_matches.py --db synthetic.sqlite --matches 50000 --impact-noise 0.005
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine
+
+from dupr_db import ensure_schema
+from dupr_predictor import DuprPredictor
+from dupr_synthetic import MATCH_ID_BASE, iter_matches, make_players, write_to_db
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load synthetic DUPR club matches")
+    parser.add_argument("--db", default="synthetic.sqlite", help="sqlite file to write (created if missing)")
+    parser.add_argument("--players", type=int, default=5000)
+    parser.add_argument("--matches", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=365, help="spread matches over this many days")
+    parser.add_argument("--club-id", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--first-match-id", type=int, default=MATCH_ID_BASE)
+    parser.add_argument("--model-file", default="dupr_model.json", help="DuprPredictor model used as ground truth")
+    parser.add_argument("--no-predictor", action="store_true", help="use the simple built-in impact rule instead")
+    parser.add_argument("--impact-noise", type=float, default=0.0, help="std dev of Gaussian noise added to impacts")
+    parser.add_argument("--raw-only", action="store_true", help="only fill club_match_raw")
+    parser.add_argument("--batch", type=int, default=5000, help="matches per transaction")
+    args = parser.parse_args()
+
+    predictor = None if args.no_predictor else DuprPredictor(args.model_file)
+    engine = create_engine(f"sqlite+pysqlite:///{args.db}", echo=False)
+    ensure_schema(engine)
+
+    rng = random.Random(args.seed)
+    players = make_players(args.players, rng)
+    matches = iter_matches(
+        players, args.matches, rng,
+        club_id=args.club_id, days=args.days, predictor=predictor,
+        impact_noise=args.impact_noise, first_match_id=args.first_match_id,
+    )
+
+    started = time.time()
+    last = [started]
+
+    def progress(n):
+        now = time.time()
+        if now - last[0] >= 5 or n == args.matches:
+            last[0] = now
+            print(f"  {n:,}/{args.matches:,} matches ({n / max(now - started, 1e-9):,.0f}/s)", flush=True)
+
+    print(f"generating {args.matches:,} matches for {args.players:,} players into {args.db}"
+          f" ({'simple rule' if predictor is None else args.model_file})")
+    n = write_to_db(
+        engine, players, matches,
+        club_id=args.club_id, normalized=not args.raw_only, batch_size=args.batch, progress=progress,
+    )
+    elapsed = time.time() - started
+    print(f"wrote {n:,} matches in {elapsed:.1f}s ({args.matches - n:,} already stored)")
+
+
+if __name__ == "__main__":
+    main()
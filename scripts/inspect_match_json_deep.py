@@ -11,6 +11,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from dupr_db import open_db, ClubMatchRaw
+from dupr_raw_codec import load_raw
 from sqlalchemy import select
 
 def deep_inspect_json(obj, path="", max_depth=5, current_depth=0):
@@ -46,7 +47,7 @@ def main():
             print(f"{'='*80}")
             
             try:
-                data = json.loads(r.raw_json)
+                data = load_raw(conn, r.raw_json, r.raw_codec, r.raw_data)
                 
                 # First, do a deep search for reliability-related keys
                 print("\n🔍 Searching for reliability-related keys...")
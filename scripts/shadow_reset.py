@@ -26,8 +26,9 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from dupr_client import DuprClient
 from dupr_predictor import DuprPredictor
+from dupr_profile import add_profile_arguments, profiling_from_args, span
 from shadow_reset_history import persist_shadow_run
-from dupr_shadow_calculator import simulate_shadow_reset
+from dupr_shadow_calculator import MatchArrayIndex, MatchIndex, simulate_shadow_reset
 
 PLAN_REFERENCE = ".cursor/plans/shadow_reset_calculator_860a546f.plan.md"
 
@@ -178,16 +179,32 @@ def parse_args() -> argparse.Namespace:
         default="shadow_reset_history.db",
         help="SQLite file path for persisting run history.",
     )
+    parser.add_argument(
+        "--from-db",
+        action="store_true",
+        help="Replay matches stored in local club_match_raw instead of fetching history from DUPR.",
+    )
+    parser.add_argument(
+        "--match-array",
+        default=None,
+        help="With --from-db, replay from this scripts/export_match_array.py file instead of the DB.",
+    )
     parser.add_argument(
         "--no-log",
         action="store_true",
         help="Disable writing run results to SQLite history.",
     )
+    add_profile_arguments(parser, "shadow-reset-profile.collapsed")
     return parser.parse_args()
 
 
 def main() -> int:
     args = parse_args()
+    with profiling_from_args(args):
+        return run(args)
+
+
+def run(args: argparse.Namespace) -> int:
     load_dotenv()
     _print_model_warning()
 
@@ -220,22 +237,34 @@ def main() -> int:
         print("Could not determine baseline rating; pass --baseline-rating explicitly.")
         return 1
 
-    rc_matches, matches = dupr.get_member_match_history_p(resolved_player_id)
-    if rc_matches != 200 or not isinstance(matches, list):
-        print(f"Failed to fetch match history (status: {rc_matches}).")
-        return 1
+    if args.from_db:
+        if args.match_array:
+            matches = MatchArrayIndex.open(args.match_array)
+        else:
+            from dupr_db import open_db
+
+            matches = MatchIndex.from_club_match_raw(open_db())
+        if resolved_player_id not in matches:
+            print(f"No stored club matches for player {resolved_player_id}.")
+            return 1
+    else:
+        rc_matches, matches = dupr.get_member_match_history_p(resolved_player_id)
+        if rc_matches != 200 or not isinstance(matches, list):
+            print(f"Failed to fetch match history (status: {rc_matches}).")
+            return 1
 
     predictor = DuprPredictor(args.model_file)
-    payload = simulate_shadow_reset(
-        predictor=predictor,
-        raw_matches=matches,
-        player_id=resolved_player_id,
-        windows=args.windows,
-        mode=args.mode,
-        min_rel=args.min_rel,
-        baseline_rating=baseline,
-        current_reliability=current_rel,
-    )
+    with span("predict"):
+        payload = simulate_shadow_reset(
+            predictor=predictor,
+            raw_matches=matches,
+            player_id=resolved_player_id,
+            windows=args.windows,
+            mode=args.mode,
+            min_rel=args.min_rel,
+            baseline_rating=baseline,
+            current_reliability=current_rel,
+        )
 
     print(f"Player: {player.get('fullName', 'Unknown')} ({args.dupr_id})")
     print(f"Resolved player id: {resolved_player_id}")
@@ -247,14 +276,15 @@ def main() -> int:
     print(f"Total usable matches found: {payload.get('total_player_matches_available', 0)}")
     _print_result_table(payload)
     if not args.no_log:
-        run_id = persist_shadow_run(
-            payload=payload,
-            player_name=player.get("fullName"),
-            requested_dupr_id=args.dupr_id,
-            baseline_rating=baseline,
-            current_reliability=current_rel,
-            db_path=args.history_db,
-        )
+        with span("db_write"):
+            run_id = persist_shadow_run(
+                payload=payload,
+                player_name=player.get("fullName"),
+                requested_dupr_id=args.dupr_id,
+                baseline_rating=baseline,
+                current_reliability=current_rel,
+                db_path=args.history_db,
+            )
         print(f"Saved run to SQLite: {args.history_db} (run_id={run_id})")
     return 0
 
@@ -11,7 +11,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from dupr_predictor import DuprPredictor
-from dupr_shadow_calculator import simulate_shadow_reset
+from dupr_shadow_calculator import MatchIndex, simulate_shadow_reset
 
 
 def _build_sample_matches() -> list[dict]:
@@ -168,6 +168,16 @@ def main() -> int:
     assert payload_a["results"]["3"]["matches_considered"] == 3
     assert "shadow_rating" in payload_a["results"]["3"]
 
+    indexed_payload = simulate_shadow_reset(
+        predictor=predictor,
+        raw_matches=MatchIndex(sample),
+        player_id="p1",
+        windows=[2, 3],
+        mode="include_all",
+        baseline_rating=4.0,
+    )
+    assert indexed_payload == payload_a, "Indexed replay must match raw-JSON replay."
+
     threshold_payload = simulate_shadow_reset(
         predictor=predictor,
         raw_matches=sample,